@@ -20,7 +20,17 @@ def __getattr__(name):
         from .models import ExtModel
 
         return ExtModel
+    if name == 'attr_definition_registry':
+        from .registry import attr_definition_registry
+
+        return attr_definition_registry
     raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 
-__all__ = ['BaseModel', 'ModelDefinitionModel', 'AttrDefinitionModel', 'ExtModel']
+__all__ = [
+    'BaseModel',
+    'ModelDefinitionModel',
+    'AttrDefinitionModel',
+    'ExtModel',
+    'attr_definition_registry',
+]
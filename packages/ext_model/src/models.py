@@ -1,6 +1,9 @@
 from typing import Any
 
 from django.db import models
+from django.db.models.constants import LOOKUP_SEP
+
+from .registry import EMPTY_DEFINITIONS, attr_definition_registry
 
 
 class ModelDefinitionModel(models.Model):
@@ -15,7 +18,180 @@ class ModelDefinitionModel(models.Model):
         return self.code + '-' + self.name
 
 
-class ExtModelManger(models.Manager):
+class ExtQuerySet(models.QuerySet):
+    """
+    扩展模型查询集
+    调用with_definition(model_id)后，filter/exclude/order_by/values/only等方法中的属性名称
+    会被转换为对应的扩展字段(attr_id)，从而在数据库中完成过滤与排序
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ext_definitions = EMPTY_DEFINITIONS
+
+    def _clone(self):
+        c = super()._clone()
+        c._ext_definitions = self._ext_definitions
+        return c
+
+    def with_definition(self, model_id, definition_model=None):
+        """按模型定义开启属性名称转换"""
+        if definition_model is None:
+            definition_model = self.model().get_ext_definition_model()
+        clone = self._chain()
+        clone._ext_definitions = attr_definition_registry.get(definition_model, model_id)
+        return clone
+
+    @property
+    def ext_definitions(self):
+        return self._ext_definitions
+
+    def translate_name(self, name: str) -> str:
+        """将属性名称（可带lookup或排序前缀）转换为扩展字段名称"""
+        if not self._ext_definitions:
+            return name
+        prefix = ''
+        if name[:1] in ('-', '+'):
+            prefix, name = name[0], name[1:]
+        head, sep, tail = name.partition(LOOKUP_SEP)
+        attr_def = self._ext_definitions.get(head)
+        if attr_def is None:
+            return prefix + name
+        return prefix + attr_def.attr_id + sep + tail
+
+    def translate_q(self, q: models.Q) -> models.Q:
+        translated = q.copy()
+        translated.children = [
+            self.translate_q(child)
+            if isinstance(child, models.Q)
+            else (self.translate_name(child[0]), child[1])
+            for child in q.children
+        ]
+        return translated
+
+    def translate_expression(self, expression):
+        if isinstance(expression, str):
+            return self.translate_name(expression)
+        if isinstance(expression, models.F):
+            return models.F(self.translate_name(expression.name))
+        if isinstance(expression, models.Q):
+            return self.translate_q(expression)
+        if isinstance(expression, models.expressions.OrderBy):
+            expression = expression.copy()
+            expression.expression = self.translate_expression(expression.expression)
+        return expression
+
+    def _filter_or_exclude(self, negate, args, kwargs):
+        if self._ext_definitions:
+            args = tuple(self.translate_expression(arg) for arg in args)
+            kwargs = {self.translate_name(key): value for key, value in kwargs.items()}
+        return super()._filter_or_exclude(negate, args, kwargs)
+
+    def order_by(self, *field_names):
+        return super().order_by(*(self.translate_expression(name) for name in field_names))
+
+    def values(self, *fields, **expressions):
+        # 属性名称以别名方式返回，结果中的键仍为属性名称；
+        # 与模型字段同名的属性不能作为别名，以扩展字段名称返回
+        model_fields = self.get_model_field_names()
+        plain_fields = []
+        for field in fields:
+            if field in self._ext_definitions and field not in model_fields:
+                expressions.setdefault(field, models.F(self._ext_definitions[field].attr_id))
+            else:
+                plain_fields.append(self.translate_name(field))
+        return super().values(*plain_fields, **expressions)
+
+    def values_list(self, *fields, flat=False, named=False):
+        fields = tuple(self.translate_expression(field) for field in fields)
+        return super().values_list(*fields, flat=flat, named=named)
+
+    def only(self, *fields):
+        return super().only(*(self.translate_name(field) for field in fields))
+
+    def defer(self, *fields):
+        if fields == (None,):
+            return super().defer(None)
+        return super().defer(*(self.translate_name(field) for field in fields))
+
+    def update(self, **kwargs):
+        kwargs = {self.translate_name(key): value for key, value in kwargs.items()}
+        return super().update(**kwargs)
+
+    def get_attr_map(self, ext_fields=None) -> dict[str, str]:
+        """属性名称到扩展字段的映射，未传ext_fields时使用with_definition的定义"""
+        if ext_fields is None:
+            ext_fields = self._ext_definitions.values()
+        return {field.attr_name: field.attr_id for field in ext_fields}
+
+    def get_model_field_names(self) -> set[str]:
+        """模型字段的名称及列属性名称（如category_id）"""
+        names = set()
+        for field in self.model._meta.get_fields():
+            names.add(field.name)
+            names.add(getattr(field, 'attname', field.name))
+        return names
+
+    def get_audit_fields(self, user, names) -> dict[str, Any]:
+        if user is None:
+            return {}
+        field_names = {field.name for field in self.model._meta.concrete_fields}
+        return {name: user for name in names if name in field_names}
+
+    def bulk_create(self, objs, batch_size=None, ext_fields=None, user=None, **kwargs):
+        """
+        批量创建，objs可以是模型实例或以属性名称为键的字典
+        属性名称映射每次调用只计算一次；传入user时填充create_user和update_user
+        返回的实例已设置主键
+        """
+        attr_map = self.get_attr_map(ext_fields)
+        audit_fields = self.get_audit_fields(user, ('create_user', 'update_user'))
+        instances = []
+        for obj in objs:
+            instance = obj
+            if isinstance(obj, dict):
+                instance = self.model(
+                    **{attr_map.get(key, key): value for key, value in obj.items()}
+                )
+            for name, value in audit_fields.items():
+                if getattr(instance, f'{name}_id') is None:
+                    setattr(instance, name, value)
+            instances.append(instance)
+        for option in ('update_fields', 'unique_fields'):
+            if kwargs.get(option):
+                kwargs[option] = [attr_map.get(name, name) for name in kwargs[option]]
+        return super().bulk_create(instances, batch_size=batch_size, **kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None, ext_fields=None, user=None):
+        """
+        批量更新，fields可以使用属性名称
+        实例上以属性名称赋值的数据会被转移到对应的扩展字段；传入user时填充update_user
+        返回更新的行数
+        """
+        attr_map = self.get_attr_map(ext_fields)
+        update_fields = [attr_map.get(name, name) for name in fields]
+        renamed = {name: attr_map[name] for name in fields if name in attr_map}
+        audit_fields = self.get_audit_fields(user, ('update_user',))
+        # bulk_update不会调用pre_save，auto_now字段需手动刷新
+        auto_now_fields = [
+            field for field in self.model._meta.concrete_fields if getattr(field, 'auto_now', False)
+        ]
+        objs = list(objs)
+        for obj in objs:
+            for attr_name, attr_id in renamed.items():
+                if attr_name in obj.__dict__:
+                    setattr(obj, attr_id, obj.__dict__.pop(attr_name))
+            for name, value in audit_fields.items():
+                setattr(obj, name, value)
+            for field in auto_now_fields:
+                field.pre_save(obj, add=False)
+        for name in [*audit_fields, *(field.name for field in auto_now_fields)]:
+            if name not in update_fields:
+                update_fields.append(name)
+        return super().bulk_update(objs, update_fields, batch_size=batch_size)
+
+
+class ExtModelManger(models.Manager.from_queryset(ExtQuerySet)):
     def create(self, **kwargs):
         self.transform(kwargs)
         return super().create(**kwargs)
@@ -45,8 +221,8 @@ class ExtModel(models.Model):
 
     def save(self, *args, force_insert=False, force_update=False, using=None, update_fields=None):
         update_field_list = []
-        ext_fields = self.get_ext_field_definitions()
         if update_fields is not None:
+            ext_fields = self.get_ext_field_definitions()
             for field_name in update_fields:
                 field_def = ext_fields.get(field_name, None)
                 if field_def:
@@ -65,7 +241,6 @@ class ExtModel(models.Model):
         )
 
     __model_id = None
-    __attr_definition_cache: dict[str, Any] = {}  # 使用空字典字面量代替dict()
 
     @classmethod
     def get_ext_prefix(cls):
@@ -97,31 +272,14 @@ class ExtModel(models.Model):
     def __get_attr_definition_map(self):
         """
         获取属性定义映射，用于代理模式
-        返回格式: {attr_name: attr_id}
+        返回格式: {attr_name: AttrDefinition}
         """
         # 避免循环引用：使用try-except捕获可能的递归错误
         try:
-            if len(self.__attr_definition_cache.keys()) == 0:
-                # 获取与该模型关联的所有属性定义
-                DefinitionModel = self.get_ext_definition_model()
-                AttrModel = DefinitionModel.get_child_model()
-                attr_definitions = AttrModel.objects.filter(model_id=self.model_id).all()
-
-                for attr_def in attr_definitions:
-                    self.__attr_definition_cache.setdefault(
-                        attr_def.attr_name,
-                        {
-                            'attr_name': attr_def.attr_name,
-                            'attr_id': attr_def.attr_id,
-                            'attr_description': attr_def.attr_description,
-                            'attr_label': attr_def.attr_label,
-                        },
-                    )
-
-            return self.__attr_definition_cache
+            return attr_definition_registry.get(self.get_ext_definition_model(), self.model_id)
         except RecursionError:
             # 如果发生递归错误，返回空字典
-            return {}
+            return EMPTY_DEFINITIONS
 
     def get_ext_model_id(self):
         """
@@ -132,13 +290,9 @@ class ExtModel(models.Model):
     def get_ext_field_definitions(self):
         """
         获取所有扩展字段的定义元数据
-        返回格式: {field_label: {attr_name, attr_id, attr_description}}
+        返回格式: {attr_name: AttrDefinition(attr_name, attr_id, attr_description, attr_label)}
         """
-
-        if len(self.__attr_definition_cache.keys()) > 0:
-            return self.__attr_definition_cache
-        else:
-            return self.__get_attr_definition_map()
+        return self.__get_attr_definition_map()
 
     def update_ext_fields(self, data: dict[str, Any]):
         """
@@ -148,7 +302,7 @@ class ExtModel(models.Model):
         for key, value in data.items():
             if key in definitions:
                 field = definitions.get(key)
-                setattr(self, field['attr_id'], value)
+                setattr(self, field.attr_id, value)
             else:
                 setattr(self, key, value)
         return self
@@ -0,0 +1,128 @@
+"""属性定义注册表
+
+按 (定义模型, model_id) 缓存属性定义映射，属性定义保存或删除时通过信号失效。
+post_save在事务提交前触发，失效时其他线程仍可能读到提交前的数据，因此提交后再失效一次；
+加载期间发生过失效的结果不写入缓存。
+"""
+
+import threading
+from types import MappingProxyType
+from typing import Any, NamedTuple
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+class AttrDefinition(NamedTuple):
+    attr_name: str
+    attr_id: str
+    attr_description: str | None
+    attr_label: str
+
+
+EMPTY_DEFINITIONS: MappingProxyType = MappingProxyType({})
+
+
+class AttrDefinitionRegistry:
+    """进程级属性定义注册表
+
+    get() 返回的映射格式: {attr_name: AttrDefinition}，不可修改
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[Any, Any], MappingProxyType] = {}
+        # 每次失效递增，加载前后不一致说明加载的数据可能已过期
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(definition_model, model_id):
+        return definition_model._meta.label_lower, str(model_id)
+
+    def get(self, definition_model, model_id) -> MappingProxyType:
+        if model_id is None:
+            return EMPTY_DEFINITIONS
+        key = self.make_key(definition_model, model_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generation
+
+        entry = self.load(definition_model, model_id)
+        with self._lock:
+            if generation != self._generation:
+                # 加载期间缓存已失效，结果只返回给本次调用
+                return entry
+            # 并发加载时以先写入者为准，保证所有调用方拿到同一个映射
+            return self._entries.setdefault(key, entry)
+
+    def load(self, definition_model, model_id) -> MappingProxyType:
+        """一次查询加载定义下的全部属性"""
+        AttrModel = definition_model.get_child_model()
+        rows = AttrModel.objects.filter(model_id=model_id).values_list(*AttrDefinition._fields)
+        definitions = {}
+        for row in rows:
+            attr_def = AttrDefinition(*row)
+            definitions.setdefault(attr_def.attr_name, attr_def)
+        return MappingProxyType(definitions)
+
+    def invalidate(self, definition_model=None, model_id=None):
+        """使缓存失效
+
+        不传参数时清空全部；只传definition_model时清空该定义模型下的全部条目
+        """
+        with self._lock:
+            self._generation += 1
+            if definition_model is None:
+                self._entries.clear()
+            elif model_id is None:
+                label = definition_model._meta.label_lower
+                for key in [key for key in self._entries if key[0] == label]:
+                    del self._entries[key]
+            else:
+                self._entries.pop(self.make_key(definition_model, model_id), None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+attr_definition_registry = AttrDefinitionRegistry()
+
+
+def _invalidate_attr_definition(sender, instance, **kwargs):
+    from .models import AttrDefinitionModel  # noqa: PLC0415
+
+    if not isinstance(instance, AttrDefinitionModel):
+        return
+    definition_model = sender._meta.get_field('model').related_model
+    update_fields = kwargs.get('update_fields')
+    if (
+        kwargs.get('signal') is post_delete
+        or kwargs.get('created')
+        or (update_fields is not None and 'model' not in update_fields)
+    ):
+        model_id = instance.model_id
+    else:
+        # 属性可能被移动到其他定义下，无法得知旧model_id，整体失效
+        model_id = None
+
+    def invalidate():
+        attr_definition_registry.invalidate(definition_model, model_id)
+
+    invalidate()
+    transaction.on_commit(invalidate, using=kwargs.get('using'))
+
+
+post_save.connect(_invalidate_attr_definition, dispatch_uid='ext_model_attr_definition_save')
+post_delete.connect(_invalidate_attr_definition, dispatch_uid='ext_model_attr_definition_delete')
@@ -5,3 +5,14 @@ class ContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'content'
     verbose_name = '内容'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save  # noqa: PLC0415
+
+        from content.models import Content  # noqa: PLC0415
+        from content.search import remove_content_search, sync_content_search  # noqa: PLC0415
+
+        post_save.connect(sync_content_search, sender=Content, dispatch_uid='content_search_sync')
+        post_delete.connect(
+            remove_content_search, sender=Content, dispatch_uid='content_search_remove'
+        )
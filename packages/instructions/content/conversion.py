@@ -0,0 +1,277 @@
+"""文档转换任务队列
+
+任务保存在ConversionJob表中，run_conversion_workers命令领取排队中的任务并交给进程池执行。
+子进程只负责读取文件并转换，不访问数据库；任务状态和转换结果都由主进程写回。
+转换结果按 (文件哈希, 转换器编码, 转换器版本) 缓存在ConversionResult表中，命中时不再转换。
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from content.models import ConversionJob, ConversionResult, Document
+from content.utils.file import convert_buffer, get_converter_key
+from content.utils.storage import get_storage
+from instructions.process import reset_signal_handlers, terminate_process_pool
+
+
+def get_cached_result(document: Document) -> ConversionResult | None:
+    """查找缓存的转换结果，命中时累加命中次数"""
+    converter, version = get_converter_key(document.content_type)
+    result = ConversionResult.objects.filter(
+        hex=document.hex, converter=converter, version=version
+    ).first()
+    if result is not None:
+        ConversionResult.objects.filter(id=result.id).update(
+            hit_count=F('hit_count') + 1, last_hit_time=timezone.now()
+        )
+    return result
+
+
+def save_result(document: Document, content):
+    """保存转换结果到缓存并写回文档"""
+    converter, version = get_converter_key(document.content_type)
+    with transaction.atomic():
+        ConversionResult.objects.get_or_create(
+            hex=document.hex, converter=converter, version=version, defaults={'content': content}
+        )
+        apply_result(document, content)
+
+
+def apply_result(document: Document, content):
+    Document._base_manager.filter(id=document.id).update(
+        content=content, update_time=timezone.now()
+    )
+
+
+def get_cache_stats() -> dict:
+    """
+    转换结果缓存统计
+    每条缓存记录对应一次实际转换（未命中），命中率 = 命中次数 / (命中次数 + 记录数)
+    """
+    stats = ConversionResult.objects.aggregate(size=Count('id'), hits=Sum('hit_count'))
+    hits = stats['hits'] or 0
+    misses = stats['size']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'size': stats['size'],
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reclaim_stale_jobs(jobs=None, timeout=None, max_attempts=None) -> int:
+    """
+    回收工作进程异常退出（如被SIGKILL或OOM终止）后遗留的执行中任务，返回回收的任务数
+    正常运行的工作进程会在超时后自行将任务标记为失败，因此开始时间早于两倍超时时间的任务视为无人处理：
+    重新排队，执行次数用完的标记为失败
+    """
+    timeout = timeout or settings.CONVERSION_JOB_TIMEOUT
+    max_attempts = max_attempts or settings.CONVERSION_JOB_MAX_ATTEMPTS
+    now = timezone.now()
+    stale = (jobs if jobs is not None else ConversionJob.objects).filter(
+        state=ConversionJob.RUNNING, start_time__lt=now - timedelta(seconds=timeout * 2)
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        state=ConversionJob.FAILED, error='工作进程异常退出，超过最大执行次数', finish_time=now
+    )
+    return failed + stale.update(state=ConversionJob.QUEUED, start_time=None)
+
+
+def enqueue_conversion(document: Document) -> tuple[ConversionJob, bool]:
+    """
+    为文档创建转换任务，返回 (任务, 是否新建)
+    已有排队中或执行中的任务时直接返回；转换结果已缓存时直接写回文档，任务创建即为完成状态
+    """
+    with transaction.atomic():
+        Document._base_manager.select_for_update().filter(id=document.id).first()
+        reclaim_stale_jobs(ConversionJob.objects.filter(document=document))
+        job = ConversionJob.objects.filter(
+            document=document, state__in=ConversionJob.ACTIVE_STATES
+        ).first()
+        if job is not None:
+            return job, False
+        result = get_cached_result(document)
+        if result is not None:
+            apply_result(document, result.content)
+            now = timezone.now()
+            job = ConversionJob.objects.create(
+                document=document, state=ConversionJob.DONE, start_time=now, finish_time=now
+            )
+            return job, True
+        return ConversionJob.objects.create(document=document), True
+
+
+def run_conversion(storage, hexcode: str, content_type: str | None, compression: str | None = None):
+    """在子进程中执行，不访问数据库，通过mmap读取文件块，返回 (文本, 统计)"""
+    with storage.mmap(hexcode, compression) as buffer:
+        return convert_buffer(buffer, content_type)
+
+
+class ConversionWorkerPool:
+    """
+    管理进程池并调度转换任务
+    进程池无法单独终止某个任务，任务超时或子进程异常退出时重建进程池，
+    同批次中未完成的其他任务重新排队，超过最大执行次数后标记为失败
+    """
+
+    def __init__(self, workers=None, timeout=None, max_attempts=None, poll_interval=1.0):
+        self.workers = workers or settings.CONVERSION_WORKERS
+        self.timeout = timeout or settings.CONVERSION_JOB_TIMEOUT
+        self.max_attempts = max_attempts or settings.CONVERSION_JOB_MAX_ATTEMPTS
+        self.poll_interval = poll_interval
+        self.executor = None
+        # future -> (任务, 提交时间)
+        self.running = {}
+
+    def __enter__(self):
+        self.executor = self.create_executor()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.requeue(list(self.running))
+        self.terminate_workers()
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=reset_signal_handlers)
+
+    def claim(self, limit: int) -> list[ConversionJob]:
+        """领取排队中的任务，条件更新保证多个工作进程不会领取同一任务"""
+        reclaim_stale_jobs(timeout=self.timeout, max_attempts=self.max_attempts)
+        claimed = []
+        candidates = ConversionJob.objects.filter(state=ConversionJob.QUEUED).values_list(
+            'id', flat=True
+        )[: limit * 2]
+        for job_id in candidates:
+            if len(claimed) >= limit:
+                break
+            updated = ConversionJob.objects.filter(id=job_id, state=ConversionJob.QUEUED).update(
+                state=ConversionJob.RUNNING, start_time=timezone.now()
+            )
+            if updated:
+                claimed.append(job_id)
+        if not claimed:
+            return []
+        ConversionJob.objects.filter(id__in=claimed).update(attempts=F('attempts') + 1)
+        return list(ConversionJob.objects.filter(id__in=claimed).select_related('document'))
+
+    def submit(self, job: ConversionJob):
+        document = job.document
+        future = self.executor.submit(
+            run_conversion,
+            get_storage(),
+            document.hex,
+            document.content_type,
+            document.get_compression(),
+        )
+        self.running[future] = (job, time.monotonic())
+
+    def fill(self) -> int:
+        free = self.workers - len(self.running)
+        if free <= 0:
+            return 0
+        jobs = self.claim(free)
+        for job in jobs:
+            # 排队期间可能有相同文件完成了转换
+            result = get_cached_result(job.document)
+            if result is not None:
+                with transaction.atomic():
+                    apply_result(job.document, result.content)
+                    self.finish(job, ConversionJob.DONE)
+            else:
+                self.submit(job)
+        return len(jobs)
+
+    def finish(self, job: ConversionJob, state: str, error: str | None = None, **fields):
+        ConversionJob.objects.filter(id=job.id).update(
+            state=state, error=error, finish_time=timezone.now(), **fields
+        )
+
+    def requeue(self, futures):
+        """未完成的任务重新排队，执行次数用完的标记为失败"""
+        for future in futures:
+            job, _ = self.running.pop(future)
+            if job.attempts >= self.max_attempts:
+                self.finish(job, ConversionJob.FAILED, '超过最大执行次数')
+            else:
+                ConversionJob.objects.filter(id=job.id).update(
+                    state=ConversionJob.QUEUED, start_time=None
+                )
+
+    def terminate_workers(self):
+        terminate_process_pool(self.executor)
+
+    def restart(self):
+        self.requeue(list(self.running))
+        self.terminate_workers()
+        self.executor = self.create_executor()
+
+    def collect(self, futures) -> int:
+        """写回已完成任务的结果，返回处理的任务数，进程池损坏时返回-1"""
+        count = 0
+        for future in futures:
+            job, _ = self.running[future]
+            try:
+                content, stats = future.result()
+            except BrokenProcessPool:
+                return -1
+            except Exception as e:
+                self.running.pop(future)
+                self.finish(job, ConversionJob.FAILED, f'{type(e).__name__}: {e}')
+            else:
+                self.running.pop(future)
+                with transaction.atomic():
+                    save_result(job.document, content)
+                    self.finish(job, ConversionJob.DONE, bytes_per_second=stats.bytes_per_second)
+            count += 1
+        return count
+
+    def expire(self) -> bool:
+        """超时的任务标记为失败，返回是否需要重建进程池"""
+        now = time.monotonic()
+        expired = [
+            future
+            for future, (_, started) in self.running.items()
+            if not future.done() and now - started > self.timeout
+        ]
+        for future in expired:
+            job, _ = self.running.pop(future)
+            self.finish(job, ConversionJob.FAILED, f'执行超时（{self.timeout}秒）')
+        return bool(expired)
+
+    def step(self) -> int:
+        """领取任务并等待一个轮询周期，返回本轮完成的任务数"""
+        self.fill()
+        if not self.running:
+            return 0
+        done, _ = wait(self.running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+        count = self.collect(done)
+        if count < 0:
+            # 无法确定是哪个任务导致子进程退出，全部重新排队并计入执行次数
+            self.restart()
+            return 0
+        if self.expire():
+            self.restart()
+        return count
+
+    def run(self, once=False, stop=None):
+        """
+        持续处理任务
+        once为True时处理完队列中的任务后退出；stop为可选的回调，返回True时退出
+        """
+        processed = 0
+        while stop is None or not stop():
+            processed += self.step()
+            if not self.running:
+                if once and not ConversionJob.objects.filter(state=ConversionJob.QUEUED).exists():
+                    break
+                if not self.fill():
+                    time.sleep(self.poll_interval)
+        return processed
@@ -0,0 +1,46 @@
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from content.search import get_search_backend
+
+
+class ExtAttrFilter(BaseFilterBackend):
+    """
+    扩展属性过滤器
+    按查询参数中的属性名称过滤，如 ?author=张三、?author__icontains=张
+    查询集需先调用with_definition，由ExtQuerySet将属性名称转换为扩展字段
+    """
+
+    lookups = ('exact', 'iexact', 'contains', 'icontains', 'startswith', 'gt', 'gte', 'lt', 'lte')
+
+    def filter_queryset(self, request, queryset, view):
+        definitions = getattr(queryset, 'ext_definitions', None)
+        if not definitions:
+            return queryset
+        conditions = {}
+        for param, value in request.query_params.items():
+            attr_name, _, lookup = param.partition(LOOKUP_SEP)
+            if attr_name not in definitions:
+                continue
+            if lookup and lookup not in self.lookups:
+                continue
+            conditions[param] = value
+        if conditions:
+            queryset = queryset.filter(**conditions)
+        return queryset
+
+
+class ContentSearchFilter(SearchFilter):
+    """
+    内容全文检索过滤器
+    沿用?search=参数，由全文检索后端完成匹配；数据库不支持时退回SearchFilter的LIKE查询
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        backend = get_search_backend(queryset.db)
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return backend.search(queryset, query)
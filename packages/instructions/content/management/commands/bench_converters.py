@@ -0,0 +1,110 @@
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content.utils import CONVERTERS, ConversionStats, get_converter, map_file
+
+SIZE_UNITS = {'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30}
+SUFFIXES = {'TEXT': '.txt', 'MARKDOWN': '.md', 'CSV': '.csv', 'JSON': '.json'}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[: -len(unit)]) * factor)
+    return int(value)
+
+
+def iter_fixture_blocks(code: str):
+    """生成测试数据的重复片段，第一段为文件头"""
+    if code == 'CSV':
+        yield 'id,title,abstract\n'
+        row = 0
+        while True:
+            row += 1
+            yield f'{row},操作说明 {row},"第{row}步：检查设备状态, 然后启动"\n'
+    elif code == 'JSON':
+        yield '['
+        row = 0
+        while True:
+            row += 1
+            item = {'id': row, 'title': f'操作说明 {row}', 'steps': ['检查', '启动', row]}
+            yield ('' if row == 1 else ',') + json.dumps(item, ensure_ascii=False)
+    elif code == 'MARKDOWN':
+        row = 0
+        while True:
+            row += 1
+            yield f'## 第{row}节\n\n- 检查设备状态\n- 启动 **设备** {row}\n\n'
+    else:
+        row = 0
+        while True:
+            row += 1
+            yield f'第{row}行：按照说明书操作设备，注意安全。\n'
+
+
+def write_fixture(path: Path, code: str, size: int):
+    """写入大约size字节的测试文件"""
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for block in iter_fixture_blocks(code):
+            f.write(block)
+            written += len(block.encode('utf-8'))
+            if written >= size:
+                break
+        if code == 'JSON':
+            f.write(']')
+
+
+class Command(BaseCommand):
+    help = '生成测试文件并测量各转换器的吞吐量'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=str, default='1MB,100MB,1GB', help='逗号分隔的文件大小，如1MB,100MB'
+        )
+        parser.add_argument(
+            '--types', type=str, default=','.join(CONVERTERS), help='逗号分隔的内容类型'
+        )
+        parser.add_argument('--dir', type=str, help='测试文件目录，默认使用临时目录并在结束后删除')
+
+    def handle(self, *args, **options):
+        sizes = [parse_size(size) for size in options['sizes'].split(',') if size.strip()]
+        codes = [code.strip().upper() for code in options['types'].split(',') if code.strip()]
+        unknown = [code for code in codes if code not in CONVERTERS]
+        if unknown:
+            raise CommandError(f'未知的内容类型：{", ".join(unknown)}')
+
+        work_dir = Path(options['dir'] or tempfile.mkdtemp())
+        work_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            self.stdout.write(f'{"类型":<10}{"大小(MB)":>12}{"耗时(秒)":>12}{"吞吐量(MB/s)":>16}')
+            for code in codes:
+                converter = get_converter(code)
+                for size in sizes:
+                    path = work_dir.joinpath(f'{code.lower()}-{size}{SUFFIXES[code]}')
+                    if not path.exists():
+                        write_fixture(path, code, size)
+                    stats = self.measure(converter, path)
+                    self.stdout.write(
+                        f'{code:<10}{stats.size / (1 << 20):>12.2f}{stats.elapsed:>12.3f}'
+                        f'{stats.bytes_per_second / (1 << 20):>16.2f}'
+                    )
+        finally:
+            if not options['dir']:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def measure(converter, path):
+        # 只消费输出不拼接，避免大文件的结果文本占用内存影响测量
+        with open(path, 'rb') as f, map_file(f) as buffer:
+            started = time.perf_counter()
+            for _ in converter.iter_convert(buffer):
+                pass
+            stats = ConversionStats(len(buffer), time.perf_counter() - started)
+        converter.record(stats)
+        return stats
@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content.management.commands.bench_converters import parse_size
+from content.utils import HASH_ALGORITHMS, hash_chunks, iter_file_chunks
+
+BUFFER_SIZE = 1 << 20
+
+
+class Command(BaseCommand):
+    help = '比较各哈希算法的吞吐量'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=str, default='1GB', help='内存数据量，如256MB、1GB')
+        parser.add_argument('--file', type=str, help='改为对指定文件计算哈希（包含磁盘读取）')
+        parser.add_argument(
+            '--algorithms', type=str, default=','.join(HASH_ALGORITHMS), help='逗号分隔的算法'
+        )
+
+    def handle(self, *args, **options):
+        algorithms = [name.strip() for name in options['algorithms'].split(',') if name.strip()]
+        unknown = [name for name in algorithms if name not in HASH_ALGORITHMS]
+        if unknown:
+            raise CommandError(f'未知的哈希算法：{", ".join(unknown)}')
+
+        if options['file']:
+            size = os.path.getsize(options['file'])
+
+            def open_chunks():
+                return iter_file_chunks(options['file'])
+
+        else:
+            size = parse_size(options['size'])
+            buffer = os.urandom(BUFFER_SIZE)
+            count, rest = divmod(size, BUFFER_SIZE)
+
+            def open_chunks():
+                yield from (buffer for _ in range(count))
+                if rest:
+                    yield buffer[:rest]
+
+        self.stdout.write(f'{"算法":<10}{"大小(MB)":>12}{"耗时(秒)":>12}{"吞吐量(MB/s)":>16}')
+        for name in algorithms:
+            started = time.perf_counter()
+            hash_chunks(open_chunks(), name)
+            elapsed = time.perf_counter() - started
+            rate = size / elapsed / (1 << 20) if elapsed > 0 else 0.0
+            self.stdout.write(f'{name:<10}{size / (1 << 20):>12.2f}{elapsed:>12.3f}{rate:>16.2f}')
@@ -0,0 +1,140 @@
+import os
+import time
+from itertools import batched
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from content.models import Blob, Document
+from content.utils import LocalStorage, get_storage
+from content.utils.file import SHARD_DEPTH, SHARD_WIDTH, TMP_DIR_NAME
+
+QUARANTINE_DIR_NAME = '.quarantine'
+
+
+def iter_blob_entries(root: str, depth=0, prefix=''):
+    """用os.scandir逐层遍历分片目录，逐个产出文件块的DirEntry，不在内存中保存文件列表"""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if depth < SHARD_DEPTH:
+                if len(entry.name) == SHARD_WIDTH and entry.is_dir(follow_symlinks=False):
+                    yield from iter_blob_entries(entry.path, depth + 1, prefix + entry.name)
+            elif entry.name.startswith(prefix) and entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+class Command(BaseCommand):
+    help = '清理存储目录中没有文档引用的文件块'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='文件修改时间早于该时长才会被清理，避免误删正在上传的文件',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['quarantine', 'delete'],
+            default='quarantine',
+            help=f'quarantine移动到存储目录下的{QUARANTINE_DIR_NAME}目录，delete直接删除',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批比对的文件数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计，不做修改')
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        if not isinstance(storage, LocalStorage):
+            raise CommandError('gc_store只支持本地存储（LocalStorage）')
+        root = storage.root
+        self.cutoff = time.time() - options['grace_hours'] * 3600
+        self.mode = options['mode']
+        self.dry_run = options['dry_run']
+        self.totals = {'scanned': 0, 'removed': 0, 'bytes': 0, 'tmp': 0}
+
+        for batch in batched(self.scan(root), options['batch_size']):
+            self.collect_batch(root, batch)
+        self.clean_tmp(root)
+
+        totals = self.totals
+        action = '可清理' if self.dry_run else ('已隔离' if self.mode == 'quarantine' else '已删除')
+        self.stdout.write(
+            f'{"[试运行] " if self.dry_run else ""}扫描 {totals["scanned"]} 个文件块，'
+            f'{action} {totals["removed"]} 个（{totals["bytes"] / (1 << 20):.2f} MB），'
+            f'过期临时文件 {totals["tmp"]} 个'
+        )
+
+    def scan(self, root: Path):
+        for entry in iter_blob_entries(str(root)):
+            self.totals['scanned'] += 1
+            yield entry
+
+    def collect_batch(self, root: Path, batch):
+        # 宽限期内的文件可能属于尚未提交的上传，不参与比对
+        candidates = {entry.name: entry for entry in batch if entry.stat().st_mtime < self.cutoff}
+        if not candidates:
+            return
+        with transaction.atomic():
+            # 锁定文件块记录，并发上传去重时增加引用计数需等待本批处理完成
+            ref_counts = dict(
+                Blob.objects.select_for_update()
+                .filter(hex__in=candidates.keys())
+                .values_list('hex', 'ref_count')
+            )
+            # 锁定后再检查文档引用，避免与锁定前提交的上传交错
+            referenced = set(
+                Document._base_manager.filter(
+                    is_delete=False, hex__in=candidates.keys()
+                ).values_list('hex', flat=True)
+            )
+            garbage = [
+                entry
+                for name, entry in candidates.items()
+                if name not in referenced and ref_counts.get(name, 0) <= 0
+            ]
+            self.totals['removed'] += len(garbage)
+            self.totals['bytes'] += sum(entry.stat().st_size for entry in garbage)
+            if not garbage or self.dry_run:
+                return
+            Blob.objects.filter(
+                hex__in=[entry.name for entry in garbage], ref_count__lte=0
+            ).delete()
+            for entry in garbage:
+                # 没有记录的文件不受行锁保护，扫描后被重新写入的不再清理
+                if entry.name not in ref_counts and not self.expired(entry.path):
+                    continue
+                self.remove(root, entry)
+
+    def expired(self, path: str) -> bool:
+        try:
+            return os.stat(path).st_mtime < self.cutoff
+        except FileNotFoundError:
+            return False
+
+    def remove(self, root: Path, entry):
+        path = Path(entry.path)
+        if self.mode == 'quarantine':
+            target = root.joinpath(QUARANTINE_DIR_NAME, path.relative_to(root))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+        else:
+            path.unlink(missing_ok=True)
+        # 删除空的分片目录
+        for parent in list(path.parents)[:SHARD_DEPTH]:
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+
+    def clean_tmp(self, root: Path):
+        """上传中断残留的临时文件"""
+        tmp_dir = root.joinpath(TMP_DIR_NAME)
+        if not tmp_dir.is_dir():
+            return
+        with os.scandir(tmp_dir) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < self.cutoff:
+                    self.totals['tmp'] += 1
+                    if not self.dry_run:
+                        os.unlink(entry.path)
@@ -0,0 +1,50 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from content.models import Category, Content, MyModelDefinitionModel
+from content.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = '批量导入内容数据，字段可使用分类定义中的属性名称'
+
+    def add_arguments(self, parser):
+        parser.add_argument('category_id', type=int, help='分类ID')
+        parser.add_argument('data_path', type=str, help='JSON数据文件路径，内容为对象数组')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批插入的行数')
+        parser.add_argument('--username', type=str, help='记录为创建用户的用户名')
+
+    def handle(self, *args, **options):
+        category = Category.objects.filter(id=options['category_id']).first()
+        if category is None:
+            raise CommandError(f'分类 {options["category_id"]} 不存在')
+
+        user = None
+        if options['username']:
+            user = get_user_model().objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'用户 {options["username"]} 不存在')
+
+        with open(options['data_path'], encoding='utf-8') as f:
+            rows = json.load(f)
+        if not isinstance(rows, list):
+            raise CommandError('数据文件内容必须是对象数组')
+
+        for row in rows:
+            row['category_id'] = category.id
+
+        started = time.perf_counter()
+        queryset = Content.objects.with_definition(category.definition_id, MyModelDefinitionModel)
+        with transaction.atomic():
+            created = queryset.bulk_create(rows, batch_size=options['batch_size'], user=user)
+            # bulk_create不触发post_save，需要手动写入全文检索索引
+            search_backend = get_search_backend()
+            if search_backend is not None:
+                search_backend.index(created)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'导入完成！共导入 {len(created)} 条内容，耗时 {elapsed:.2f} 秒')
@@ -0,0 +1,235 @@
+import functools
+import mimetypes
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import batched
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from content.models import Blob, Content, Document
+from content.utils import (
+    get_blob_path,
+    get_compression,
+    get_hash_algorithm,
+    get_storage,
+    guess_content_type,
+    hash_chunks,
+    iter_file_chunks,
+)
+
+# 恢复已软删除的文档时更新的字段
+RESTORED_FIELDS = [
+    'is_delete',
+    'delete_at',
+    'name',
+    'mime_type',
+    'content_type',
+    'path',
+    'update_user',
+    'update_time',
+]
+
+
+def iter_files(root: str):
+    """用os.scandir递归遍历目录，逐个产出文件路径，跳过隐藏文件和目录"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path
+
+
+def hash_file(file_path: str, algorithm: str) -> tuple[str, str, int]:
+    """在子进程中执行，返回 (路径, 哈希, 文件大小)"""
+    hexcode, size = hash_chunks(iter_file_chunks(file_path), algorithm)
+    return file_path, hexcode, size
+
+
+def copy_blob(args) -> int | None:
+    """在子进程中执行，将文件（按需压缩）保存到存储后端，返回存储占用的字节数"""
+    storage, file_path, hexcode, compression = args
+    return storage.put(hexcode, iter_file_chunks(file_path), compression)
+
+
+class Command(BaseCommand):
+    help = '将目录中的文件批量导入为集合中的文档，相同内容的文件只保存一份'
+
+    def add_arguments(self, parser):
+        parser.add_argument('collection_id', type=int, help='集合（内容）ID')
+        parser.add_argument('directory', type=str, help='要导入的目录')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='进程数')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批处理的文件数')
+        parser.add_argument('--username', type=str, help='记录为创建用户的用户名')
+
+    def handle(self, *args, **options):
+        collection = Content.objects.filter(id=options['collection_id']).first()
+        if collection is None:
+            raise CommandError(f'集合 {options["collection_id"]} 不存在')
+        root = Path(options['directory'])
+        if not root.is_dir():
+            raise CommandError(f'目录 {root} 不存在')
+
+        user = None
+        if options['username']:
+            user = get_user_model().objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'用户 {options["username"]} 不存在')
+
+        self.collection = collection
+        self.root = root
+        self.user = user
+        self.workers = options['workers']
+        self.hash_algorithm = get_hash_algorithm()
+        self.storage = get_storage()
+        self.totals = {
+            'files': 0,
+            'created': 0,
+            'restored': 0,
+            'skipped': 0,
+            'blobs': 0,
+            'bytes': 0,
+        }
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            self.executor = executor
+            for paths in batched(iter_files(str(root)), options['batch_size']):
+                self.ingest_batch(paths)
+        elapsed = time.perf_counter() - started
+
+        totals = self.totals
+        rate = totals['files'] / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            f'导入完成！扫描 {totals["files"]} 个文件，新增文档 {totals["created"]} 个，'
+            f'恢复已删除文档 {totals["restored"]} 个，'
+            f'跳过重复 {totals["skipped"]} 个，新增存储文件 {totals["blobs"]} 个'
+            f'（{totals["bytes"] / (1 << 20):.1f} MB），'
+            f'耗时 {elapsed:.2f} 秒，{rate:.1f} 文件/秒'
+        )
+
+    def ingest_batch(self, paths):
+        hashed = self.executor.map(
+            functools.partial(hash_file, algorithm=self.hash_algorithm),
+            paths,
+            chunksize=self.get_chunksize(paths),
+        )
+        # 批次内按哈希去重，同一内容只保留第一个文件
+        files = {}
+        for file_path, hexcode, size in hashed:
+            files.setdefault(hexcode, (file_path, size))
+        self.totals['files'] += len(paths)
+
+        with transaction.atomic():
+            # unique_together包含已软删除的文档，与上传一致，重新导入时恢复原记录
+            existing = Document._base_manager.select_for_update().filter(
+                collection=self.collection, hex__in=files.keys()
+            )
+            deleted = {}
+            for document in existing:
+                if document.is_delete:
+                    deleted[document.hex] = document
+                else:
+                    files.pop(document.hex)
+            self.totals['skipped'] += len(paths) - len(files)
+            if not files:
+                return
+
+            # 锁定已有的文件块记录，gc_store不会在本批提交前清理这些文件块
+            known_blobs = set(
+                Blob.objects.select_for_update()
+                .filter(hex__in=files.keys())
+                .values_list('hex', flat=True)
+            )
+            new_blobs = [
+                (hexcode, item) for hexcode, item in files.items() if hexcode not in known_blobs
+            ]
+            copy_args = [
+                (self.storage, file_path, hexcode, get_compression(guess_content_type(file_path)))
+                for hexcode, (file_path, _) in new_blobs
+            ]
+            if self.storage.multiprocess:
+                written = self.executor.map(
+                    copy_blob, copy_args, chunksize=self.get_chunksize(copy_args)
+                )
+            else:
+                written = map(copy_blob, copy_args)
+            blobs = []
+            for (hexcode, (_, size)), (*_, compression), stored_size in zip(
+                new_blobs, copy_args, written, strict=True
+            ):
+                blob = Blob(hex=hexcode, hash_algorithm=self.hash_algorithm, size=size)
+                if stored_size is None:
+                    # 文件已存在但没有记录，按实际内容识别压缩方式
+                    blob.compression = self.storage.detect_compression(hexcode, self.hash_algorithm)
+                    blob.stored_size = self.storage.stat(hexcode).size
+                else:
+                    blob.compression, blob.stored_size = compression, stored_size
+                    self.totals['blobs'] += 1
+                    self.totals['bytes'] += stored_size
+                blobs.append(blob)
+            Blob.objects.bulk_create(blobs, ignore_conflicts=True)
+            updated = Blob.objects.filter(hex__in=files.keys()).update(ref_count=F('ref_count') + 1)
+            if updated != len(files):
+                raise CommandError('部分文件块在导入过程中被清理，请重新执行')
+
+            restored = [
+                self.restore_document(deleted[hexcode], files.pop(hexcode)[0])
+                for hexcode in list(files)
+                if hexcode in deleted
+            ]
+            Document._base_manager.bulk_update(restored, RESTORED_FIELDS)
+            last_order = Content.objects.allocate_document_order(self.collection.id, len(files))
+            first_order = last_order - len(files) + 1
+            documents = [
+                self.build_document(file_path, hexcode, size, order)
+                for order, (hexcode, (file_path, size)) in enumerate(files.items(), first_order)
+            ]
+            Document.objects.bulk_create(documents)
+        self.totals['created'] += len(documents)
+        self.totals['restored'] += len(restored)
+
+    def get_chunksize(self, items):
+        # 每个子进程一次领取多个文件，减少进程间通信次数
+        return max(1, len(items) // (self.workers * 4))
+
+    def get_name(self, file_path):
+        return Path(file_path).relative_to(self.root).as_posix()
+
+    def restore_document(self, document, file_path):
+        """恢复已软删除的文档，保留原顺序号，名称和类型按本次导入的文件更新"""
+        name = self.get_name(file_path)
+        document.is_delete = False
+        document.delete_at = None
+        document.name = name
+        document.mime_type = Document.clean_mime_type(mimetypes.guess_type(name)[0])
+        document.content_type = guess_content_type(name)
+        document.path = get_blob_path(document.hex)
+        document.update_user = self.user
+        # bulk_update不会自动更新auto_now字段
+        document.update_time = timezone.now()
+        return document
+
+    def build_document(self, file_path, hexcode, size, order):
+        name = self.get_name(file_path)
+        return Document(
+            name=name,
+            path=get_blob_path(hexcode),
+            size=size,
+            mime_type=Document.clean_mime_type(mimetypes.guess_type(name)[0]),
+            order=order,
+            hex=hexcode,
+            hash_algorithm=self.hash_algorithm,
+            content_type=guess_content_type(name),
+            collection=self.collection,
+            create_user=self.user,
+        )
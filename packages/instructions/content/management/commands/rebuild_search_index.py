@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from content.models import Content
+from content.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = '重建内容全文检索索引（批量导入或QuerySet.update等绕过信号的写入后使用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='每批写入索引的行数')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend is None:
+            raise CommandError('当前数据库不支持全文检索')
+
+        batch_size = options['batch_size']
+        backend.clear()
+        total = 0
+        batch = []
+        for content in Content.objects.all().iterator(chunk_size=batch_size):
+            batch.append(content)
+            if len(batch) >= batch_size:
+                backend.index(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            backend.index(batch)
+            total += len(batch)
+
+        self.stdout.write(f'索引重建完成！共索引 {total} 条内容')
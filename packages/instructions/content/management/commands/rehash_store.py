@@ -0,0 +1,114 @@
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from plugin.models import PluginResult
+
+from content.models import Blob, ConversionResult, Document
+from content.utils import (
+    LocalStorage,
+    get_blob_path,
+    get_hash_algorithm,
+    get_storage,
+    hash_chunks,
+    iter_file_chunks,
+    open_blob,
+    write_blob,
+)
+from content.utils.file import CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = '将已有文件块迁移到当前配置的哈希算法（STORE_HASH_ALGORITHM）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每批处理的文件块数')
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        if not isinstance(storage, LocalStorage):
+            raise CommandError('rehash_store只支持本地存储（LocalStorage）')
+        self.root = storage.root
+        self.algorithm = get_hash_algorithm()
+        self.totals = {'migrated': 0, 'missing': 0, 'conflicts': 0}
+
+        # 按主键分批遍历，迁移过程中会新增和删除行，不能使用偏移分页
+        queryset = Blob.objects.exclude(hash_algorithm=self.algorithm).order_by('hex')
+        blobs = list(queryset[: options['batch_size']])
+        while blobs:
+            # 删除后实例的主键会被置空，先记录本批最后一个哈希
+            last_hex = blobs[-1].hex
+            for blob in blobs:
+                self.rehash(blob)
+            blobs = list(queryset.filter(hex__gt=last_hex)[: options['batch_size']])
+
+        totals = self.totals
+        self.stdout.write(
+            f'迁移完成！算法 {self.algorithm}，迁移 {totals["migrated"]} 个文件块，'
+            f'文件缺失 {totals["missing"]} 个，冲突跳过 {totals["conflicts"]} 个'
+        )
+
+    def rehash(self, blob: Blob):
+        old_path = self.root.joinpath(get_blob_path(blob.hex))
+        if not old_path.is_file():
+            self.totals['missing'] += 1
+            return
+        # 哈希按原始内容计算，压缩存储的文件需要解压读取
+        with open_blob(old_path, blob.compression) as f:
+            new_hex, size = hash_chunks(iter(lambda: f.read(CHUNK_SIZE), b''), self.algorithm)
+        documents = Document._base_manager.filter(hex=blob.hex, hash_algorithm=blob.hash_algorithm)
+        # 同一集合中已有新算法下的相同文件时无法更新，留待人工处理
+        if Document._base_manager.filter(
+            hex=new_hex, collection_id__in=documents.values('collection_id')
+        ).exists():
+            self.totals['conflicts'] += 1
+            return
+
+        self.link_blob(old_path, new_hex)
+        with transaction.atomic():
+            Blob.objects.get_or_create(
+                hex=new_hex,
+                defaults={
+                    'size': size,
+                    'hash_algorithm': self.algorithm,
+                    'compression': blob.compression,
+                    'stored_size': blob.stored_size,
+                },
+            )
+            Blob.objects.filter(hex=new_hex).update(ref_count=F('ref_count') + blob.ref_count)
+            documents.update(
+                hex=new_hex, hash_algorithm=self.algorithm, path=get_blob_path(new_hex)
+            )
+            self.move_results(blob.hex, new_hex)
+            blob.delete()
+        old_path.unlink(missing_ok=True)
+        self.totals['migrated'] += 1
+
+    def link_blob(self, old_path: Path, new_hex: str):
+        """同一文件系统内使用硬链接，避免复制文件内容；文件按原样复制，压缩方式不变"""
+        new_path = self.root.joinpath(get_blob_path(new_hex))
+        if new_path.is_file():
+            return
+        new_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(old_path, new_path)
+        except OSError:
+            write_blob(new_hex, iter_file_chunks(old_path), self.root)
+
+    @staticmethod
+    def move_results(old_hex: str, new_hex: str):
+        """转换结果和插件结果缓存改用新的哈希，新哈希下已有相同键的结果直接丢弃"""
+        for model, fields in (
+            (ConversionResult, ('converter', 'version')),
+            (PluginResult, ('code', 'version', 'config_hash')),
+        ):
+            existing = set(model.objects.filter(hex=new_hex).values_list(*fields))
+            stale = [
+                result_id
+                for result_id, *key in model.objects.filter(hex=old_hex).values_list('id', *fields)
+                if tuple(key) in existing
+            ]
+            model.objects.filter(id__in=stale).delete()
+            model.objects.filter(hex=old_hex).update(hex=new_hex)
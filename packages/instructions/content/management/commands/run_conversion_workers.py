@@ -0,0 +1,55 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from content.conversion import ConversionWorkerPool
+
+
+class Command(BaseCommand):
+    help = '启动文档转换工作进程池，处理排队中的转换任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.CONVERSION_WORKERS,
+            help='进程池大小，默认取CONVERSION_WORKERS',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=settings.CONVERSION_JOB_TIMEOUT,
+            help='单个任务的超时时间（秒），默认取CONVERSION_JOB_TIMEOUT',
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='轮询间隔（秒）')
+        parser.add_argument('--once', action='store_true', help='处理完队列中的任务后退出')
+
+    def handle(self, *args, **options):
+        stopping = False
+
+        def request_stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        # 进程池子进程在initializer中恢复默认处理，退出时恢复主进程原来的处理函数
+        previous_handler = signal.signal(signal.SIGTERM, request_stop)
+        self.stdout.write(
+            f'转换进程池已启动，进程数 {options["workers"]}，任务超时 {options["timeout"]} 秒'
+        )
+        pool = ConversionWorkerPool(
+            workers=options['workers'],
+            timeout=options['timeout'],
+            poll_interval=options['poll_interval'],
+        )
+        try:
+            with pool:
+                processed = pool.run(once=options['once'], stop=lambda: stopping)
+        except KeyboardInterrupt:
+            processed = None
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+        if processed is not None:
+            self.stdout.write(f'转换进程池已退出，共处理 {processed} 个任务')
+        else:
+            self.stdout.write('转换进程池已退出')
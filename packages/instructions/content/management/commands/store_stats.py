@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from content.models import Blob
+
+
+class Command(BaseCommand):
+    help = '按压缩方式统计文件块数量、原始大小、存储大小和压缩比'
+
+    def handle(self, *args, **options):
+        rows = (
+            Blob.objects.values('compression')
+            .annotate(count=Count('hex'), size=Sum('size'), stored_size=Sum('stored_size'))
+            .order_by('compression')
+        )
+        self.stdout.write(
+            f'{"压缩方式":<10}{"文件块数":>10}{"原始(MB)":>12}{"存储(MB)":>12}{"压缩比":>10}'
+        )
+        for row in rows:
+            size = row['size'] or 0
+            # 旧数据可能没有记录存储大小，按原始大小计
+            stored_size = row['stored_size'] or size
+            ratio = size / stored_size if stored_size else 1.0
+            self.stdout.write(
+                f'{row["compression"] or "none":<10}{row["count"]:>10}'
+                f'{size / (1 << 20):>12.2f}{stored_size / (1 << 20):>12.2f}{ratio:>10.2f}'
+            )
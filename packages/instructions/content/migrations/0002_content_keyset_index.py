@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(
+                fields=['category', 'update_time', 'id'], name='content_con_categor_16aee0_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+from content.search import SEARCH_BACKENDS
+
+BATCH_SIZE = 2000
+
+
+def install_search(apps, schema_editor):
+    backend_class = SEARCH_BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class is None:
+        return
+    backend = backend_class(schema_editor.connection.alias)
+    backend.install(schema_editor)
+
+    # 为已有内容建立索引
+    Content = apps.get_model('content', 'Content')
+    batch = []
+    for content in Content.objects.filter(is_delete=False).iterator(chunk_size=BATCH_SIZE):
+        batch.append(content)
+        if len(batch) >= BATCH_SIZE:
+            backend.index(batch)
+            batch = []
+    if batch:
+        backend.index(batch)
+
+
+def uninstall_search(apps, schema_editor):
+    backend_class = SEARCH_BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class is not None:
+        backend_class(schema_editor.connection.alias).uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0002_content_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
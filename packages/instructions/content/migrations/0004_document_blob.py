@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:35
+
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+from content.utils.file import get_blob_path
+
+
+def backfill_blobs(apps, schema_editor):
+    """按哈希汇总已有文档的引用计数，并把旧的 <md5>/<文件名> 文件移动到分片路径"""
+    Blob = apps.get_model('content', 'Blob')
+    Document = apps.get_model('content', 'Document')
+    root_path = Path(settings.STORE_PATH)
+    rows = (
+        Document.objects.filter(is_delete=False)
+        .values('hex')
+        .annotate(ref_count=Count('id'), size=Max('size'))
+        .order_by()
+    )
+    for row in rows.iterator():
+        Blob.objects.create(hex=row['hex'], size=row['size'], ref_count=row['ref_count'])
+
+    for document in Document.objects.exclude(path='').iterator():
+        blob_path = get_blob_path(document.hex)
+        if document.path == blob_path:
+            continue
+        old_path = root_path.joinpath(document.path)
+        new_path = root_path.joinpath(blob_path)
+        if old_path.is_file() and not new_path.exists():
+            new_path.parent.mkdir(parents=True, exist_ok=True)
+            old_path.replace(new_path)
+        if new_path.is_file():
+            Document.objects.filter(id=document.id).update(path=blob_path)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0003_content_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                (
+                    'hex',
+                    models.CharField(
+                        max_length=255, primary_key=True, serialize=False, verbose_name='哈希值'
+                    ),
+                ),
+                ('size', models.BigIntegerField(verbose_name='大小')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='引用计数')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '文件块',
+                'verbose_name_plural': '文件块',
+            },
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='hex',
+            field=models.CharField(max_length=255, verbose_name='哈希值'),
+        ),
+        migrations.RunPython(backfill_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0004_document_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversionJob',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                (
+                    'state',
+                    models.CharField(
+                        choices=[
+                            ('QUEUED', '排队中'),
+                            ('RUNNING', '执行中'),
+                            ('DONE', '已完成'),
+                            ('FAILED', '失败'),
+                        ],
+                        default='QUEUED',
+                        max_length=20,
+                        verbose_name='状态',
+                    ),
+                ),
+                ('attempts', models.IntegerField(default=0, verbose_name='执行次数')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='错误信息')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                (
+                    'start_time',
+                    models.DateTimeField(blank=True, null=True, verbose_name='开始时间'),
+                ),
+                (
+                    'finish_time',
+                    models.DateTimeField(blank=True, null=True, verbose_name='完成时间'),
+                ),
+                (
+                    'document',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='conversion_jobs',
+                        to='content.document',
+                        verbose_name='文档',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': '转换任务',
+                'verbose_name_plural': '转换任务',
+                'ordering': ('id',),
+                'indexes': [models.Index(fields=['state', 'id'], name='conversion_job_state_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0005_conversion_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversionResult',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('hex', models.CharField(max_length=255, verbose_name='哈希值')),
+                ('converter', models.CharField(max_length=50, verbose_name='转换器编码')),
+                ('version', models.CharField(max_length=20, verbose_name='转换器版本')),
+                ('content', models.TextField(blank=True, null=True, verbose_name='内容')),
+                ('hit_count', models.IntegerField(default=0, verbose_name='命中次数')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                (
+                    'last_hit_time',
+                    models.DateTimeField(blank=True, null=True, verbose_name='最近命中时间'),
+                ),
+            ],
+            options={
+                'verbose_name': '转换结果',
+                'verbose_name_plural': '转换结果',
+                'unique_together': {('hex', 'converter', 'version')},
+            },
+        ),
+    ]
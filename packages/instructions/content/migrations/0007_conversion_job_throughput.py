@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0006_conversion_result'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversionjob',
+            name='bytes_per_second',
+            field=models.FloatField(blank=True, null=True, verbose_name='转换速度（字节/秒）'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:44
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_document_seq(apps, schema_editor):
+    """计数器从集合中现有文档的最大顺序号开始"""
+    Content = apps.get_model('content', 'Content')
+    Document = apps.get_model('content', 'Document')
+    max_order = (
+        Document.objects.filter(collection=OuterRef('pk'))
+        .values('collection')
+        .annotate(max_order=Max('order'))
+        .values('max_order')
+    )
+    Content.objects.update(document_seq=Coalesce(Subquery(max_order), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0007_conversion_job_throughput'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='document_seq',
+            field=models.IntegerField(default=0, editable=False, verbose_name='文档序号'),
+        ),
+        migrations.RunPython(backfill_document_seq, migrations.RunPython.noop),
+    ]
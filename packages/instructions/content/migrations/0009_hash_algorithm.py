@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0008_content_document_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='hash_algorithm',
+            field=models.CharField(default='md5', max_length=20, verbose_name='哈希算法'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='hash_algorithm',
+            field=models.CharField(default='md5', max_length=20, verbose_name='哈希算法'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:54
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_stored_size(apps, schema_editor):
+    """已有文件块均未压缩"""
+    Blob = apps.get_model('content', 'Blob')
+    Blob.objects.update(stored_size=F('size'))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0009_hash_algorithm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='compression',
+            field=models.CharField(blank=True, max_length=20, null=True, verbose_name='压缩方式'),
+        ),
+        migrations.AddField(
+            model_name='blob',
+            name='stored_size',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='存储大小'),
+        ),
+        migrations.RunPython(backfill_stored_size, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0010_blob_compression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='plugin_timings',
+            field=models.JSONField(blank=True, null=True, verbose_name='插件耗时'),
+        ),
+    ]
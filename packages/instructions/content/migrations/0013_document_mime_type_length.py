@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0012_content_search_unigrams'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='mime_type',
+            field=models.CharField(max_length=255, verbose_name='类型'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+from content.search import SEARCH_BACKENDS
+
+BATCH_SIZE = 2000
+
+
+def reindex_search(apps, schema_editor):
+    """检索字段增加state，已有内容需重新索引"""
+    backend_class = SEARCH_BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class is None:
+        return
+    backend = backend_class(schema_editor.connection.alias)
+
+    Content = apps.get_model('content', 'Content')
+    batch = []
+    for content in Content.objects.filter(is_delete=False).iterator(chunk_size=BATCH_SIZE):
+        batch.append(content)
+        if len(batch) >= BATCH_SIZE:
+            backend.index(batch)
+            batch = []
+    if batch:
+        backend.index(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0013_document_mime_type_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_search, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,31 @@
-from django.db import models
-from ext_model.models import AttrDefinitionModel, ExtModel, ModelDefinitionModel
+from django.db import connections, models
+from django.db.models import F
+from ext_model.models import AttrDefinitionModel, ExtModel, ExtModelManger, ModelDefinitionModel
 
-from instructions.models import BaseModel
+from content.utils.storage import get_storage
+from instructions.models import BaseManger, BaseModel
+
+
+class ContentManager(ExtModelManger, BaseManger):
+    """扩展模型管理器，同时过滤已软删除的记录"""
+
+    def allocate_document_order(self, content_id, count=1) -> int:
+        """
+        为集合分配count个连续的文档顺序号，返回其中最大的一个
+        通过单条 UPDATE ... RETURNING 递增计数器，并发上传时不会分配到相同的顺序号
+        """
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET document_seq = document_seq + %s WHERE id = %s '
+                'RETURNING document_seq',
+                [count, content_id],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            raise self.model.DoesNotExist(f'集合 {content_id} 不存在')
+        return row[0]
 
 
 class MyExtModel(ExtModel, BaseModel):
@@ -95,6 +119,10 @@ class Content(ExtModel, BaseModel):
         default='draft',
     )
     thumbnail = models.CharField(max_length=600, verbose_name='缩略图', null=True, blank=True)
+    # 已分配的文档顺序号，由ContentManager.allocate_document_order原子递增
+    document_seq = models.IntegerField(verbose_name='文档序号', default=0, editable=False)
+    objects = ContentManager()
+
     attr1 = models.CharField(max_length=255, verbose_name='属性1', null=True, blank=True)
     attr2 = models.CharField(max_length=255, verbose_name='属性2', null=True, blank=True)
     attr3 = models.CharField(max_length=255, verbose_name='属性3', null=True, blank=True)
@@ -137,6 +165,8 @@ class Content(ExtModel, BaseModel):
             models.Index(fields=['title']),
             models.Index(fields=['category']),
             models.Index(fields=['state']),
+            # 键集分页 (update_time, id)
+            models.Index(fields=['category', 'update_time', 'id']),
         ]
 
     def __str__(self):
@@ -151,20 +181,70 @@ class Content(ExtModel, BaseModel):
         return None
 
 
+class BlobManager(models.Manager):
+    def acquire(self, hexcode, size, count=1, **defaults):
+        """
+        锁定文件块记录并增加引用计数，不存在时按size和defaults创建，需在事务中调用
+        记录被gc_store并发删除时计数不会生效，此时抛出Blob.DoesNotExist
+        """
+        defaults.setdefault('stored_size', size)
+        self.select_for_update().get_or_create(hex=hexcode, defaults={'size': size, **defaults})
+        updated = self.filter(hex=hexcode).update(ref_count=F('ref_count') + count)
+        if updated != 1:
+            raise self.model.DoesNotExist(f'文件块 {hexcode} 已被清理')
+        return updated
+
+    def release(self, hexcode, count=1):
+        """减少文件块的引用计数，文件的清理由gc_store命令负责"""
+        return self.filter(hex=hexcode).update(ref_count=F('ref_count') - count)
+
+
+class Blob(models.Model):
+    """按内容寻址存储的文件块，多个集合中的相同文档共享同一个文件块"""
+
+    hex = models.CharField(max_length=255, verbose_name='哈希值', primary_key=True)
+    hash_algorithm = models.CharField(max_length=20, verbose_name='哈希算法', default='md5')
+    size = models.BigIntegerField(verbose_name='大小')
+    compression = models.CharField(max_length=20, verbose_name='压缩方式', null=True, blank=True)
+    stored_size = models.BigIntegerField(verbose_name='存储大小', null=True, blank=True)
+    ref_count = models.IntegerField(verbose_name='引用计数', default=0)
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+
+    objects = BlobManager()
+
+    class Meta:
+        verbose_name = '文件块'
+        verbose_name_plural = '文件块'
+
+    def __str__(self):
+        return self.hex
+
+    @property
+    def compression_ratio(self) -> float:
+        """原始大小与磁盘占用之比，未压缩时为1"""
+        if not self.stored_size:
+            return 1.0
+        return self.size / self.stored_size
+
+
 class Document(BaseModel):
     CONTENT_TYPE_CHOICES = [('TEXT', 'TEXT'), ('MARKDOWN', 'MD'), ('CSV', 'CSV'), ('JSON', 'JSON')]
     name = models.CharField(max_length=255, verbose_name='名称')
     path = models.CharField(max_length=600, verbose_name='路径')
     size = models.IntegerField(verbose_name='大小')
-    mime_type = models.CharField(max_length=20, verbose_name='类型')
+    # RFC 6838: 类型和子类型各不超过127个字符
+    mime_type = models.CharField(max_length=255, verbose_name='类型')
     order = models.IntegerField(verbose_name='顺序')
-    hex = models.CharField(max_length=255, verbose_name='哈希值', unique=True)
+    hex = models.CharField(max_length=255, verbose_name='哈希值')
+    hash_algorithm = models.CharField(max_length=20, verbose_name='哈希算法', default='md5')
     collection = models.ForeignKey(Content, on_delete=models.CASCADE, verbose_name='集合')
     content = models.TextField(verbose_name='内容', null=True, blank=True)
     thumbnail = models.CharField(max_length=255, verbose_name='缩略图', null=True, blank=True)
     content_type = models.CharField(
         max_length=20, verbose_name='内容类型', null=True, blank=True, choices=CONTENT_TYPE_CHOICES
     )
+    # 最近一次插件流水线各阶段的耗时，由plugin.core.pipeline写入
+    plugin_timings = models.JSONField(verbose_name='插件耗时', null=True, blank=True)
 
     class Meta:
         verbose_name = '文档'
@@ -174,3 +254,89 @@ class Document(BaseModel):
 
     def __str__(self):
         return self.name + ' - ' + self.path
+
+    @classmethod
+    def clean_mime_type(cls, mime_type: str | None) -> str:
+        """超过字段长度的类型不保存，下载时按application/octet-stream返回"""
+        mime_type = mime_type or ''
+        if len(mime_type) > cls._meta.get_field('mime_type').max_length:
+            return ''
+        return mime_type
+
+    def get_compression(self) -> str | None:
+        return Blob.objects.filter(hex=self.hex).values_list('compression', flat=True).first()
+
+    def open_file(self):
+        """以流的方式打开文档对应的文件块，压缩存储的文件读取时透明解压"""
+        return get_storage().open(self.hex, self.get_compression())
+
+    def map_file(self):
+        """以只读缓冲区（mmap）访问文件块，用法：with document.map_file() as buffer"""
+        return get_storage().mmap(self.hex, self.get_compression())
+
+    def open_range(self, start=0, end=None):
+        """通过mmap读取文档内容中 [start, end) 的部分，用于下载"""
+        return get_storage().open_range(self.hex, self.get_compression(), start, end)
+
+    def delete(self, using=None, keep_parents=False):
+        if not self.is_delete:
+            Blob.objects.release(self.hex)
+        return super().delete(using=using, keep_parents=keep_parents)
+
+
+class ConversionJob(models.Model):
+    """文档转换任务，由run_conversion_workers命令在进程池中执行"""
+
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATE_CHOICES = [
+        (QUEUED, '排队中'),
+        (RUNNING, '执行中'),
+        (DONE, '已完成'),
+        (FAILED, '失败'),
+    ]
+    ACTIVE_STATES = (QUEUED, RUNNING)
+
+    document = models.ForeignKey(
+        Document, on_delete=models.CASCADE, verbose_name='文档', related_name='conversion_jobs'
+    )
+    state = models.CharField(
+        max_length=20, verbose_name='状态', choices=STATE_CHOICES, default=QUEUED
+    )
+    attempts = models.IntegerField(verbose_name='执行次数', default=0)
+    error = models.TextField(verbose_name='错误信息', null=True, blank=True)
+    bytes_per_second = models.FloatField(verbose_name='转换速度（字节/秒）', null=True, blank=True)
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    start_time = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    finish_time = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+
+    class Meta:
+        verbose_name = '转换任务'
+        verbose_name_plural = '转换任务'
+        ordering = ('id',)
+        indexes = [models.Index(fields=['state', 'id'], name='conversion_job_state_idx')]
+
+    def __str__(self):
+        return f'{self.document_id} - {self.state}'
+
+
+class ConversionResult(models.Model):
+    """按 (文件哈希, 转换器编码, 转换器版本) 缓存的转换结果，不同集合中的相同文件只转换一次"""
+
+    hex = models.CharField(max_length=255, verbose_name='哈希值')
+    converter = models.CharField(max_length=50, verbose_name='转换器编码')
+    version = models.CharField(max_length=20, verbose_name='转换器版本')
+    content = models.TextField(verbose_name='内容', null=True, blank=True)
+    hit_count = models.IntegerField(verbose_name='命中次数', default=0)
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    last_hit_time = models.DateTimeField(null=True, blank=True, verbose_name='最近命中时间')
+
+    class Meta:
+        verbose_name = '转换结果'
+        verbose_name_plural = '转换结果'
+        unique_together = ('hex', 'converter', 'version')
+
+    def __str__(self):
+        return f'{self.hex} - {self.converter}@{self.version}'
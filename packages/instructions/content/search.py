@@ -0,0 +1,223 @@
+"""内容全文检索
+
+开发环境使用SQLite FTS5，生产环境使用PostgreSQL tsvector + GIN索引。
+中文没有空格分词，入库时切分为单字和二元组(bigram)，检索词中的连续汉字切分为二元组，单个汉字按单字匹配。
+"""
+
+import re
+from functools import cache
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+CJK_RANGES = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+TOKEN_PATTERN = re.compile(rf'[{CJK_RANGES}]+|[^\W_{CJK_RANGES}]+')
+CJK_PATTERN = re.compile(rf'[{CJK_RANGES}]')
+
+# 参与检索的内容字段，ContentViewSet.search_fields（不支持全文检索时的LIKE查询）取同一列表
+SEARCH_FIELDS = ('code', 'title', 'abstract', 'summary', 'keyword', 'state')
+
+
+def bigram_tokenize(text: str | None, unigrams=False) -> list[str]:
+    """
+    中文连续字符切分为重叠的二元组，其他字符按单词切分并转为小写
+    unigrams为True时同时输出每个汉字，用于建立索引，使任意位置的单字都能检索到
+    """
+    tokens = []
+    for run in TOKEN_PATTERN.findall(text or ''):
+        if CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+                continue
+            if unigrams:
+                tokens.extend(run)
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+
+def build_document(content) -> str:
+    tokens = []
+    for field in SEARCH_FIELDS:
+        tokens.extend(bigram_tokenize(getattr(content, field), unigrams=True))
+    return ' '.join(tokens)
+
+
+def build_query_terms(query: str) -> list[str]:
+    """检索词按二元组切分并去重，各词均需匹配"""
+    return list(dict.fromkeys(bigram_tokenize(query)))
+
+
+class BaseSearchBackend:
+    """全文检索后端接口"""
+
+    vendor = None
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def install(self, schema_editor):
+        raise NotImplementedError('must implement install')
+
+    def uninstall(self, schema_editor):
+        raise NotImplementedError('must implement uninstall')
+
+    def index(self, contents):
+        raise NotImplementedError('must implement index')
+
+    def remove(self, content_ids):
+        raise NotImplementedError('must implement remove')
+
+    def clear(self):
+        raise NotImplementedError('must implement clear')
+
+    def search(self, queryset, query: str):
+        raise NotImplementedError('must implement search')
+
+    def sync(self, contents):
+        """已软删除的内容移出索引，其余写入索引"""
+        live, deleted = [], []
+        for content in contents:
+            (deleted if content.is_delete else live).append(content)
+        if deleted:
+            self.remove([content.pk for content in deleted])
+        if live:
+            self.index(live)
+
+
+class SqliteSearchBackend(BaseSearchBackend):
+    """SQLite FTS5，rowid即内容ID"""
+
+    vendor = 'sqlite'
+    table = 'content_search'
+
+    def install(self, schema_editor):
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+            "USING fts5(document, tokenize='unicode61')"
+        )
+
+    def uninstall(self, schema_editor):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index(self, contents):
+        rows = [(content.pk, build_document(content)) for content in contents]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk, _ in rows]
+            )
+            cursor.executemany(f'INSERT INTO {self.table} (rowid, document) VALUES (%s, %s)', rows)
+
+    def remove(self, content_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in content_ids]
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search(self, queryset, query):
+        terms = build_query_terms(query)
+        if not terms:
+            return queryset
+        expression = ' '.join('"{}"'.format(token.replace('"', '""')) for token in terms)
+        return queryset.filter(
+            id__in=RawSQL(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [expression]
+            )
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """PostgreSQL tsvector + GIN索引
+
+    词元直接由array_to_tsvector写入，不经过数据库分词器，避免中文受lc_ctype影响被丢弃
+    """
+
+    vendor = 'postgresql'
+    table = 'content_search'
+
+    def install(self, schema_editor):
+        schema_editor.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} '
+            '(content_id integer PRIMARY KEY, document tsvector NOT NULL)'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {self.table}_document_gin '
+            f'ON {self.table} USING GIN (document)'
+        )
+
+    def uninstall(self, schema_editor):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index(self, contents):
+        rows = [(content.pk, build_document(content).split()) for content in contents]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (content_id, document) '
+                'VALUES (%s, array_to_tsvector(%s::text[])) '
+                'ON CONFLICT (content_id) DO UPDATE SET document = EXCLUDED.document',
+                rows,
+            )
+
+    def remove(self, content_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE content_id = ANY(%s)', [list(content_ids)]
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table}')
+
+    def search(self, queryset, query):
+        terms = build_query_terms(query)
+        if not terms:
+            return queryset
+        expression = ' & '.join("'{}'".format(token.replace("'", "''")) for token in terms)
+        return queryset.filter(
+            id__in=RawSQL(
+                f'SELECT content_id FROM {self.table} WHERE document @@ %s::tsquery', [expression]
+            )
+        )
+
+
+SEARCH_BACKENDS = {
+    backend.vendor: backend for backend in (SqliteSearchBackend, PostgresSearchBackend)
+}
+
+
+@cache
+def get_search_backend(using='default') -> BaseSearchBackend | None:
+    """
+    获取全文检索后端
+    优先使用settings.CONTENT_SEARCH_BACKEND，未配置时按数据库类型选择，不支持的数据库返回None
+    """
+    backend_path = getattr(settings, 'CONTENT_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)(using)
+    backend_class = SEARCH_BACKENDS.get(connections[using].vendor)
+    return backend_class(using) if backend_class else None
+
+
+def sync_content_search(sender, instance, raw=False, using='default', **kwargs):
+    """内容保存（包括软删除）后同步索引"""
+    backend = get_search_backend(using)
+    if raw or backend is None:
+        return
+    backend.sync([instance])
+
+
+def remove_content_search(sender, instance, using='default', **kwargs):
+    backend = get_search_backend(using)
+    if backend is not None:
+        backend.remove([instance.pk])
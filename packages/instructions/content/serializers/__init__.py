@@ -1,4 +1,9 @@
 from .category import CategorySerializer
-from .content import ContentSerializer
-from .document import DocumentSerializer, DocumentUploadSerializer
+from .content import ContentSerializer, get_content_serializer_class
+from .document import (
+    ConversionJobSerializer,
+    DocumentReorderSerializer,
+    DocumentSerializer,
+    DocumentUploadSerializer,
+)
 from .level1_category import Level1CategorySerializer
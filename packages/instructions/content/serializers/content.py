@@ -1,6 +1,7 @@
+from ext_model.registry import attr_definition_registry
 from rest_framework import serializers
 
-from content.models import Content
+from content.models import Content, MyModelDefinitionModel
 
 from .category import CategorySerializer
 
@@ -40,16 +41,6 @@ class ContentSerializer(serializers.ModelSerializer):
             'category_id',
         ]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        views_kwargs = self.context.get('view').kwargs
-        ext_fields = views_kwargs.get('ext_fields')
-        for attr in ext_fields:
-            self.fields[attr.attr_name] = serializers.ModelField(
-                model_field=self.Meta.model._meta.get_field(attr.attr_id)
-            )
-            self.fields[attr.attr_name].label = attr.attr_label
-
     def create(self, validated_data):
         # 获取关联对象的id
         category_id = validated_data.pop('category_id', None)
@@ -78,3 +69,39 @@ class ContentSerializer(serializers.ModelSerializer):
         instance.update_ext_fields(validated_data)
         instance.save()
         return instance
+
+
+_serializer_class_cache: dict[str, tuple] = {}
+
+
+def build_content_serializer_class(definition_id, ext_fields):
+    """构建绑定了扩展字段的ContentSerializer子类"""
+    attrs = {}
+    for attr in ext_fields:
+        attrs[attr.attr_name] = serializers.ModelField(
+            model_field=Content._meta.get_field(attr.attr_id), label=attr.attr_label
+        )
+    meta = type(
+        'Meta',
+        (ContentSerializer.Meta,),
+        {'fields': ContentSerializer.Meta.fields + list(attrs.keys())},
+    )
+    attrs['Meta'] = meta
+    return type(f'ContentSerializer_{definition_id}', (ContentSerializer,), attrs)
+
+
+def get_content_serializer_class(definition_id):
+    """
+    获取分类定义对应的ContentSerializer子类
+    按definition_id缓存，属性定义变更时注册表返回新的映射，缓存随之重建
+    """
+    if definition_id is None:
+        return ContentSerializer
+    definitions = attr_definition_registry.get(MyModelDefinitionModel, definition_id)
+    key = str(definition_id)
+    entry = _serializer_class_cache.get(key)
+    if entry is not None and entry[0] is definitions:
+        return entry[1]
+    serializer_class = build_content_serializer_class(definition_id, definitions.values())
+    _serializer_class_cache[key] = (definitions, serializer_class)
+    return serializer_class
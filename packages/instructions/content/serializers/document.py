@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from content.models import Document
+from content.models import ConversionJob, Document
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -12,3 +12,29 @@ class DocumentSerializer(serializers.ModelSerializer):
 class DocumentUploadSerializer(serializers.Serializer):
     file = serializers.FileField(max_length=200, allow_empty_file=False)
     collection = serializers.IntegerField(required=True, allow_null=False)
+
+
+class DocumentReorderSerializer(serializers.Serializer):
+    collection = serializers.IntegerField(required=True, allow_null=False)
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_ids(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError('文档ID不能重复')
+        return value
+
+
+class ConversionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ConversionJob
+        fields = [
+            'id',
+            'document',
+            'state',
+            'attempts',
+            'error',
+            'bytes_per_second',
+            'create_time',
+            'start_time',
+            'finish_time',
+        ]
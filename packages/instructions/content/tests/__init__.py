@@ -1,5 +1,19 @@
+from .test_attr_registry import AttrDefinitionRegistryTestSuite
+from .test_content_api import ContentApiTestSuite
+from .test_conversion import ConversionJobTestSuite
+from .test_converters import ConverterTestSuite
+from .test_document import DocumentTestSuite
+from .test_ext_queryset import ExtQuerySetTestSuite
 from .test_soft_delete import SoftDeleteTestSuite
+from .test_storage import StorageTestSuite
 
 __all__ = [
+    'AttrDefinitionRegistryTestSuite',
+    'ContentApiTestSuite',
+    'ConversionJobTestSuite',
+    'ConverterTestSuite',
+    'DocumentTestSuite',
+    'ExtQuerySetTestSuite',
     'SoftDeleteTestSuite',
+    'StorageTestSuite',
 ]
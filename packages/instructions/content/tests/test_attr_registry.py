@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from ext_model.registry import attr_definition_registry
+
+from content.models import (
+    Category,
+    Content,
+    Level1Category,
+    MyAttrDefinitionModel,
+    MyModelDefinitionModel,
+)
+
+
+class AttrDefinitionRegistryTestSuite(TestCase):
+    """属性定义注册表测试套件"""
+
+    def setUp(self):
+        attr_definition_registry.invalidate()
+        attr_definition_registry.reset_stats()
+        self.definition_a = MyModelDefinitionModel.objects.create(name='定义A', code='a')
+        self.definition_b = MyModelDefinitionModel.objects.create(name='定义B', code='b')
+        MyAttrDefinitionModel.objects.create(
+            attr_name='author', attr_id='attr1', attr_label='作者', model=self.definition_a
+        )
+        MyAttrDefinitionModel.objects.create(
+            attr_name='author', attr_id='attr2', attr_label='作者', model=self.definition_b
+        )
+
+    def test_definitions_are_isolated_per_model_id(self):
+        """不同model_id的定义互不干扰"""
+        definitions_a = attr_definition_registry.get(MyModelDefinitionModel, self.definition_a.id)
+        definitions_b = attr_definition_registry.get(MyModelDefinitionModel, self.definition_b.id)
+        self.assertEqual(definitions_a['author'].attr_id, 'attr1')
+        self.assertEqual(definitions_b['author'].attr_id, 'attr2')
+        with self.assertRaises(TypeError):
+            definitions_a['title'] = definitions_a['author']
+
+    def test_hit_and_miss_counts(self):
+        """重复读取命中缓存且不再查询数据库"""
+        attr_definition_registry.get(MyModelDefinitionModel, self.definition_a.id)
+        with self.assertNumQueries(0):
+            attr_definition_registry.get(MyModelDefinitionModel, self.definition_a.id)
+        stats = attr_definition_registry.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_save_and_delete_invalidate(self):
+        """属性定义的新增与删除会使缓存失效"""
+        attr_definition_registry.get(MyModelDefinitionModel, self.definition_a.id)
+        attr = MyAttrDefinitionModel.objects.create(
+            attr_name='source', attr_id='attr3', attr_label='来源', model=self.definition_a
+        )
+        definitions = attr_definition_registry.get(MyModelDefinitionModel, self.definition_a.id)
+        self.assertIn('source', definitions)
+
+        attr.delete()
+        definitions = attr_definition_registry.get(MyModelDefinitionModel, self.definition_a.id)
+        self.assertNotIn('source', definitions)
+
+    def test_invalidation_during_load_is_not_overwritten(self):
+        """加载期间发生失效时，加载到的旧映射不写入缓存"""
+        load = attr_definition_registry.load
+
+        def load_then_invalidate(definition_model, model_id):
+            entry = load(definition_model, model_id)
+            attr_definition_registry.invalidate(definition_model, model_id)
+            return entry
+
+        with patch.object(attr_definition_registry, 'load', side_effect=load_then_invalidate):
+            attr_definition_registry.get(MyModelDefinitionModel, self.definition_a.id)
+        self.assertEqual(attr_definition_registry.stats()['size'], 0)
+        attr_definition_registry.get(MyModelDefinitionModel, self.definition_a.id)
+        self.assertEqual(attr_definition_registry.stats()['misses'], 2)
+
+    def test_invalidated_again_on_commit(self):
+        """事务提交后再次失效，清除提交前缓存的映射"""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            MyAttrDefinitionModel.objects.create(
+                attr_name='source', attr_id='attr3', attr_label='来源', model=self.definition_a
+            )
+            attr_definition_registry.get(MyModelDefinitionModel, self.definition_a.id)
+            self.assertEqual(attr_definition_registry.stats()['size'], 1)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(attr_definition_registry.stats()['size'], 0)
+
+    def test_ext_model_uses_registry(self):
+        """ExtModel按分类的定义解析扩展字段"""
+        level1 = Level1Category.objects.create(code='l1', name='一级', description='')
+        category = Category.objects.create(
+            code='c1', name='分类', description='', level1=level1, definition=self.definition_b
+        )
+        content = Content(code='x', title='x', category=category)
+        content.update_ext_fields({'author': '张三'})
+        self.assertEqual(content.attr2, '张三')
+        self.assertIsNone(content.attr1)
@@ -0,0 +1,197 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from content.models import (
+    Category,
+    Content,
+    Level1Category,
+    MyAttrDefinitionModel,
+    MyModelDefinitionModel,
+)
+from content.serializers import get_content_serializer_class
+
+
+class ContentApiTestSuite(TestCase):
+    """内容接口测试套件"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.definition = MyModelDefinitionModel.objects.create(name='定义', code='def')
+        MyAttrDefinitionModel.objects.create(
+            attr_name='author', attr_id='attr1', attr_label='作者', model=self.definition
+        )
+        self.level1 = Level1Category.objects.create(code='l1', name='一级', description='')
+        self.category = Category.objects.create(
+            code='c1', name='分类', description='', level1=self.level1, definition=self.definition
+        )
+        self.url = f'/api/{self.category.id}/contents/'
+
+    def create_contents(self, count):
+        for i in range(count):
+            Content.objects.create(
+                code=f'code{i}', title=f'标题{i}', category=self.category, attr1=f'作者{i}'
+            )
+
+    def test_serializer_class_is_cached_per_definition(self):
+        """同一定义复用序列化器类，属性变更后重建"""
+        serializer_class = get_content_serializer_class(self.definition.id)
+        self.assertIs(get_content_serializer_class(self.definition.id), serializer_class)
+        self.assertIn('author', serializer_class._declared_fields)
+
+        MyAttrDefinitionModel.objects.create(
+            attr_name='source', attr_id='attr2', attr_label='来源', model=self.definition
+        )
+        rebuilt_class = get_content_serializer_class(self.definition.id)
+        self.assertIsNot(rebuilt_class, serializer_class)
+        self.assertIn('source', rebuilt_class._declared_fields)
+
+    def test_list_returns_ext_fields(self):
+        """列表接口按属性名称返回扩展字段"""
+        self.create_contents(3)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        authors = {row['author'] for row in response.data['results']}
+        self.assertEqual(authors, {'作者0', '作者1', '作者2'})
+
+    def test_create_maps_ext_fields(self):
+        """创建接口将属性名称映射到扩展字段"""
+        response = self.client.post(self.url, {'code': 'new', 'title': '新内容', 'author': '李四'})
+        self.assertEqual(response.status_code, 201, response.data)
+        content = Content.objects.get(code='new')
+        self.assertEqual(content.attr1, '李四')
+        self.assertEqual(content.category_id, self.category.id)
+
+    def test_list_filters_and_orders_by_ext_fields(self):
+        """列表接口按属性名称在数据库中过滤和排序"""
+        self.create_contents(3)
+        response = self.client.get(self.url, {'author': '作者1'})
+        self.assertEqual([row['code'] for row in response.data['results']], ['code1'])
+        response = self.client.get(self.url, {'ordering': '-author'})
+        codes = [row['code'] for row in response.data['results']]
+        self.assertEqual(codes, ['code2', 'code1', 'code0'])
+
+    def walk_cursor_pages(self, params):
+        codes, response = [], self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            codes.append([row['code'] for row in response.data['results']])
+            if not response.data['next']:
+                return codes, response
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_pagination_by_id(self):
+        """键集分页按id遍历，不执行COUNT查询"""
+        self.create_contents(5)
+        pages, last_response = self.walk_cursor_pages({'cursor': '', 'page_size': 2})
+        self.assertEqual(pages, [['code0', 'code1'], ['code2', 'code3'], ['code4']])
+
+        previous = self.client.get(last_response.data['previous'])
+        self.assertEqual([row['code'] for row in previous.data['results']], ['code2', 'code3'])
+
+    def test_cursor_pagination_by_update_time(self):
+        """键集分页按 (update_time, id) 遍历"""
+        self.create_contents(3)
+        first = Content.objects.get(code='code0')
+        first.title = '更新'
+        first.save()
+        pages, _ = self.walk_cursor_pages(
+            {'cursor': '', 'cursor_order': 'update_time', 'page_size': 2}
+        )
+        self.assertEqual(pages, [['code1', 'code2'], ['code0']])
+
+    def test_invalid_cursor(self):
+        """无效游标返回404"""
+        response = self.client.get(self.url, {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_streams_live_contents(self):
+        """导出接口以NDJSON流式返回未删除的内容"""
+        self.create_contents(3)
+        Content.objects.get(code='code1').delete()
+        response = self.client.get(f'{self.url}export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['code'] for row in rows], ['code0', 'code2'])
+        self.assertEqual(rows[0]['author'], '作者0')
+        self.assertNotIn('attr1', rows[0])
+
+    def test_export_with_attr_named_after_field(self):
+        """属性名称与内容字段同名时导出不报错，输出属性的值"""
+        MyAttrDefinitionModel.objects.create(
+            attr_name='state', attr_id='attr2', attr_label='状态', model=self.definition
+        )
+        Content.objects.create(
+            code='code0', title='标题', category=self.category, attr1='作者', attr2='草稿'
+        )
+        response = self.client.get(f'{self.url}export/')
+        self.assertEqual(response.status_code, 200)
+        row = json.loads(b''.join(response.streaming_content))
+        self.assertEqual((row['author'], row['state'], row['title']), ('作者', '草稿', '标题'))
+        self.assertNotIn('attr2', row)
+        self.assertEqual(
+            list(Content.objects.with_definition(self.definition.id).values('state', 'author')),
+            [{'attr2': '草稿', 'author': '作者'}],
+        )
+
+    # 每个接口允许的查询次数：分类 + (分页COUNT) + 数据，与行数无关
+    LIST_QUERY_BUDGET = 3
+    CURSOR_LIST_QUERY_BUDGET = 2
+    RETRIEVE_QUERY_BUDGET = 2
+
+    def test_query_budget(self):
+        """列表与详情接口的查询次数固定，不随行数增长"""
+        self.create_contents(1)
+        self.client.get(self.url)  # 预热属性定义注册表
+        for _ in range(2):
+            with self.assertNumQueries(self.LIST_QUERY_BUDGET):
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            with self.assertNumQueries(self.CURSOR_LIST_QUERY_BUDGET):
+                self.client.get(self.url, {'cursor': ''})
+            self.create_contents(20)
+
+        content = Content.objects.first()
+        with self.assertNumQueries(self.RETRIEVE_QUERY_BUDGET):
+            response = self.client.get(f'{self.url}{content.id}/')
+        self.assertEqual(response.data['category']['id'], self.category.id)
+
+    def test_unknown_category(self):
+        """分类不存在时返回404"""
+        response = self.client.get('/api/999999/contents/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_full_text_search(self):
+        """?search=使用全文检索，支持中文二元组匹配并随软删除同步"""
+        Content.objects.create(code='a1', title='指令管理系统', category=self.category)
+        Content.objects.create(
+            code='b1', title='内容检索说明', abstract='系统', category=self.category
+        )
+        deleted = Content.objects.create(code='c1', title='指令手册', category=self.category)
+        deleted.delete()
+
+        def search(query):
+            response = self.client.get(self.url, {'search': query})
+            return sorted(row['code'] for row in response.data['results'])
+
+        self.assertEqual(search('指令'), ['a1'])
+        self.assertEqual(search('系统'), ['a1', 'b1'])
+        self.assertEqual(search('管理系统'), ['a1'])
+        self.assertEqual(search('检'), ['b1'])
+        # 只出现在连续汉字末尾的单字
+        self.assertEqual(search('统'), ['a1', 'b1'])
+        self.assertEqual(search('明'), ['b1'])
+        self.assertEqual(search('A1'), ['a1'])
+        self.assertEqual(search('不存在'), [])
+        # 检索字段与LIKE查询的search_fields一致
+        published = Content.objects.get(code='b1')
+        published.state = 'published'
+        published.save()
+        self.assertEqual(search('published'), ['b1'])
@@ -0,0 +1,240 @@
+import gzip
+import os
+import shutil
+import signal
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from content.conversion import ConversionWorkerPool, enqueue_conversion
+from content.models import (
+    Blob,
+    Category,
+    Content,
+    ConversionJob,
+    ConversionResult,
+    Document,
+    Level1Category,
+)
+from content.utils import ConversionStats, get_blob_path, write_blob
+from instructions.process import TERMINATE_TIMEOUT
+
+CONVERTED = ('已转换', ConversionStats(size=9, elapsed=0.001))
+
+
+def slow_convert(buffer, content_type=None):
+    Path(settings.STORE_PATH, 'worker.pid').write_text(str(os.getpid()))
+    time.sleep(30)
+
+
+class ConversionJobTestSuite(TestCase):
+    """文档转换任务队列测试套件"""
+
+    def setUp(self):
+        self.store_path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.store_path, ignore_errors=True)
+        settings_override = override_settings(STORE_PATH=self.store_path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        level1 = Level1Category.objects.create(code='l1', name='一级', description='')
+        category = Category.objects.create(code='c1', name='分类', description='', level1=level1)
+        self.collection = Content.objects.create(code='col', title='集合', category=category)
+        self.other_collection = Content.objects.create(
+            code='col2', title='集合2', category=category
+        )
+        write_blob('abc', ['说明书'.encode()], self.store_path)
+        self.document = self.create_document(self.collection)
+
+    def create_document(self, collection):
+        return Document.objects.create(
+            name='doc.txt',
+            path=get_blob_path('abc'),
+            size=9,
+            mime_type='text/plain',
+            order=1,
+            hex='abc',
+            collection=collection,
+        )
+
+    def run_workers(self, timeout=30):
+        call_command(
+            'run_conversion_workers',
+            workers=1,
+            timeout=timeout,
+            poll_interval=0.05,
+            once=True,
+            stdout=StringIO(),
+        )
+
+    def test_convert_returns_job(self):
+        """提交转换返回202和任务ID，未完成前重复提交复用同一任务"""
+        response = self.client.post(f'/api/documents/{self.document.id}/convert/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['state'], ConversionJob.QUEUED)
+        self.assertTrue(
+            response['Location'].endswith(f'/api/conversion-jobs/{response.data["id"]}/')
+        )
+
+        again = self.client.post(f'/api/documents/{self.document.id}/convert/')
+        self.assertEqual(again.data['id'], response.data['id'])
+        self.assertEqual(ConversionJob.objects.count(), 1)
+
+        status_response = self.client.get(f'/api/conversion-jobs/{response.data["id"]}/')
+        self.assertEqual(status_response.status_code, 200)
+        self.assertEqual(status_response.data['document'], self.document.id)
+
+    @override_settings(CONVERSION_JOB_TIMEOUT=60, CONVERSION_JOB_MAX_ATTEMPTS=2)
+    def test_stale_running_job_is_reclaimed(self):
+        """工作进程异常退出后遗留的执行中任务超过租期后重新排队，执行次数用完的标记为失败"""
+        job = ConversionJob.objects.create(
+            document=self.document,
+            state=ConversionJob.RUNNING,
+            attempts=1,
+            start_time=timezone.now() - timedelta(seconds=30),
+        )
+        self.assertEqual(enqueue_conversion(self.document), (job, False))
+        job.refresh_from_db()
+        self.assertEqual(job.state, ConversionJob.RUNNING)
+
+        ConversionJob.objects.filter(id=job.id).update(
+            start_time=timezone.now() - timedelta(seconds=300)
+        )
+        self.assertEqual(enqueue_conversion(self.document), (job, False))
+        job.refresh_from_db()
+        self.assertEqual(job.state, ConversionJob.QUEUED)
+        self.assertIsNone(job.start_time)
+
+        ConversionJob.objects.filter(id=job.id).update(
+            state=ConversionJob.RUNNING,
+            attempts=2,
+            start_time=timezone.now() - timedelta(seconds=300),
+        )
+        new_job, created = enqueue_conversion(self.document)
+        self.assertTrue(created)
+        self.assertNotEqual(new_job.id, job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.state, ConversionJob.FAILED)
+
+    @patch('content.conversion.convert_buffer', return_value=CONVERTED)
+    def test_worker_reclaims_stale_job(self, _convert_file):
+        """工作进程领取任务时回收其他工作进程遗留的执行中任务"""
+        job = ConversionJob.objects.create(
+            document=self.document,
+            state=ConversionJob.RUNNING,
+            attempts=1,
+            start_time=timezone.now() - timedelta(seconds=120),
+        )
+        self.run_workers()
+
+        job.refresh_from_db()
+        self.assertEqual(job.state, ConversionJob.DONE)
+        self.assertEqual(job.attempts, 2)
+
+    @patch('content.conversion.convert_buffer', return_value=CONVERTED)
+    def test_worker_saves_result(self, _convert_file):
+        """工作进程执行任务，主进程写回转换结果"""
+        response = self.client.post(f'/api/documents/{self.document.id}/convert/')
+        self.run_workers()
+
+        job = ConversionJob.objects.get(id=response.data['id'])
+        self.assertEqual(job.state, ConversionJob.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finish_time)
+        self.assertEqual(job.bytes_per_second, 9000)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.content, '已转换')
+
+    def test_worker_decompresses_blob(self):
+        """压缩存储的文件先解压再转换"""
+        self.store_path.joinpath(get_blob_path('abc')).write_bytes(
+            gzip.compress('压缩说明书'.encode())
+        )
+        Blob.objects.create(hex='abc', size=15, compression='gzip', stored_size=40)
+        self.client.post(f'/api/documents/{self.document.id}/convert/')
+        self.run_workers()
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.content, '压缩说明书')
+
+    @patch('content.conversion.convert_buffer', side_effect=ValueError('格式错误'))
+    def test_worker_records_failure(self, _convert_file):
+        response = self.client.post(f'/api/documents/{self.document.id}/convert/')
+        self.run_workers()
+
+        job = ConversionJob.objects.get(id=response.data['id'])
+        self.assertEqual(job.state, ConversionJob.FAILED)
+        self.assertEqual(job.error, 'ValueError: 格式错误')
+
+    def test_restart_terminates_workers_promptly(self):
+        """子进程不继承主进程的SIGTERM处理函数，重建进程池时立即结束，不等待强制结束的超时"""
+        previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: None)
+        self.addCleanup(signal.signal, signal.SIGTERM, previous_handler)
+        with ConversionWorkerPool(workers=3) as pool:
+            for _ in range(3):
+                pool.executor.submit(time.sleep, 30)
+            processes = list(pool.executor._processes.values())
+            self.assertEqual(len(processes), 3)
+            started = time.monotonic()
+            pool.restart()
+            self.assertLess(time.monotonic() - started, TERMINATE_TIMEOUT)
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+    @patch('content.conversion.convert_buffer', side_effect=slow_convert)
+    def test_worker_enforces_timeout(self, _convert_file):
+        """超时任务标记为失败，工作进程被终止"""
+        response = self.client.post(f'/api/documents/{self.document.id}/convert/')
+        started = time.monotonic()
+        self.run_workers(timeout=0.5)
+
+        self.assertLess(time.monotonic() - started, 10)
+        job = ConversionJob.objects.get(id=response.data['id'])
+        self.assertEqual(job.state, ConversionJob.FAILED)
+        self.assertIn('超时', job.error)
+        # 超时的子进程已被终止并回收
+        pid = int(self.store_path.joinpath('worker.pid').read_text())
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pid, 0)
+
+    @patch('content.conversion.convert_buffer', return_value=CONVERTED)
+    def test_cached_result_skips_conversion(self, _convert_file):
+        """相同文件在其他集合中提交转换时直接使用缓存结果"""
+        self.client.post(f'/api/documents/{self.document.id}/convert/')
+        self.run_workers()
+
+        other = self.create_document(self.other_collection)
+        response = self.client.post(f'/api/documents/{other.id}/convert/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['state'], ConversionJob.DONE)
+        other.refresh_from_db()
+        self.assertEqual(other.content, '已转换')
+
+        stats = self.client.get('/api/conversion-jobs/cache-stats/').data
+        self.assertEqual(stats, {'hits': 1, 'misses': 1, 'size': 1, 'hit_ratio': 0.5})
+
+    @patch('content.conversion.convert_buffer', return_value=CONVERTED)
+    def test_worker_uses_cached_result(self, _convert_file):
+        """排队中的相同文件在前一个任务完成后命中缓存"""
+        other = self.create_document(self.other_collection)
+        self.client.post(f'/api/documents/{self.document.id}/convert/')
+        self.client.post(f'/api/documents/{other.id}/convert/')
+        self.run_workers()
+
+        self.assertFalse(ConversionJob.objects.exclude(state=ConversionJob.DONE).exists())
+        result = ConversionResult.objects.get()
+        self.assertEqual(result.hit_count, 1)
+        other.refresh_from_db()
+        self.assertEqual(other.content, '已转换')
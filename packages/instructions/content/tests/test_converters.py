@@ -0,0 +1,88 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from content.utils import (
+    convert_buffer,
+    convert_file,
+    get_converter,
+    get_converter_key,
+    guess_content_type,
+)
+
+
+class ConverterTestSuite(SimpleTestCase):
+    """文档转换器测试套件"""
+
+    def setUp(self):
+        self.work_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        # 缩小分块，覆盖跨分块边界的情况
+        chunk_patch = patch('content.utils.converters.CHUNK_SIZE', 7)
+        chunk_patch.start()
+        self.addCleanup(chunk_patch.stop)
+
+    def write(self, name, text):
+        path = self.work_dir.joinpath(name)
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+
+    def test_registry(self):
+        self.assertEqual(guess_content_type('a.MD'), 'MARKDOWN')
+        self.assertEqual(guess_content_type('a.bin'), 'TEXT')
+        self.assertEqual(get_converter(None).code, 'TEXT')
+        self.assertEqual(get_converter_key('CSV'), ('CSV', get_converter('CSV').version))
+
+    def test_text_decodes_across_chunks(self):
+        """多字节字符被分块截断时仍能正确解码"""
+        text = '操作说明：第一步，检查设备。\n' * 5
+        content, stats = convert_file(self.write('a.txt', text), 'TEXT')
+        self.assertEqual(content, text)
+        self.assertEqual(stats.size, len(text.encode('utf-8')))
+        self.assertGreater(stats.bytes_per_second, 0)
+        self.assertEqual(convert_file(self.write('empty.md', ''), 'MARKDOWN')[0], '')
+
+    def test_convert_buffer(self):
+        """转换器直接读取bytes等缓冲区"""
+        content, stats = convert_buffer('id,title\n1,说明\n'.encode(), 'CSV')
+        self.assertEqual(content, '| id | title |\n| --- | --- |\n| 1 | 说明 |\n')
+        self.assertEqual(stats.size, len('id,title\n1,说明\n'.encode()))
+        self.assertEqual(convert_buffer(b'[1, 2]', 'JSON')[0], '1\n2\n')
+
+    def test_csv_to_markdown_table(self):
+        path = self.write('a.csv', 'id,title\n1,"a|b"\n2,"多\n行"\n')
+        content, _ = convert_file(path, 'CSV')
+        self.assertEqual(content, '| id | title |\n| --- | --- |\n| 1 | a\\|b |\n| 2 | 多 行 |\n')
+
+    def test_json_array_streams_items(self):
+        """数组元素逐个解析，数字在分块边界被截断时不会提前结束"""
+        items = [12345678, {'名称': '说明', 'values': [1, 2.5]}, 'text', None, 987654321]
+        path = self.write('a.json', ' [ ' + ' , '.join(json.dumps(i) for i in items) + ' ] ')
+        content, _ = convert_file(path, 'JSON')
+        self.assertEqual([json.loads(line) for line in content.splitlines()], items)
+
+    def test_json_object(self):
+        path = self.write('a.json', '{"a": [1, 2]}')
+        self.assertEqual(json.loads(convert_file(path, 'JSON')[0]), {'a': [1, 2]})
+
+    def test_json_invalid_array(self):
+        path = self.write('a.json', '[1 2]')
+        with self.assertRaises(json.JSONDecodeError):
+            convert_file(path, 'JSON')
+
+    def test_bench_command(self):
+        out = StringIO()
+        call_command('bench_converters', sizes='4KB', dir=str(self.work_dir), stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split()[0] for line in lines[1:]], ['TEXT', 'MARKDOWN', 'CSV', 'JSON']
+        )
+        for code in ('TEXT', 'CSV', 'JSON'):
+            fixture = next(self.work_dir.glob(f'{code.lower()}-*'))
+            convert_file(str(fixture), code)
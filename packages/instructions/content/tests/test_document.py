@@ -0,0 +1,583 @@
+import gzip
+import hashlib
+import lzma
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from plugin.models import PluginResult
+from rest_framework.test import APIClient
+
+from content.management.commands import gc_store
+from content.models import (
+    Blob,
+    Category,
+    Content,
+    ConversionResult,
+    Document,
+    Level1Category,
+)
+from content.utils import get_blob_path, store_blob, write_blob
+
+
+class DocumentTestSuite(TestCase):
+    """文档上传与存储测试套件"""
+
+    def setUp(self):
+        self.store_path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.store_path, ignore_errors=True)
+        settings_override = override_settings(STORE_PATH=self.store_path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        level1 = Level1Category.objects.create(code='l1', name='一级', description='')
+        category = Category.objects.create(code='c1', name='分类', description='', level1=level1)
+        self.collection = Content.objects.create(code='col', title='集合', category=category)
+        self.other_collection = Content.objects.create(
+            code='col2', title='集合2', category=category
+        )
+
+    def upload(self, name, data, collection=None, content_type='text/plain'):
+        return self.client.post(
+            '/api/documents/upload/',
+            {
+                'file': SimpleUploadedFile(name, data, content_type=content_type),
+                'collection': (collection or self.collection).id,
+            },
+            format='multipart',
+        )
+
+    def test_upload_streams_to_store(self):
+        """上传文件按分块写入存储目录，不残留临时文件"""
+        data = b'line\n' * 50000
+        response = self.upload('guide.txt', data)
+        self.assertEqual(response.status_code, 201, response.data)
+
+        document = Document.objects.get(id=response.data['id'])
+        self.assertEqual(document.hex, hashlib.md5(data).hexdigest())
+        self.assertEqual(document.size, len(data))
+        self.assertEqual(self.store_path.joinpath(document.path).read_bytes(), data)
+        self.assertEqual(list(self.store_path.joinpath('.tmp').iterdir()), [])
+
+    def test_upload_keeps_long_mime_type(self):
+        """常见的较长类型原样保存，超过字段长度的类型不保存"""
+        response = self.upload('a.bin', b'binary', content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            Document.objects.get(id=response.data['id']).mime_type, 'application/octet-stream'
+        )
+
+        response = self.upload('b.bin', b'other', content_type='application/' + 'x' * 300)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Document.objects.get(id=response.data['id']).mime_type, '')
+
+    def test_blob_path_is_sharded(self):
+        """文件块按哈希前缀分片存放"""
+        data = b'sharded'
+        md5 = hashlib.md5(data).hexdigest()
+        response = self.upload('a.txt', data)
+        self.assertEqual(response.data['path'], f'{md5[:2]}/{md5[2:4]}/{md5}')
+
+    def test_same_file_shared_across_collections(self):
+        """不同集合上传相同文件共享一个文件块，第二次上传不写磁盘"""
+        data = b'shared instruction'
+        first = self.upload('a.txt', data)
+        blob_file = self.store_path.joinpath(first.data['path'])
+        mtime = blob_file.stat().st_mtime_ns
+
+        with patch('content.utils.file.tempfile.mkstemp') as mkstemp:
+            second = self.upload('b.txt', data, self.other_collection)
+        mkstemp.assert_not_called()
+        self.assertEqual(second.status_code, 201, second.data)
+        self.assertEqual(second.data['path'], first.data['path'])
+        self.assertEqual(blob_file.stat().st_mtime_ns, mtime)
+        self.assertEqual(Blob.objects.get(hex=first.data['hex']).ref_count, 2)
+
+    def test_reupload_into_same_collection(self):
+        """同一集合重复上传返回已有文档，不增加引用"""
+        data = b'duplicate'
+        first = self.upload('a.txt', data)
+        second = self.upload('a.txt', data)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Blob.objects.get(hex=first.data['hex']).ref_count, 1)
+
+    def test_concurrent_first_upload(self):
+        """同一文件并发首次上传到同一集合时，后提交的请求返回先创建的文档"""
+        data = b'concurrent'
+        hexcode = hashlib.md5(data).hexdigest()
+        allocate = Content.objects.allocate_document_order
+
+        def allocate_after_other_request(collection_id, count=1):
+            # 模拟另一个请求在本请求查询文档之后创建了相同文档
+            Blob.objects.acquire(hexcode, len(data))
+            other = Document.objects.create(
+                size=len(data),
+                name='other.txt',
+                path=get_blob_path(hexcode),
+                hex=hexcode,
+                collection_id=collection_id,
+                order=allocate(collection_id),
+            )
+            self.other_id = other.id
+            return allocate(collection_id, count)
+
+        with patch.object(
+            Content.objects, 'allocate_document_order', side_effect=allocate_after_other_request
+        ):
+            response = self.upload('a.txt', data)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['id'], self.other_id)
+        self.assertEqual(Blob.objects.get(hex=hexcode).ref_count, 1)
+
+    def test_delete_releases_blob(self):
+        """删除文档释放引用，删除后可重新上传到同一集合"""
+        data = b'release me'
+        first = self.upload('a.txt', data)
+        self.upload('a.txt', data, self.other_collection)
+
+        response = self.client.delete(f'/api/documents/{first.data["id"]}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Blob.objects.get(hex=first.data['hex']).ref_count, 1)
+
+        again = self.upload('a.txt', data)
+        self.assertEqual(again.status_code, 201)
+        self.assertEqual(again.data['id'], first.data['id'])
+        self.assertEqual(Blob.objects.get(hex=first.data['hex']).ref_count, 2)
+
+    def test_upload_allocates_order(self):
+        """文档顺序号由集合计数器分配，不统计已有文档"""
+        first = self.upload('a.txt', b'first')
+        second = self.upload('b.txt', b'second')
+        other = self.upload('c.txt', b'third', self.other_collection)
+        orders = dict(Document.objects.values_list('id', 'order'))
+        self.assertEqual(orders[first.data['id']], 1)
+        self.assertEqual(orders[second.data['id']], 2)
+        self.assertEqual(orders[other.data['id']], 1)
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.document_seq, 2)
+        self.assertEqual(Content.objects.allocate_document_order(self.collection.id, count=3), 5)
+
+        missing = self.upload('d.txt', b'missing', Content(id=0))
+        self.assertEqual(missing.status_code, 404)
+        self.assertFalse(Blob.objects.filter(hex=hashlib.md5(b'missing').hexdigest()).exists())
+
+    def test_reorder(self):
+        """按ids的顺序重写文档顺序，单条UPDATE完成"""
+        ids = [self.upload(f'{i}.txt', str(i).encode()).data['id'] for i in range(3)]
+        ids.reverse()
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                '/api/documents/reorder/',
+                {'collection': self.collection.id, 'ids': ids},
+                format='json',
+            )
+        self.assertEqual(response.data, {'updated': 3})
+        self.assertEqual(
+            list(Document.objects.filter(collection=self.collection).values_list('id', flat=True)),
+            ids,
+        )
+
+        foreign = self.upload('x.txt', b'x', self.other_collection).data['id']
+        response = self.client.post(
+            '/api/documents/reorder/',
+            {'collection': self.collection.id, 'ids': [ids[0], foreign]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Document.objects.get(id=ids[0]).order, 1)
+
+    def test_ingest_directory(self):
+        """目录导入按哈希去重，只复制新的文件，顺序号连续分配"""
+        existing = self.upload('old.txt', b'already here')
+        shared = self.upload('shared.txt', b'shared', self.other_collection)
+        source = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, source, ignore_errors=True)
+        source.joinpath('sub').mkdir()
+        source.joinpath('a.md').write_bytes(b'# guide')
+        source.joinpath('sub', 'b.csv').write_bytes(b'id\n1\n')
+        source.joinpath('sub', 'copy.md').write_bytes(b'# guide')
+        source.joinpath('old.txt').write_bytes(b'already here')
+        source.joinpath('shared.txt').write_bytes(b'shared')
+        source.joinpath('.hidden').write_bytes(b'hidden')
+
+        out = StringIO()
+        call_command(
+            'ingest_documents',
+            self.collection.id,
+            str(source),
+            workers=2,
+            batch_size=2,
+            username='testuser',
+            stdout=out,
+        )
+        self.assertIn('新增文档 3 个', out.getvalue())
+        self.assertIn('跳过重复 2 个', out.getvalue())
+        self.assertIn('新增存储文件 2 个', out.getvalue())
+
+        documents = Document.objects.filter(collection=self.collection).exclude(
+            id=existing.data['id']
+        )
+        self.assertEqual(sorted(documents.values_list('order', flat=True)), [2, 3, 4])
+        self.assertEqual(Blob.objects.get(hex=shared.data['hex']).ref_count, 2)
+        guide = documents.get(hex=hashlib.md5(b'# guide').hexdigest())
+        self.assertIn(guide.name, ('a.md', 'sub/copy.md'))
+        self.assertEqual(
+            set(documents.exclude(id=guide.id).values_list('name', flat=True)),
+            {'shared.txt', 'sub/b.csv'},
+        )
+        self.assertEqual(guide.content_type, 'MARKDOWN')
+        self.assertEqual(guide.create_user, self.user)
+        self.assertEqual(self.store_path.joinpath(guide.path).read_bytes(), b'# guide')
+
+    def test_ingest_restores_deleted_document(self):
+        """目录导入与上传一致，恢复同一集合中已软删除的相同文档并重新引用文件块"""
+        deleted = self.upload('old.txt', b'restore me')
+        self.client.delete(f'/api/documents/{deleted.data["id"]}/')
+        source = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, source, ignore_errors=True)
+        source.joinpath('new.md').write_bytes(b'restore me')
+
+        out = StringIO()
+        call_command('ingest_documents', self.collection.id, str(source), workers=1, stdout=out)
+        self.assertIn('新增文档 0 个，恢复已删除文档 1 个', out.getvalue())
+        document = Document.objects.get(id=deleted.data['id'])
+        self.assertEqual((document.name, document.content_type), ('new.md', 'MARKDOWN'))
+        self.assertEqual(document.order, 1)
+        self.assertIsNone(document.delete_at)
+        self.assertEqual(Blob.objects.get(hex=deleted.data['hex']).ref_count, 1)
+
+    def test_gc_store(self):
+        """清理没有文档引用且超过宽限期的文件块"""
+        live = self.upload('live.txt', b'live')
+        deleted = self.upload('deleted.txt', b'deleted')
+        self.client.delete(f'/api/documents/{deleted.data["id"]}/')
+        write_blob(hashlib.md5(b'fresh').hexdigest(), [b'fresh'])
+        self.store_path.joinpath('readme.md').write_bytes(b'not a blob')
+        old = time.time() - 48 * 3600
+        for path in (live.data['path'], deleted.data['path']):
+            os.utime(self.store_path.joinpath(path), (old, old))
+        tmp_file = self.store_path.joinpath('.tmp', 'stale')
+        tmp_file.write_bytes(b'partial')
+        os.utime(tmp_file, (old, old))
+
+        out = StringIO()
+        call_command('gc_store', dry_run=True, stdout=out)
+        self.assertIn('扫描 3 个文件块，可清理 1 个', out.getvalue())
+        self.assertTrue(self.store_path.joinpath(deleted.data['path']).exists())
+        self.assertTrue(tmp_file.exists())
+
+        call_command('gc_store', batch_size=1, stdout=StringIO())
+        self.assertFalse(self.store_path.joinpath(deleted.data['path']).exists())
+        self.assertTrue(self.store_path.joinpath('.quarantine', deleted.data['path']).exists())
+        self.assertFalse(Blob.objects.filter(hex=deleted.data['hex']).exists())
+        self.assertTrue(self.store_path.joinpath(live.data['path']).exists())
+        self.assertTrue(self.store_path.joinpath('readme.md').exists())
+        self.assertFalse(tmp_file.exists())
+
+        call_command('gc_store', grace_hours=0, mode='delete', stdout=StringIO())
+        self.assertFalse(
+            self.store_path.joinpath(get_blob_path(hashlib.md5(b'fresh').hexdigest())).exists()
+        )
+        self.assertTrue(self.store_path.joinpath(live.data['path']).exists())
+
+    def test_gc_store_skips_blobs_reused_after_scan(self):
+        """扫描后被重新引用或重新写入的文件块不清理"""
+        deleted = self.upload('deleted.txt', b'deleted')
+        self.client.delete(f'/api/documents/{deleted.data["id"]}/')
+        orphan_hex = hashlib.md5(b'orphan').hexdigest()
+        write_blob(orphan_hex, [b'orphan'])
+        orphan = self.store_path.joinpath(get_blob_path(orphan_hex))
+        old = time.time() - 48 * 3600
+        for path in (self.store_path.joinpath(deleted.data['path']), orphan):
+            os.utime(path, (old, old))
+
+        scan = gc_store.Command.scan
+
+        def concurrent_scan(command, root):
+            entries = list(scan(command, root))
+            for entry in entries:
+                entry.stat()
+            # 扫描完成后并发上传相同内容，并重新写入没有记录的文件
+            self.upload('again.txt', b'deleted', self.other_collection)
+            os.utime(orphan)
+            yield from entries
+
+        with patch.object(gc_store.Command, 'scan', concurrent_scan):
+            call_command('gc_store', mode='delete', stdout=StringIO())
+        self.assertTrue(self.store_path.joinpath(deleted.data['path']).exists())
+        self.assertEqual(Blob.objects.get(hex=deleted.data['hex']).ref_count, 1)
+        self.assertTrue(orphan.exists())
+
+    @override_settings(STORE_COMPRESSION={'TEXT': 'gzip'})
+    def test_upload_rewrites_blob_collected_after_dedupe(self):
+        """去重后文件块和记录被gc_store清理时重新写入，不留下没有文件的文档"""
+        data = b'collected\n' * 100
+        first = self.upload('a.txt', data, self.other_collection)
+        self.client.delete(f'/api/documents/{first.data["id"]}/')
+        blob_file = self.store_path.joinpath(first.data['path'])
+
+        def collected_store_blob(*args, **kwargs):
+            blob = store_blob(*args, **kwargs)
+            Blob.objects.filter(hex=blob.hex).delete()
+            blob_file.unlink()
+            return blob
+
+        with patch('content.views.document.store_blob', collected_store_blob):
+            response = self.upload('a.txt', data)
+        self.assertEqual(response.status_code, 201, response.data)
+        blob = Blob.objects.get(hex=first.data['hex'])
+        self.assertEqual((blob.compression, blob.ref_count), ('gzip', 1))
+        self.assertEqual(blob.stored_size, blob_file.stat().st_size)
+        with Document.objects.get(id=response.data['id']).open_file() as f:
+            self.assertEqual(f.read(), data)
+
+    def test_acquire_fails_when_blob_is_collected(self):
+        """记录在加锁前被删除时引用计数不会生效，acquire抛出异常"""
+        with patch.object(Blob.objects, 'select_for_update') as select_for_update:
+            select_for_update.return_value.get_or_create.return_value = (None, False)
+            with self.assertRaises(Blob.DoesNotExist):
+                Blob.objects.acquire('missing', 1)
+
+    def test_configurable_hash_algorithm(self):
+        """按STORE_HASH_ALGORITHM计算哈希并记录算法"""
+        with override_settings(STORE_HASH_ALGORITHM='sha256'):
+            response = self.upload('a.txt', b'sha')
+        self.assertEqual(response.data['hex'], hashlib.sha256(b'sha').hexdigest())
+        self.assertEqual(response.data['hash_algorithm'], 'sha256')
+        self.assertEqual(Blob.objects.get(hex=response.data['hex']).hash_algorithm, 'sha256')
+
+    def test_rehash_store(self):
+        """已有文件块迁移到新算法，文档、引用计数和转换和插件结果缓存随之更新"""
+        data = b'rehash me'
+        first = self.upload('a.txt', data)
+        self.upload('a.txt', data, self.other_collection)
+        ConversionResult.objects.create(hex=first.data['hex'], converter='TEXT', version='1')
+        new_hex = hashlib.blake2b(data, digest_size=32).hexdigest()
+        PluginResult.objects.create(
+            code='lines', version='1', config_hash='a', hex=first.data['hex']
+        )
+        # 新哈希下已有相同键的插件结果时丢弃旧结果
+        PluginResult.objects.create(
+            code='lines', version='1', config_hash='b', hex=first.data['hex']
+        )
+        PluginResult.objects.create(code='lines', version='1', config_hash='b', hex=new_hex)
+        old_path = self.store_path.joinpath(first.data['path'])
+
+        with override_settings(STORE_HASH_ALGORITHM='blake2b'):
+            out = StringIO()
+            call_command('rehash_store', stdout=out)
+            self.assertIn('迁移 1 个文件块', out.getvalue())
+            # 新算法下重复上传直接命中已迁移的文件块
+            again = self.upload('a.txt', data)
+        self.assertEqual(again.status_code, 200)
+
+        self.assertFalse(old_path.exists())
+        self.assertEqual(
+            set(Document.objects.values_list('hex', 'hash_algorithm', 'path')),
+            {(new_hex, 'blake2b', get_blob_path(new_hex))},
+        )
+        self.assertEqual(self.store_path.joinpath(get_blob_path(new_hex)).read_bytes(), data)
+        blob = Blob.objects.get()
+        self.assertEqual((blob.hex, blob.ref_count), (new_hex, 2))
+        self.assertEqual(ConversionResult.objects.get().hex, new_hex)
+        self.assertEqual(
+            set(PluginResult.objects.values_list('config_hash', 'hex')),
+            {('a', new_hex), ('b', new_hex)},
+        )
+
+    @override_settings(STORE_COMPRESSION={'TEXT': 'gzip'})
+    def test_compressed_upload(self):
+        """按内容类型压缩存储，哈希按原始内容计算，读取时透明解压"""
+        data = b'compress me\n' * 10000
+        response = self.upload('a.txt', data)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['hex'], hashlib.md5(data).hexdigest())
+
+        blob = Blob.objects.get(hex=response.data['hex'])
+        stored = self.store_path.joinpath(response.data['path']).read_bytes()
+        self.assertEqual(blob.compression, 'gzip')
+        self.assertEqual(blob.stored_size, len(stored))
+        self.assertEqual(gzip.decompress(stored), data)
+        self.assertGreater(blob.compression_ratio, 10)
+        with Document.objects.get(id=response.data['id']).open_file() as f:
+            self.assertEqual(f.read(), data)
+
+        # 未配置压缩的内容类型按原样保存
+        raw = self.upload('a.csv', b'id\n1\n')
+        self.assertIsNone(Blob.objects.get(hex=raw.data['hex']).compression)
+        out = StringIO()
+        call_command('store_stats', stdout=out)
+        self.assertEqual(
+            {tuple(line.split()[:2]) for line in out.getvalue().splitlines()[1:]},
+            {('gzip', '1'), ('none', '1')},
+        )
+
+    @override_settings(STORE_COMPRESSION={'TEXT': 'gzip'})
+    def test_upload_reuses_orphan_compressed_blob(self):
+        """上传失败遗留的压缩文件块没有记录，再次上传时按实际内容识别压缩方式"""
+        data = b'orphan\n' * 1000
+        missing = self.upload('a.txt', data, Content(id=0))
+        self.assertEqual(missing.status_code, 404)
+        hexcode = hashlib.md5(data).hexdigest()
+        self.assertFalse(Blob.objects.filter(hex=hexcode).exists())
+
+        response = self.upload('a.txt', data)
+        self.assertEqual(response.status_code, 201, response.data)
+        blob = Blob.objects.get(hex=hexcode)
+        stored = self.store_path.joinpath(response.data['path']).read_bytes()
+        self.assertEqual((blob.compression, blob.stored_size), ('gzip', len(stored)))
+        with Document.objects.get(id=response.data['id']).open_file() as f:
+            self.assertEqual(f.read(), data)
+
+    def test_upload_reuses_orphan_raw_gzip_file(self):
+        """未压缩保存的gzip文件文件头与压缩格式相同，校验哈希后按未压缩处理"""
+        data = gzip.compress(b'already compressed')
+        self.upload('a.gz', data, Content(id=0))
+        response = self.upload('a.gz', data)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIsNone(Blob.objects.get(hex=response.data['hex']).compression)
+        with Document.objects.get(id=response.data['id']).open_file() as f:
+            self.assertEqual(f.read(), data)
+
+    @override_settings(STORE_COMPRESSION={'MARKDOWN': 'lzma'})
+    def test_ingest_and_rehash_compressed(self):
+        """目录导入同样压缩，迁移哈希算法时按解压后的内容计算"""
+        data = b'# guide\n' * 1000
+        source = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, source, ignore_errors=True)
+        source.joinpath('a.md').write_bytes(data)
+        call_command(
+            'ingest_documents', self.collection.id, str(source), workers=1, stdout=StringIO()
+        )
+
+        document = Document.objects.get()
+        blob = Blob.objects.get()
+        self.assertEqual((blob.hex, blob.compression), (hashlib.md5(data).hexdigest(), 'lzma'))
+        self.assertEqual(
+            lzma.decompress(self.store_path.joinpath(document.path).read_bytes()), data
+        )
+
+        with override_settings(STORE_HASH_ALGORITHM='sha256'):
+            call_command('rehash_store', stdout=StringIO())
+        blob = Blob.objects.get()
+        self.assertEqual((blob.hex, blob.compression), (hashlib.sha256(data).hexdigest(), 'lzma'))
+        with Document.objects.get().open_file() as f:
+            self.assertEqual(f.read(), data)
+
+    @override_settings(STORE_BACKEND='content.utils.storage.MemoryStorage')
+    def test_memory_storage_backend(self):
+        """上传和目录导入通过配置的存储后端保存，存储统计返回各操作耗时"""
+        response = self.upload('a.txt', b'in memory')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertFalse(self.store_path.joinpath(response.data['path']).exists())
+        document = Document.objects.get(id=response.data['id'])
+        with document.map_file() as buffer:
+            self.assertEqual(buffer, b'in memory')
+
+        source = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, source, ignore_errors=True)
+        source.joinpath('b.md').write_bytes(b'# memory')
+        call_command('ingest_documents', self.collection.id, str(source), stdout=StringIO())
+        with Document.objects.get(name='b.md').open_file() as f:
+            self.assertEqual(f.read(), b'# memory')
+
+        stats = self.client.get('/api/documents/storage-stats/').data
+        self.assertEqual(stats['backend'], 'MemoryStorage')
+        self.assertEqual(stats['latency']['put']['count'], 2)
+
+    def download(self, document_id, **headers):
+        response = self.client.get(f'/api/documents/{document_id}/download/', **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_download(self):
+        """下载返回完整内容和缓存校验头，条件请求命中时返回304"""
+        data = bytes(range(256)) * 40
+        document_id = self.upload('a.bin', data).data['id']
+        response, body = self.download(document_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, data)
+        self.assertEqual(response['Content-Length'], str(len(data)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('a.bin', response['Content-Disposition'])
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{hashlib.md5(data).hexdigest()}"')
+
+        not_modified, body = self.download(document_id, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(body, b'')
+        self.assertEqual(not_modified['ETag'], etag)
+        not_modified, _ = self.download(
+            document_id, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        failed, _ = self.download(document_id, HTTP_IF_MATCH='"other"')
+        self.assertEqual(failed.status_code, 412)
+
+    def test_download_range(self):
+        """单段Range返回206和对应片段，范围无效时返回416，If-Range不一致时返回完整内容"""
+        data = b'0123456789' * 100
+        document_id = self.upload('a.txt', data).data['id']
+        size = len(data)
+        for header, start, end in (
+            ('bytes=10-19', 10, 20),
+            ('bytes=990-', 990, size),
+            ('bytes=-5', size - 5, size),
+            ('bytes=995-2000', 995, size),
+        ):
+            with self.subTest(header=header):
+                response, body = self.download(document_id, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, data[start:end])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end - 1}/{size}')
+                self.assertEqual(response['Content-Length'], str(end - start))
+
+        response, _ = self.download(document_id, HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{size}')
+        for headers in (
+            {'HTTP_RANGE': 'bytes=0-1,5-6'},
+            {'HTTP_RANGE': 'bytes=0-9', 'HTTP_IF_RANGE': '"stale"'},
+        ):
+            response, body = self.download(document_id, **headers)
+            self.assertEqual((response.status_code, body), (200, data))
+        etag = response['ETag']
+        response, body = self.download(document_id, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual((response.status_code, body), (206, data[:10]))
+
+    @override_settings(STORE_COMPRESSION={'TEXT': 'gzip'})
+    def test_download_compressed_range(self):
+        """压缩存储的文档按解压后的内容计算范围，流式解压，不写临时文件"""
+        data = b'compressed line\n' * 1000
+        document_id = self.upload('a.txt', data).data['id']
+        with patch('content.utils.storage.tempfile.TemporaryFile') as temporary_file:
+            response, body = self.download(document_id, HTTP_RANGE='bytes=100-199')
+            full_response, full_body = self.download(document_id)
+        temporary_file.assert_not_called()
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(body, data[100:200])
+        self.assertEqual(full_response['Content-Length'], str(len(data)))
+        self.assertEqual(full_body, data)
+
+        response, body = self.download(document_id, HTTP_RANGE='bytes=-10')
+        self.assertEqual((response.status_code, body), (206, data[-10:]))
+
+    def test_bench_hash(self):
+        out = StringIO()
+        call_command('bench_hash', size='1MB', algorithms='md5,blake2b', stdout=out)
+        self.assertEqual(
+            [line.split()[0] for line in out.getvalue().splitlines()[1:]], ['md5', 'blake2b']
+        )
@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.test import TestCase
+
+from content.models import (
+    Category,
+    Content,
+    Level1Category,
+    MyAttrDefinitionModel,
+    MyModelDefinitionModel,
+)
+
+
+class ExtQuerySetTestSuite(TestCase):
+    """扩展模型查询集测试套件"""
+
+    def setUp(self):
+        self.definition = MyModelDefinitionModel.objects.create(name='定义', code='def')
+        MyAttrDefinitionModel.objects.create(
+            attr_name='author', attr_id='attr1', attr_label='作者', model=self.definition
+        )
+        MyAttrDefinitionModel.objects.create(
+            attr_name='pages', attr_id='attr25', attr_label='页数', model=self.definition
+        )
+        level1 = Level1Category.objects.create(code='l1', name='一级', description='')
+        self.category = Category.objects.create(
+            code='c1', name='分类', description='', level1=level1, definition=self.definition
+        )
+        for i, author in enumerate(['张三', '李四', '王五']):
+            Content.objects.create(
+                code=f'code{i}', title=f'标题{i}', category=self.category, attr1=author, attr25=i
+            )
+
+    def get_queryset(self):
+        return Content.objects.filter(category=self.category).with_definition(self.definition.id)
+
+    def test_filter_and_exclude(self):
+        """filter/exclude/Q中的属性名称被转换为扩展字段"""
+        queryset = self.get_queryset()
+        self.assertEqual(queryset.filter(author='张三').get().code, 'code0')
+        self.assertEqual(queryset.exclude(author__in=['张三', '李四']).get().code, 'code2')
+        self.assertEqual(queryset.filter(Q(author='李四') | Q(pages=2)).count(), 2)
+        self.assertIn('"attr1"', str(queryset.filter(author='张三').query))
+
+    def test_order_by_values_and_only(self):
+        """order_by/values/values_list/only支持属性名称"""
+        queryset = self.get_queryset()
+        codes = list(queryset.order_by('-pages').values_list('code', flat=True))
+        self.assertEqual(codes, ['code2', 'code1', 'code0'])
+        row = queryset.filter(code='code1').values('code', 'author').get()
+        self.assertEqual(row, {'code': 'code1', 'author': '李四'})
+        content = queryset.only('author').get(code='code0')
+        self.assertNotIn('attr1', content.get_deferred_fields())
+        self.assertIn('title', content.get_deferred_fields())
+
+    def test_update_translates_names(self):
+        """update中的属性名称被转换为扩展字段"""
+        self.get_queryset().filter(author='王五').update(author='赵六')
+        self.assertTrue(Content.objects.filter(attr1='赵六').exists())
+
+    def test_without_definition_is_untouched(self):
+        """未调用with_definition时不做转换"""
+        self.assertEqual(Content.objects.filter(attr1='张三').count(), 1)
+
+    def test_bulk_create_with_attr_names(self):
+        """批量创建按批次执行，属性名称被映射且填充审计用户"""
+        user = User.objects.create_user(username='importer', password='testpassword')
+        rows = [
+            {'code': f'bulk{i}', 'title': f'批量{i}', 'category': self.category, 'author': '导入'}
+            for i in range(5)
+        ]
+        queryset = self.get_queryset()
+        with self.assertNumQueries(3):
+            created = queryset.bulk_create(rows, batch_size=2, user=user)
+        self.assertTrue(all(content.pk for content in created))
+        imported = Content.objects.filter(code__startswith='bulk')
+        self.assertEqual(
+            imported.filter(attr1='导入', create_user=user, update_user=user).count(), 5
+        )
+
+    def test_bulk_update_with_attr_names(self):
+        """批量更新支持属性名称字段"""
+        user = User.objects.create_user(username='editor', password='testpassword')
+        contents = list(self.get_queryset())
+        for content in contents:
+            content.author = '更新'
+        with self.assertNumQueries(1):
+            self.get_queryset().bulk_update(contents, ['author'], user=user)
+        self.assertEqual(Content.objects.filter(attr1='更新', update_user=user).count(), 3)
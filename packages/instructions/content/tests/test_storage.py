@@ -0,0 +1,75 @@
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase, override_settings
+
+from content.utils import LocalStorage, MemoryStorage, get_blob_path, get_storage
+
+
+class StorageTestSuite(SimpleTestCase):
+    """文件块存储后端测试套件"""
+
+    def setUp(self):
+        self.store_path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.store_path, ignore_errors=True)
+
+    def get_backends(self):
+        return [LocalStorage(self.store_path), MemoryStorage()]
+
+    def test_put_and_read(self):
+        """各后端的写入、流式读取、mmap读取、统计和删除行为一致"""
+        data = b'storage\n' * 100
+        for storage in self.get_backends():
+            with self.subTest(backend=type(storage).__name__):
+                self.assertFalse(storage.exists('abcdef'))
+                self.assertEqual(storage.put('abcdef', [data[:10], data[10:]]), len(data))
+                self.assertIsNone(storage.put('abcdef', [b'other']))
+                self.assertTrue(storage.exists('abcdef'))
+                self.assertEqual(storage.stat('abcdef').size, len(data))
+                with storage.open('abcdef') as f:
+                    self.assertEqual(f.read(), data)
+                with storage.mmap('abcdef') as buffer:
+                    self.assertEqual(buffer[:], data)
+
+                self.assertTrue(storage.delete('abcdef'))
+                self.assertFalse(storage.delete('abcdef'))
+                with self.assertRaises(FileNotFoundError):
+                    storage.open('abcdef')
+                self.assertEqual(
+                    set(storage.latency_stats()),
+                    {'put', 'exists', 'stat', 'open', 'mmap', 'delete'},
+                )
+                self.assertEqual(storage.latency_stats()['put']['count'], 2)
+
+    def test_compressed_blob(self):
+        """按压缩方式保存，open和mmap读取到解压后的内容"""
+        data = b'compressed\n' * 1000
+        for storage in self.get_backends():
+            with self.subTest(backend=type(storage).__name__):
+                stored_size = storage.put('abcdef', [data], 'gzip')
+                self.assertEqual(storage.stat('abcdef').size, stored_size)
+                self.assertLess(stored_size, len(data))
+                with storage.open('abcdef', 'gzip') as f:
+                    self.assertEqual(f.read(), data)
+                with storage.mmap('abcdef', 'gzip') as buffer:
+                    self.assertEqual(buffer[:], data)
+                with storage.open('abcdef') as f:
+                    self.assertEqual(gzip.decompress(f.read()), data)
+
+    def test_local_layout_and_empty_file(self):
+        storage = LocalStorage(self.store_path)
+        storage.put('abcdef', [])
+        self.assertTrue(self.store_path.joinpath(get_blob_path('abcdef')).is_file())
+        with storage.mmap('abcdef') as buffer:
+            self.assertEqual(len(buffer), 0)
+
+    def test_backend_from_settings(self):
+        with override_settings(STORE_PATH=self.store_path):
+            storage = get_storage()
+            self.assertIsInstance(storage, LocalStorage)
+            self.assertEqual(storage.root, self.store_path)
+            self.assertIs(get_storage(), storage)
+        with override_settings(STORE_BACKEND='content.utils.storage.MemoryStorage'):
+            self.assertIsInstance(get_storage(), MemoryStorage)
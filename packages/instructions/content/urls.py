@@ -1,7 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter, DynamicRoute, Route, SimpleRouter
 
-from .views import CategoryViewSet, ContentViewSet, DocumentViewSet
+from .views import CategoryViewSet, ContentViewSet, ConversionJobViewSet, DocumentViewSet
 
 
 # 为ContentViewSet创建自定义路由器
@@ -15,6 +15,13 @@ class CustomRouter(SimpleRouter):
             detail=False,
             initkwargs={'suffix': 'List'},
         ),
+        # 动态路由，需放在详情路由之前，否则会被当作pk匹配
+        DynamicRoute(
+            url=r'^{prefix}/contents/{url_path}/$',
+            name='{basename}-{url_name}',
+            detail=False,
+            initkwargs={},
+        ),
         # 详情路由
         Route(
             url=r'^{prefix}/contents/(?P<pk>[^/.]+)/$',
@@ -28,13 +35,6 @@ class CustomRouter(SimpleRouter):
             detail=True,
             initkwargs={'suffix': 'Instance'},
         ),
-        # 动态路由
-        DynamicRoute(
-            url=r'^{prefix}/contents/(?P<url_path>[^/]+)/$',
-            name='{basename}-{url_name}',
-            detail=False,
-            initkwargs={},
-        ),
     ]
 
 
@@ -42,6 +42,7 @@ class CustomRouter(SimpleRouter):
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'documents', DocumentViewSet, basename='document')
+router.register(r'conversion-jobs', ConversionJobViewSet, basename='conversion-job')
 
 # 创建自定义路由器并注册ContentViewSet
 content_router = CustomRouter()
@@ -60,3 +61,8 @@ urlpatterns = [
 # 还包括自定义操作，如：
 # - 按一级分类获取分类：/api/categories/by_level1/?level1_id=id
 # - 按状态获取内容：/api/{category_id}/contents/by_state/?state=状态值
+# - 导出内容(NDJSON)：/api/{category_id}/contents/export/
+# - 批量调整文档顺序：/api/documents/reorder/
+# - 提交文档转换：/api/documents/{id}/convert/，返回202及任务ID
+# - 查询转换任务：/api/conversion-jobs/{id}/
+# - 转换结果缓存命中率：/api/conversion-jobs/cache-stats/
@@ -1 +1,32 @@
-from .file import convert_file, get_file_md5, store_file
+from .compression import CODECS, get_compression, open_blob
+from .converters import (
+    CONVERTERS,
+    BaseConverter,
+    ConversionStats,
+    get_converter,
+    guess_content_type,
+    map_file,
+    register_converter,
+)
+from .file import (
+    HASH_ALGORITHMS,
+    convert_buffer,
+    convert_file,
+    get_blob_path,
+    get_converter_key,
+    get_file_md5,
+    get_hash_algorithm,
+    hash_chunks,
+    iter_file_chunks,
+    write_blob,
+)
+from .storage import (
+    BaseStorage,
+    BlobStat,
+    LocalStorage,
+    MemoryStorage,
+    StoredBlob,
+    blob_exists,
+    get_storage,
+    store_blob,
+)
@@ -0,0 +1,126 @@
+"""文件块压缩
+
+按内容类型选择压缩方式（settings.STORE_COMPRESSION），文件块的哈希始终按原始内容计算，
+压缩方式和压缩后大小记录在Blob上，读取时通过open_blob透明解压。
+"""
+
+import gzip
+import io
+import lzma
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class ClosingReader(io.RawIOBase):
+    """解压流的包装，关闭时同时关闭底层文件"""
+
+    def __init__(self, stream, f):
+        super().__init__()
+        self.stream = stream
+        self.f = f
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self.stream.readinto(b)
+
+    def close(self):
+        if not self.closed:
+            try:
+                self.stream.close()
+            finally:
+                self.f.close()
+        super().close()
+
+
+class Codec:
+    name = None
+    # 压缩格式的文件头
+    magic = b''
+
+    def writer(self, f):
+        """返回写入f的压缩流，关闭压缩流不会关闭f"""
+        raise NotImplementedError('must implement writer')
+
+    def reader(self, f):
+        """返回从f读取的解压流，关闭解压流不会关闭f"""
+        raise NotImplementedError('must implement reader')
+
+    def open(self, f):
+        """解压已打开的文件，返回的文件对象关闭时同时关闭f"""
+        return io.BufferedReader(ClosingReader(self.reader(f), f))
+
+
+class GzipCodec(Codec):
+    name = 'gzip'
+    magic = b'\x1f\x8b'
+
+    def writer(self, f):
+        # 固定mtime，相同内容压缩结果一致
+        return gzip.GzipFile(fileobj=f, mode='wb', compresslevel=6, mtime=0)
+
+    def reader(self, f):
+        return gzip.GzipFile(fileobj=f, mode='rb')
+
+
+class LzmaCodec(Codec):
+    name = 'lzma'
+    magic = b'\xfd7zXZ\x00'
+
+    def writer(self, f):
+        return lzma.LZMAFile(f, 'wb')
+
+    def reader(self, f):
+        return lzma.LZMAFile(f, 'rb')
+
+
+class ZstdCodec(Codec):
+    """需要安装zstandard"""
+
+    name = 'zstd'
+    magic = b'\x28\xb5\x2f\xfd'
+
+    def writer(self, f):
+        return zstandard.ZstdCompressor(level=3).stream_writer(f, closefd=False)
+
+    def reader(self, f):
+        return zstandard.ZstdDecompressor().stream_reader(f, closefd=False)
+
+
+CODECS = {codec.name: codec for codec in (GzipCodec(), LzmaCodec())}
+if zstandard is not None:
+    CODECS[ZstdCodec.name] = ZstdCodec()
+
+
+def get_codec(name: str | None) -> Codec | None:
+    if not name:
+        return None
+    if name not in CODECS:
+        raise ImproperlyConfigured(f'不支持的压缩方式：{name}')
+    return CODECS[name]
+
+
+def guess_codecs(header: bytes) -> list[Codec]:
+    """文件头与之一致的压缩方式，原始内容也可能恰好以相同的字节开头，需解压后校验"""
+    return [codec for codec in CODECS.values() if header.startswith(codec.magic)]
+
+
+def get_compression(content_type: str | None) -> str | None:
+    """内容类型对应的压缩方式，未配置时不压缩"""
+    name = getattr(settings, 'STORE_COMPRESSION', {}).get(content_type or 'TEXT')
+    get_codec(name)
+    return name or None
+
+
+def open_blob(path, compression: str | None = None):
+    """打开本地文件块，返回解压后的只读文件对象"""
+    codec = get_codec(compression)
+    f = open(path, 'rb')
+    return codec.open(f) if codec else f
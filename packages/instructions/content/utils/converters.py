@@ -0,0 +1,265 @@
+"""文档转换器
+
+每种内容类型对应一个转换器，输入为mmap等只读缓冲区，按固定大小分块读取，
+峰值内存与文件大小无关（结果文本除外）。
+转换器的version在输出格式变化时递增，使缓存的转换结果失效。
+"""
+
+import codecs
+import csv
+import io
+import json
+import mmap
+import os
+import re
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import NamedTuple
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+CONVERTERS = {}
+
+
+class ConversionStats(NamedTuple):
+    size: int
+    elapsed: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.size / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def register_converter(cls):
+    """注册转换器，按内容类型编码查找"""
+    CONVERTERS[cls.code] = cls()
+    return cls
+
+
+def get_converter(content_type: str | None) -> 'BaseConverter':
+    """内容类型对应的转换器，未知类型按文本处理"""
+    return CONVERTERS.get(content_type or 'TEXT', CONVERTERS['TEXT'])
+
+
+def guess_content_type(filename: str) -> str:
+    suffix = os.path.splitext(filename)[1].lower()
+    return CONTENT_TYPE_SUFFIXES.get(suffix, 'TEXT')
+
+
+@contextmanager
+def map_file(f):
+    """只读映射已打开的文件，空文件无法映射，返回空bytes"""
+    if os.fstat(f.fileno()).st_size == 0:
+        yield b''
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield mm
+
+
+class BufferReader(io.RawIOBase):
+    """按文件方式读取只读缓冲区中 [start, end) 的部分，每次只复制请求的数据"""
+
+    def __init__(self, buffer, start=0, end=None):
+        super().__init__()
+        self.view = memoryview(buffer)[start:end]
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: len(self.view)}[whence]
+        if base + offset < 0:
+            raise ValueError(f'negative seek position {base + offset}')
+        self.pos = base + offset
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self.view) - self.pos))
+        b[:n] = self.view[self.pos : self.pos + n]
+        self.pos += n
+        return n
+
+    def close(self):
+        # mmap在仍有导出的缓冲区时无法关闭
+        self.view.release()
+        super().close()
+
+
+def open_text(buffer, newline=None) -> io.TextIOWrapper:
+    reader = io.BufferedReader(BufferReader(buffer), CHUNK_SIZE)
+    return io.TextIOWrapper(reader, encoding='utf-8-sig', errors='replace', newline=newline)
+
+
+class BaseConverter:
+    """转换器基类，iter_convert逐段产出缓冲区转换后的文本"""
+
+    code = None
+    version = '1'
+
+    def __init__(self):
+        self.total_bytes = 0
+        self.total_elapsed = 0.0
+
+    def iter_convert(self, buffer) -> Iterator[str]:
+        raise NotImplementedError('must implement iter_convert')
+
+    def convert(self, file_path: str) -> tuple[str, ConversionStats]:
+        """映射并转换整个文件，返回 (文本, 统计)"""
+        with open(file_path, 'rb') as f, map_file(f) as buffer:
+            return self.convert_buffer(buffer)
+
+    def convert_buffer(self, buffer) -> tuple[str, ConversionStats]:
+        """转换mmap、bytes等只读缓冲区，返回 (文本, 统计)"""
+        started = time.perf_counter()
+        content = ''.join(self.iter_convert(buffer))
+        stats = ConversionStats(len(buffer), time.perf_counter() - started)
+        self.record(stats)
+        return content, stats
+
+    def record(self, stats: ConversionStats):
+        self.total_bytes += stats.size
+        self.total_elapsed += stats.elapsed
+
+    def stats(self) -> ConversionStats:
+        """当前进程内的累计统计"""
+        return ConversionStats(self.total_bytes, self.total_elapsed)
+
+
+@register_converter
+class TextConverter(BaseConverter):
+    """纯文本，按固定大小分块读取缓冲区，增量解码避免多字节字符被分块截断"""
+
+    code = 'TEXT'
+
+    def iter_convert(self, buffer):
+        decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+        for offset in range(0, len(buffer), CHUNK_SIZE):
+            text = decoder.decode(buffer[offset : offset + CHUNK_SIZE])
+            if text:
+                yield text
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+@register_converter
+class MarkdownConverter(TextConverter):
+    """Markdown原样保留"""
+
+    code = 'MARKDOWN'
+
+
+@register_converter
+class CsvConverter(BaseConverter):
+    """CSV逐行读取，转换为Markdown表格，首行作为表头"""
+
+    code = 'CSV'
+
+    @staticmethod
+    def format_row(row):
+        cells = (cell.replace('|', '\\|').replace('\r', ' ').replace('\n', ' ') for cell in row)
+        return '| ' + ' | '.join(cells) + ' |\n'
+
+    def iter_convert(self, buffer):
+        with open_text(buffer, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            yield self.format_row(header)
+            yield '|' + ' --- |' * len(header) + '\n'
+            for row in reader:
+                yield self.format_row(row)
+
+
+@register_converter
+class JsonConverter(BaseConverter):
+    """
+    JSON顶层为数组时逐个元素增量解析，每个元素输出为一行（NDJSON）
+    其他JSON值整体解析后格式化输出
+    """
+
+    code = 'JSON'
+
+    def __init__(self):
+        super().__init__()
+        self.decoder = json.JSONDecoder()
+        # json.dumps传入非默认参数时每次调用都会新建编码器
+        self.encoder = json.JSONEncoder(ensure_ascii=False)
+
+    def iter_convert(self, data):
+        with open_text(data) as f:
+            buffer = f.read(CHUNK_SIZE)
+            pos = skip_whitespace(buffer, 0)
+            while pos == len(buffer):
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                buffer, pos = chunk, skip_whitespace(chunk, 0)
+            if buffer[pos] != '[':
+                value = json.loads(buffer[pos:] + f.read())
+                yield json.dumps(value, ensure_ascii=False, indent=2) + '\n'
+                return
+            yield from self.iter_array(f, buffer, pos + 1)
+
+    def iter_array(self, f, buffer, pos):
+        eof = False
+        expect_value = True
+        while True:
+            pos = skip_whitespace(buffer, pos)
+            if pos < len(buffer):
+                if buffer[pos] == ']':
+                    return
+                if not expect_value:
+                    if buffer[pos] != ',':
+                        raise json.JSONDecodeError('数组元素之间缺少逗号', buffer, pos)
+                    pos += 1
+                    expect_value = True
+                    continue
+                decoded = self.decode_value(buffer, pos, eof)
+                if decoded is not None:
+                    value, pos = decoded
+                    yield self.encoder.encode(value) + '\n'
+                    expect_value = False
+                    continue
+            if eof:
+                raise json.JSONDecodeError('数组未结束', buffer, pos)
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+    def decode_value(self, buffer, pos, eof):
+        """解析一个元素，数据不完整时返回None以便读取更多数据"""
+        try:
+            value, end = self.decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            return None
+        # 数字等值可能在缓冲区末尾被截断，需要读取更多数据确认
+        if end == len(buffer) and not eof:
+            return None
+        return value, end
+
+
+def skip_whitespace(text: str, pos: int) -> int:
+    return WHITESPACE.match(text, pos).end()
+
+
+CONTENT_TYPE_SUFFIXES = {
+    '.txt': TextConverter.code,
+    '.md': MarkdownConverter.code,
+    '.markdown': MarkdownConverter.code,
+    '.csv': CsvConverter.code,
+    '.json': JsonConverter.code,
+}
@@ -1,7 +1,23 @@
+import functools
 import hashlib
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .compression import get_codec
+from .converters import ConversionStats, get_converter
+
+# 存储目录下存放未完成写入文件的临时目录，与目标位置位于同一文件系统，保证重命名是原子的
+TMP_DIR_NAME = '.tmp'
+# 按哈希前缀分片的目录层数，每层取两个字符，如 ab/cd/<hash>
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+# 读取本地文件时的分块大小
+CHUNK_SIZE = 1 << 20
 
 
 def get_file_md5(chunk):
@@ -13,14 +29,90 @@ def get_file_md5(chunk):
     return md5_hash.hexdigest()
 
 
-def store_file(filename, hexcode, chunk):
-    root_path = Path(settings.STORE_PATH)
-    file_path = root_path.joinpath(hexcode).joinpath(filename)
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, 'wb') as f:
-        f.write(chunk)
-    return file_path.absolute().replace(root_path.absolute(), ''), hexcode
+# 可用于内容寻址的哈希算法，blake2b截取32字节摘要
+# 各算法的相对速度取决于CPU（支持SHA指令集时sha256通常最快），可用bench_hash命令实测后选择
+HASH_ALGORITHMS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'blake2b': functools.partial(hashlib.blake2b, digest_size=32),
+    'blake2s': hashlib.blake2s,
+}
+
+
+def get_hash_algorithm() -> str:
+    """当前用于新文件的哈希算法，由settings.STORE_HASH_ALGORITHM配置"""
+    algorithm = getattr(settings, 'STORE_HASH_ALGORITHM', 'md5')
+    if algorithm not in HASH_ALGORITHMS:
+        raise ImproperlyConfigured(f'不支持的哈希算法：{algorithm}')
+    return algorithm
+
+
+def hash_chunks(chunks: Iterable[bytes], algorithm: str | None = None) -> tuple[str, int]:
+    """逐块计算哈希，返回 (十六进制摘要, 文件大小)，algorithm为空时使用当前配置的算法"""
+    hasher = HASH_ALGORITHMS[algorithm or get_hash_algorithm()]()
+    size = 0
+    for chunk in chunks:
+        hasher.update(chunk)
+        size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+def get_blob_path(hexcode: str) -> str:
+    """哈希对应的分片相对路径"""
+    shards = [hexcode[i * SHARD_WIDTH : (i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+    return '/'.join([*shards, hexcode])
+
+
+def iter_file_chunks(file_path, chunk_size=CHUNK_SIZE) -> Iterator[bytes]:
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def write_blob(
+    hexcode: str, chunks: Iterable[bytes], root_path=None, compression: str | None = None
+) -> int | None:
+    """
+    将内容写入哈希对应的分片路径，文件已存在时不写入
+    先写入临时文件再原子重命名，compression不为空时边写边压缩
+    返回写入磁盘的字节数，文件已存在时返回None
+    """
+    codec = get_codec(compression)
+    root_path = Path(root_path or settings.STORE_PATH)
+    file_path = root_path.joinpath(get_blob_path(hexcode))
+    if file_path.is_file():
+        return None
+    tmp_dir = root_path.joinpath(TMP_DIR_NAME)
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            writer = codec.writer(f) if codec else f
+            for chunk in chunks:
+                writer.write(chunk)
+            if codec:
+                writer.close()
+            stored_size = f.tell()
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return stored_size
+
+
+def get_converter_key(content_type: str | None) -> tuple[str, str]:
+    """文档内容类型对应的 (转换器编码, 转换器版本)，用作转换结果缓存的键"""
+    converter = get_converter(content_type)
+    return converter.code, converter.version
+
+
+def convert_file(file_path, content_type=None) -> tuple[str, ConversionStats]:
+    """按内容类型选择转换器转换文件，返回 (文本, 统计)"""
+    return get_converter(content_type).convert(file_path)
 
 
-def convert_file(file_path):
-    pass
+def convert_buffer(buffer, content_type=None) -> tuple[str, ConversionStats]:
+    """按内容类型选择转换器转换mmap等只读缓冲区，返回 (文本, 统计)"""
+    return get_converter(content_type).convert_buffer(buffer)
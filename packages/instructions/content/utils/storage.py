@@ -0,0 +1,391 @@
+"""文件块存储后端
+
+文件块按哈希寻址，后端负责实际的保存位置。由settings.STORE_BACKEND选择：
+LocalStorage按哈希前缀分片保存在STORE_PATH下，MemoryStorage保存在进程内存中，用于测试。
+每个后端按操作记录调用次数和耗时，可通过latency_stats查看。
+"""
+
+import functools
+import io
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Callable, Iterable
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .compression import get_codec, guess_codecs
+from .converters import BufferReader, map_file
+from .file import CHUNK_SIZE, get_blob_path, hash_chunks, write_blob
+
+DEFAULT_BACKEND = 'content.utils.storage.LocalStorage'
+
+
+class BlobStat(NamedTuple):
+    # 存储占用的字节数，压缩存储时为压缩后大小
+    size: int
+    mtime: float
+
+
+class LatencyStats:
+    """单个操作的调用次数和耗时"""
+
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'avg_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000,
+            'total_ms': self.total * 1000,
+        }
+
+
+class MappedReader(BufferReader):
+    """BufferReader关闭时一并释放mmap映射"""
+
+    def __init__(self, buffer, start, end, stack: ExitStack):
+        super().__init__(buffer, start, end)
+        self.stack = stack
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.stack.close()
+
+
+class RangeStream(io.RawIOBase):
+    """
+    顺序读取解压流中 [start, end) 的部分，打开时读取并丢弃start之前的内容
+    关闭时一并关闭解压流
+    """
+
+    def __init__(self, f, start=0, end=None):
+        super().__init__()
+        self.f = f
+        self.remaining = None if end is None else max(0, end - start)
+        while start > 0:
+            skipped = len(f.read(min(start, CHUNK_SIZE)))
+            if not skipped:
+                break
+            start -= skipped
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        view = memoryview(b)
+        if self.remaining is not None:
+            view = view[: self.remaining]
+        n = self.f.readinto(view) if len(view) else 0
+        if self.remaining is not None:
+            self.remaining -= n
+        return n
+
+    def close(self):
+        if not self.closed:
+            try:
+                self.f.close()
+            finally:
+                super().close()
+
+
+class BaseStorage:
+    """
+    存储后端基类，子类实现 _put/_open/_mmap/_exists/_delete/_stat
+    键为文件块的哈希，读写的都是存储中的原始字节，open和mmap传入compression时透明解压
+    """
+
+    # 子进程写入的数据主进程能否看到，为False时导入命令在主进程中写入文件块
+    # 传给子进程的后端实例是序列化后的副本，只读操作不受影响
+    multiprocess = True
+
+    def __init__(self):
+        self.latency = {}
+
+    @contextmanager
+    def timer(self, operation: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.latency.get(operation)
+            if stats is None:
+                stats = self.latency[operation] = LatencyStats()
+            stats.record(time.perf_counter() - started)
+
+    def latency_stats(self) -> dict:
+        return {operation: stats.as_dict() for operation, stats in sorted(self.latency.items())}
+
+    def put(self, key: str, chunks: Iterable[bytes], compression: str | None = None) -> int | None:
+        """保存文件块，返回存储占用的字节数，已存在时不写入并返回None"""
+        with self.timer('put'):
+            return self._put(key, chunks, compression)
+
+    def open(self, key: str, compression: str | None = None):
+        """以流的方式读取，返回解压后的只读文件对象"""
+        codec = get_codec(compression)
+        with self.timer('open'):
+            f = self._open(key)
+        return codec.open(f) if codec else f
+
+    @contextmanager
+    def mmap(self, key: str, compression: str | None = None):
+        """
+        返回只读缓冲区（mmap或bytes），未压缩时不复制文件内容
+        压缩存储的文件先流式解压到临时文件再映射
+        """
+        codec = get_codec(compression)
+        with ExitStack() as stack:
+            with self.timer('mmap'):
+                if codec is None:
+                    buffer = stack.enter_context(self._mmap(key))
+                else:
+                    tmp = stack.enter_context(tempfile.TemporaryFile())
+                    with codec.open(self._open(key)) as f:
+                        shutil.copyfileobj(f, tmp)
+                    tmp.flush()
+                    buffer = stack.enter_context(map_file(tmp))
+            yield buffer
+
+    def open_range(self, key: str, compression: str | None = None, start=0, end=None):
+        """
+        读取解压后内容中 [start, end) 的部分，返回只读文件对象，关闭时释放映射或解压流
+        未压缩时通过mmap读取，不复制整个文件；压缩存储的文件无法随机访问，
+        流式解压并跳过start之前的内容，不解压到临时文件
+        """
+        if get_codec(compression) is not None:
+            f = self.open(key, compression)
+            try:
+                return RangeStream(f, start, end)
+            except BaseException:
+                f.close()
+                raise
+        stack = ExitStack()
+        try:
+            buffer = stack.enter_context(self.mmap(key))
+            return MappedReader(buffer, start, end, stack)
+        except BaseException:
+            stack.close()
+            raise
+
+    @contextmanager
+    def local_path(self, key: str, compression: str | None = None):
+        """返回解压后内容的本地文件路径，供按路径读取的插件使用；默认复制到临时文件"""
+        with tempfile.NamedTemporaryFile() as tmp:
+            with self.open(key, compression) as f:
+                shutil.copyfileobj(f, tmp)
+            tmp.flush()
+            yield tmp.name
+
+    def detect_compression(self, key: str, algorithm: str | None = None) -> str | None:
+        """
+        识别已存在的文件块的压缩方式，用于没有Blob记录的文件块（如上传事务回滚后遗留的文件）
+        文件头符合某种压缩格式且解压后内容的哈希与key一致时认定为该压缩方式，否则为未压缩
+        """
+        with self.open(key) as f:
+            header = f.read(16)
+        for codec in guess_codecs(header):
+            try:
+                with self.open(key, codec.name) as f:
+                    hexcode, _ = hash_chunks(
+                        iter(functools.partial(f.read, CHUNK_SIZE), b''), algorithm
+                    )
+            except Exception:
+                # 格式不符或内容损坏
+                continue
+            if hexcode == key:
+                return codec.name
+        return None
+
+    def exists(self, key: str) -> bool:
+        with self.timer('exists'):
+            return self._exists(key)
+
+    def delete(self, key: str) -> bool:
+        """删除文件块，返回是否存在"""
+        with self.timer('delete'):
+            return self._delete(key)
+
+    def stat(self, key: str) -> BlobStat:
+        with self.timer('stat'):
+            return self._stat(key)
+
+    def _put(self, key, chunks, compression):
+        raise NotImplementedError('must implement _put')
+
+    def _open(self, key):
+        raise NotImplementedError('must implement _open')
+
+    def _mmap(self, key):
+        raise NotImplementedError('must implement _mmap')
+
+    def _exists(self, key):
+        raise NotImplementedError('must implement _exists')
+
+    def _delete(self, key):
+        raise NotImplementedError('must implement _delete')
+
+    def _stat(self, key):
+        raise NotImplementedError('must implement _stat')
+
+
+class LocalStorage(BaseStorage):
+    """本地文件系统，按哈希前缀分片保存在root（默认STORE_PATH）下"""
+
+    def __init__(self, root=None):
+        super().__init__()
+        self.root = Path(root or settings.STORE_PATH)
+
+    def path(self, key: str) -> Path:
+        return self.root.joinpath(get_blob_path(key))
+
+    def _put(self, key, chunks, compression):
+        return write_blob(key, chunks, self.root, compression)
+
+    @contextmanager
+    def local_path(self, key, compression=None):
+        """未压缩的文件块直接返回存储中的路径"""
+        if compression is not None:
+            with super().local_path(key, compression) as path:
+                yield path
+            return
+        path = self.path(key)
+        if not path.is_file():
+            raise FileNotFoundError(path)
+        yield str(path)
+
+    def _open(self, key):
+        return open(self.path(key), 'rb')
+
+    @contextmanager
+    def _mmap(self, key):
+        with open(self.path(key), 'rb') as f, map_file(f) as buffer:
+            yield buffer
+
+    def _exists(self, key):
+        return self.path(key).is_file()
+
+    def _delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _stat(self, key):
+        st = self.path(key).stat()
+        return BlobStat(st.st_size, st.st_mtime)
+
+
+class MemoryStorage(BaseStorage):
+    """保存在进程内存中，用于测试"""
+
+    multiprocess = False
+
+    def __init__(self):
+        super().__init__()
+        # key -> (数据, 修改时间)
+        self.blobs = {}
+
+    def get(self, key: str) -> bytes:
+        try:
+            return self.blobs[key][0]
+        except KeyError:
+            raise FileNotFoundError(key) from None
+
+    def _put(self, key, chunks, compression):
+        if key in self.blobs:
+            return None
+        codec = get_codec(compression)
+        output = io.BytesIO()
+        writer = codec.writer(output) if codec else output
+        for chunk in chunks:
+            writer.write(chunk)
+        if codec:
+            writer.close()
+        data = output.getvalue()
+        self.blobs[key] = (data, time.time())
+        return len(data)
+
+    def _open(self, key):
+        return io.BytesIO(self.get(key))
+
+    @contextmanager
+    def _mmap(self, key):
+        yield self.get(key)
+
+    def _exists(self, key):
+        return key in self.blobs
+
+    def _delete(self, key):
+        return self.blobs.pop(key, None) is not None
+
+    def _stat(self, key):
+        data = self.get(key)
+        return BlobStat(len(data), self.blobs[key][1])
+
+
+@functools.cache
+def get_storage() -> BaseStorage:
+    """当前配置的存储后端，进程内共享同一实例"""
+    return import_string(getattr(settings, 'STORE_BACKEND', DEFAULT_BACKEND))()
+
+
+@receiver(setting_changed)
+def reset_storage(*, setting, **kwargs):
+    if setting in ('STORE_BACKEND', 'STORE_PATH'):
+        get_storage.cache_clear()
+
+
+class StoredBlob(NamedTuple):
+    path: str
+    hex: str
+    size: int
+    # 存储占用和压缩方式，仅在本次新写入时有值
+    stored_size: int | None
+    compression: str | None
+    created: bool
+
+
+def blob_exists(hexcode: str) -> bool:
+    return get_storage().exists(hexcode)
+
+
+def store_blob(
+    open_chunks: Callable[[], Iterable[bytes]],
+    algorithm: str | None = None,
+    compression: str | None = None,
+) -> StoredBlob:
+    """
+    按内容寻址保存文件
+    open_chunks每次调用返回一个从头开始的分块迭代器（如UploadedFile.chunks）。
+    先流式计算原始内容的哈希，文件块已存在时直接返回，不再写入；否则交给存储后端保存
+    哈希算法由get_hash_algorithm决定
+    """
+    storage = get_storage()
+    hexcode, size = hash_chunks(open_chunks(), algorithm)
+    blob_path = get_blob_path(hexcode)
+    if not storage.exists(hexcode):
+        stored_size = storage.put(hexcode, open_chunks(), compression)
+        if stored_size is not None:
+            return StoredBlob(blob_path, hexcode, size, stored_size, compression, True)
+    return StoredBlob(blob_path, hexcode, size, None, None, False)
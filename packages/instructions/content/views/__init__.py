@@ -1,3 +1,3 @@
 from .category import CategoryViewSet
 from .content import ContentViewSet
-from .document import DocumentViewSet
+from .document import ConversionJobViewSet, DocumentViewSet
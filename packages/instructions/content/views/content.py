@@ -1,11 +1,17 @@
-from ext_model.models import AttrDefinitionModel
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from ext_model.registry import attr_definition_registry
 from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import APIException
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 
-from content.models import Category, Content
-from content.serializers import ContentSerializer
+from content.filters import ContentSearchFilter, ExtAttrFilter
+from content.models import Category, Content, MyModelDefinitionModel
+from content.search import SEARCH_FIELDS
+from content.serializers import ContentSerializer, get_content_serializer_class
+from instructions.pagination import KeysetPagination
 
 
 class ModelDefinitionNotFound(APIException):
@@ -19,9 +25,28 @@ class ContentViewSet(viewsets.ModelViewSet):
 
     queryset = Content.objects.all()
     serializer_class = ContentSerializer
+    # 导出时每次从数据库读取的行数
+    export_chunk_size = 2000
+    export_fields = [
+        'id',
+        'code',
+        'title',
+        'category_id',
+        'abstract',
+        'summary',
+        'keyword',
+        'web_url',
+        'state',
+        'create_time',
+        'update_time',
+        'create_user',
+        'update_user',
+    ]
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['code', 'title', 'abstract', 'summary', 'keyword', 'document_type', 'state']
+    filter_backends = [ContentSearchFilter, filters.OrderingFilter, ExtAttrFilter]
+    ordering = ['id']
+    # 仅在数据库不支持全文检索时使用
+    search_fields = list(SEARCH_FIELDS)
 
     def initialize_request(self, request, *args, **kwargs):
         """初始化请求，检查category_id是否存在"""
@@ -30,23 +55,51 @@ class ContentViewSet(viewsets.ModelViewSet):
         return super().initialize_request(request, *args, **kwargs)
 
     def initial(self, request, *args, **kwargs):
-        try:
-            category_id = self.kwargs.get('category_id')
-            category = Category.objects.filter(id=category_id).first()
-            ext_fields = AttrDefinitionModel.objects.filter(model=category.definition_id)
-            self.kwargs.setdefault('definition_id', category.definition_id)
-            self.kwargs.setdefault('ext_fields', ext_fields)
-        except Category.DoesNotExist:
-            raise ModelDefinitionNotFound('指定的分类不存在') from None
+        category = self.get_category()
+        # 属性定义来自进程级注册表，命中时不查询数据库
+        ext_fields = attr_definition_registry.get(
+            MyModelDefinitionModel, category.definition_id
+        ).values()
+        self.kwargs.setdefault('definition_id', category.definition_id)
+        self.kwargs.setdefault('ext_fields', ext_fields)
         return super().initial(request, *args, **kwargs)
 
+    def get_category(self):
+        """获取URL中的分类，每个请求只查询一次"""
+        if not hasattr(self, '_category'):
+            try:
+                category = Category.objects.filter(id=self.kwargs.get('category_id')).first()
+            except (TypeError, ValueError):
+                category = None
+            if category is None:
+                raise ModelDefinitionNotFound('指定的分类不存在')
+            self._category = category
+        return self._category
+
+    @property
+    def paginator(self):
+        """请求带cursor参数时使用键集分页，否则使用默认的页码分页"""
+        if not hasattr(self, '_paginator'):
+            if KeysetPagination.cursor_query_param in self.request.query_params:
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+    def get_serializer_class(self):
+        """按分类定义获取已绑定扩展字段的序列化器"""
+        return get_content_serializer_class(self.kwargs.get('definition_id'))
+
     def get_queryset(self):
         """获取查询集，根据URL中的category_id过滤"""
         queryset = super().get_queryset()
         category_id = self.kwargs.get('category_id')
         if category_id:
             queryset = queryset.filter(category_id=category_id)
-        return queryset
+        # 嵌套的分类序列化器需要分类及其一级分类、定义，一次连表查询取回，避免逐行查询
+        queryset = queryset.select_related('category__level1', 'category__definition')
+        # 开启属性名称转换，过滤与排序可直接使用属性名称
+        return queryset.with_definition(self.kwargs.get('definition_id'), MyModelDefinitionModel)
 
     def list(self, request, *args, **kwargs):
         """列出内容，强制关联到指定分类"""
@@ -54,13 +107,7 @@ class ContentViewSet(viewsets.ModelViewSet):
         category_id = self.kwargs.get('category_id')
         if not category_id:
             return Response({'error': '缺少category_id参数'}, status=400)
-
-        try:
-            # 验证分类是否存在
-            Category.objects.get(id=category_id)
-        except Category.DoesNotExist:
-            return Response({'error': '指定的分类不存在'}, status=404)
-
+        # 分类是否存在已在initial中校验
         return super().list(request, *args, **kwargs)
 
     def create(self, request, *args, **kwargs):
@@ -75,3 +122,35 @@ class ContentViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         """更新内容，自动设置更新用户"""
         serializer.save(update_user=self.request.user, **self.kwargs)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request, *args, **kwargs):
+        """以NDJSON格式流式导出分类下的全部内容，扩展字段使用属性名称"""
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        # 扩展字段按字段名称查询，输出时再改为属性名称，属性名称可能与内容字段同名
+        renames = {attr.attr_id: name for name, attr in queryset.ext_definitions.items()}
+        fields = self.export_fields + list(renames)
+        rows = queryset.values(*fields).iterator(chunk_size=self.export_chunk_size)
+        response = StreamingHttpResponse(
+            self.iter_ndjson(rows, renames), content_type='application/x-ndjson; charset=utf-8'
+        )
+        category_id = self.kwargs.get('category_id')
+        response['Content-Disposition'] = f'attachment; filename="contents-{category_id}.ndjson"'
+        return response
+
+    def iter_ndjson(self, rows, renames=None):
+        """
+        逐行编码，按批次输出，避免一次性加载全部数据
+        renames为扩展字段到属性名称的映射，属性与内容字段同名时输出属性的值，与列表接口一致
+        """
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        lines = []
+        for row in rows:
+            for attr_id, name in (renames or {}).items():
+                row[name] = row.pop(attr_id)
+            lines.append(encoder.encode(row))
+            if len(lines) >= self.export_chunk_size:
+                yield ('\n'.join(lines) + '\n').encode('utf-8')
+                lines = []
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
@@ -1,14 +1,79 @@
-from django.db.models import F
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Value, When
+from django.http import FileResponse, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from rest_framework import filters, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.viewsets import GenericViewSet
 
-from content.models import Document
-from content.serializers import DocumentSerializer, DocumentUploadSerializer
-from content.utils import convert_file, get_file_md5, store_file
+from content.conversion import enqueue_conversion, get_cache_stats
+from content.models import Blob, Content, ConversionJob, Document
+from content.serializers import (
+    ConversionJobSerializer,
+    DocumentReorderSerializer,
+    DocumentSerializer,
+    DocumentUploadSerializer,
+)
+from content.utils import (
+    get_compression,
+    get_hash_algorithm,
+    get_storage,
+    guess_content_type,
+    store_blob,
+)
+
+# 只支持单段范围，如 bytes=0-99、bytes=100-、bytes=-100
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+# 下载时每次读取并发送的字节数
+DOWNLOAD_BLOCK_SIZE = 1 << 16
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(header: str, size: int) -> tuple[int, int] | None:
+    """
+    解析Range请求头，返回 [start, end)
+    多段或无法识别的范围返回None，按完整内容响应；范围超出内容大小时抛出RangeNotSatisfiable
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last) + 1, size) if last else size
+    elif last:
+        start, end = max(size - int(last), 0), size
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+    else:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def if_range_matches(request, etag: str, last_modified: int | None) -> bool:
+    """If-Range为空或与当前的ETag（强比较）、Last-Modified一致时才按Range响应"""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    return last_modified is not None and parse_http_date_safe(value) == last_modified
 
 
 class DocumentViewSet(mixins.DestroyModelMixin, mixins.ListModelMixin, GenericViewSet):
@@ -18,7 +83,7 @@ class DocumentViewSet(mixins.DestroyModelMixin, mixins.ListModelMixin, GenericVi
     serializer_class = DocumentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [filters.SearchFilter]
-    search_fields = ['code', 'name', 'type']
+    search_fields = ['name', 'hex']
 
     @action(detail=False, methods=['post'], url_name='file-upload', url_path='upload')
     def upload(self, request):
@@ -27,26 +92,174 @@ class DocumentViewSet(mixins.DestroyModelMixin, mixins.ListModelMixin, GenericVi
         serializer.is_valid(raise_exception=True)
         file = serializer.validated_data['file']
         collection = serializer.validated_data['collection']
-        file_data = request.FILES['file']
-        bin_data = file_data.read()
-        md5 = get_file_md5(bin_data)
-        file_path, filecode = store_file(file.name, md5, bin_data)
-        document = Document.objects.create(
-            size=file.size,
-            code=filecode,
-            name=file.name,
-            type=file.content_type,
-            file=file_path,
-            hexcode=md5,
-            collection_id=collection,
-            order=Document.objects.filter(collection_id=collection).count() + 1,
-        )
+        # 按分块读取上传文件并计算哈希，相同内容的文件块已存在时不再写入磁盘
+        hash_algorithm = get_hash_algorithm()
+        content_type = guess_content_type(file.name)
+        blob = store_blob(file.chunks, hash_algorithm, get_compression(content_type))
+        blob_path, hexcode, size = blob.path, blob.hex, blob.size
+        user = request.user if request.user.is_authenticated else None
+        with transaction.atomic():
+            # unique_together包含已软删除的文档，同一集合重复上传时复用原记录
+            document = (
+                Document._base_manager.select_for_update()
+                .filter(collection_id=collection, hex=hexcode)
+                .first()
+            )
+            if document is not None and not document.is_delete:
+                return Response(DocumentSerializer(document).data, status=status.HTTP_200_OK)
+            # 先锁定文件块记录再确认文件存在，gc_store不会在本事务提交前清理该文件块
+            record = Blob.objects.select_for_update().filter(hex=hexcode).first()
+            storage = get_storage()
+            compression, stored_size = blob.compression, blob.stored_size or size
+            if not storage.exists(hexcode):
+                # 去重后文件块被gc_store清理，按记录的压缩方式重新写入
+                compression = (
+                    record.compression if record is not None else get_compression(content_type)
+                )
+                stored_size = storage.put(hexcode, file.chunks(), compression) or size
+            elif record is None and not blob.created:
+                # 文件块已存在但没有记录（如上传事务回滚后遗留的文件），按实际内容识别压缩方式
+                compression = storage.detect_compression(hexcode, hash_algorithm)
+                stored_size = storage.stat(hexcode).size
+            Blob.objects.acquire(
+                hexcode,
+                size,
+                hash_algorithm=hash_algorithm,
+                compression=compression,
+                stored_size=stored_size,
+            )
+            if document is not None:
+                document.is_delete = False
+                document.delete_at = None
+                document.name = file.name
+                document.mime_type = Document.clean_mime_type(file.content_type)
+                document.content_type = content_type
+                document.path = blob_path
+                document.update_user = user
+                document.save()
+            else:
+                try:
+                    order = Content.objects.allocate_document_order(collection)
+                except Content.DoesNotExist as e:
+                    raise NotFound('集合不存在') from e
+                try:
+                    with transaction.atomic():
+                        document = Document.objects.create(
+                            size=size,
+                            name=file.name,
+                            mime_type=Document.clean_mime_type(file.content_type),
+                            path=blob_path,
+                            hex=hexcode,
+                            hash_algorithm=hash_algorithm,
+                            content_type=content_type,
+                            collection_id=collection,
+                            order=order,
+                            create_user=user,
+                        )
+                except IntegrityError:
+                    # 还没有记录时select_for_update无法加锁，并发的首次上传已创建了相同文档
+                    Blob.objects.release(hexcode)
+                    document = Document.objects.get(collection_id=collection, hex=hexcode)
+                    return Response(DocumentSerializer(document).data, status=status.HTTP_200_OK)
         return Response(DocumentSerializer(document).data, status=status.HTTP_201_CREATED)
 
-    @action(methods=['GET'], detail=True, url_path='convert')
-    def convert(self, _request, pk=None):
-        doc_obj = get_object_or_404(Document, id=pk)
-        conten = convert_file(doc_obj.file)
-        doc_obj.content = conten
-        doc_obj.save()
-        return Response(DocumentSerializer(doc_obj).data, status=status.HTTP_200_OK)
+    @action(detail=False, methods=['post'], url_path='reorder')
+    def reorder(self, request):
+        """按ids的先后顺序重排集合中的文档，单条UPDATE完成"""
+        serializer = DocumentReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        collection = serializer.validated_data['collection']
+        ids = serializer.validated_data['ids']
+        queryset = Document.objects.filter(collection_id=collection, id__in=ids)
+        with transaction.atomic():
+            updated = queryset.update(
+                order=Case(
+                    *(When(id=document_id, then=Value(i)) for i, document_id in enumerate(ids, 1))
+                ),
+                update_time=timezone.now(),
+            )
+            if updated != len(ids):
+                transaction.set_rollback(True)
+                return Response(
+                    {'error': '部分文档不存在或不属于该集合'}, status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response({'updated': updated})
+
+    @action(detail=True, methods=['get'], url_path='download')
+    def download(self, request, pk=None):
+        """
+        通过mmap流式下载文档内容，ETag为文件哈希，Last-Modified为更新时间
+        支持条件请求（304/412）和单段Range请求（206），客户端可续传未下载的部分
+        """
+        document = self.get_object()
+        etag = quote_etag(document.hex)
+        last_modified = int(document.update_time.timestamp()) if document.update_time else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.build_download_response(request, document, etag, last_modified)
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        return response
+
+    @staticmethod
+    def build_download_response(request, document, etag, last_modified):
+        size = document.size
+        byte_range = None
+        if 'HTTP_RANGE' in request.META and if_range_matches(request, etag, last_modified):
+            try:
+                byte_range = parse_range_header(request.META['HTTP_RANGE'], size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+        start, end = byte_range or (0, size)
+        response = FileResponse(
+            document.open_range(start, end),
+            as_attachment=True,
+            filename=document.name,
+            content_type=document.mime_type or 'application/octet-stream',
+        )
+        response.block_size = DOWNLOAD_BLOCK_SIZE
+        # 压缩存储的文档返回的是不可定位的解压流，FileResponse无法自行计算长度
+        response['Content-Length'] = end - start
+        response['Accept-Ranges'] = 'bytes'
+        if byte_range is not None:
+            response.status_code = status.HTTP_206_PARTIAL_CONTENT
+            response['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='storage-stats')
+    def storage_stats(self, _request):
+        """当前进程内存储后端各操作的调用次数和耗时"""
+        storage = get_storage()
+        return Response({'backend': type(storage).__name__, 'latency': storage.latency_stats()})
+
+    @action(methods=['GET', 'POST'], detail=True, url_path='convert')
+    def convert(self, request, pk=None):
+        """提交转换任务，由run_conversion_workers异步执行，返回任务ID供轮询"""
+        document = get_object_or_404(Document, id=pk)
+        job, _ = enqueue_conversion(document)
+        location = reverse('conversion-job-detail', kwargs={'pk': job.id}, request=request)
+        # 命中转换结果缓存时任务已完成
+        response_status = (
+            status.HTTP_200_OK if job.state == ConversionJob.DONE else status.HTTP_202_ACCEPTED
+        )
+        return Response(
+            ConversionJobSerializer(job).data,
+            status=response_status,
+            headers={'Location': location},
+        )
+
+
+class ConversionJobViewSet(mixins.RetrieveModelMixin, GenericViewSet):
+    """转换任务视图集，用于查询任务状态"""
+
+    queryset = ConversionJob.objects.all()
+    serializer_class = ConversionJobSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, _request):
+        """转换结果缓存的命中率统计"""
+        return Response(get_cache_stats())
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'instructions.settings')
 
 application = get_asgi_application()
+
+# 异步STORE插件执行入口，需在应用加载后导入，ASGI服务的事件循环中可直接await
+from plugin.core.async_runner import run_store_plugin  # noqa: E402
+
+__all__ = ['application', 'run_store_plugin']
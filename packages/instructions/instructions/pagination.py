@@ -0,0 +1,154 @@
+import base64
+import json
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class StandardResultsSetPagination(pagination.PageNumberPagination):
+    """自定义分页类，设置默认每页显示条数和最大每页显示条数"""
+
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    键集（游标）分页
+    按 (id) 或 (update_time, id) 排序，使用上一页边界值过滤而不是OFFSET，且不执行COUNT查询
+    游标为不透明的base64字符串，首页传空的cursor参数即可开启
+    """
+
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'cursor_order'
+    page_size_query_param = 'page_size'
+    page_size = 10
+    max_page_size = 100
+    orderings = {
+        'id': ('id',),
+        'update_time': ('update_time', 'id'),
+    }
+    default_ordering = 'id'
+    invalid_cursor_message = '无效的游标'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering_name = request.query_params.get(self.ordering_query_param)
+        if self.ordering_name not in self.orderings:
+            self.ordering_name = self.default_ordering
+        self.keys = self.orderings[self.ordering_name]
+
+        position, reverse = self.decode_cursor(request, queryset.model)
+        # update_time可以为空，空值在不同数据库中的排序位置不一致，不参与键集分页
+        queryset = queryset.filter(**{f'{key}__isnull': False for key in self.keys[:-1]})
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position, reverse))
+        prefix = '-' if reverse else ''
+        queryset = queryset.order_by(*(prefix + key for key in self.keys))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_position = self.previous_position = None
+        if results:
+            if has_more or reverse:
+                self.next_position = self.get_position(results[-1])
+            if (has_more and reverse) or (position is not None and not reverse):
+                self.previous_position = self.get_position(results[0])
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_position(self, instance):
+        return [getattr(instance, key) for key in self.keys]
+
+    def get_position_filter(self, position, reverse):
+        """(k1, k2) > (v1, v2) 展开为 k1 > v1 OR (k1 = v1 AND k2 > v2)"""
+        lookup = 'lt' if reverse else 'gt'
+        conditions = []
+        for index, key in enumerate(self.keys):
+            equals = {prev_key: position[i] for i, prev_key in enumerate(self.keys[:index])}
+            conditions.append(Q(**equals, **{f'{key}__{lookup}': position[index]}))
+        return reduce(lambda left, right: left | right, conditions)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if data['o'] != self.ordering_name or len(data['p']) != len(self.keys):
+                raise ValueError
+            position = [
+                model._meta.get_field(key).to_python(value)
+                for key, value in zip(self.keys, data['p'], strict=True)
+            ]
+            return position, bool(data['r'])
+        except (KeyError, TypeError, ValueError, ValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message) from None
+
+    def encode_cursor(self, position, reverse):
+        if position is None:
+            return None
+        data = {
+            'o': self.ordering_name,
+            'p': [
+                value.isoformat() if hasattr(value, 'isoformat') else value for value in position
+            ],
+            'r': int(reverse),
+        }
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode())
+        url = replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode('ascii').rstrip('=')
+        )
+        if self.ordering_name == self.default_ordering:
+            return remove_query_param(url, self.ordering_query_param)
+        return replace_query_param(url, self.ordering_query_param, self.ordering_name)
+
+    def get_next_link(self):
+        return self.encode_cursor(self.next_position, False)
+
+    def get_previous_link(self):
+        return self.encode_cursor(self.previous_position, True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ('next', self.get_next_link()),
+                    ('previous', self.get_previous_link()),
+                    ('results', data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
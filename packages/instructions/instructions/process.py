@@ -0,0 +1,31 @@
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 终止子进程后等待其退出的秒数，超时则强制结束
+TERMINATE_TIMEOUT = 5
+
+
+def reset_signal_handlers():
+    """
+    进程池子进程的initializer
+    子进程由fork创建，会继承主进程安装的SIGTERM处理函数，恢复默认处理后terminate才能立即结束子进程
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def terminate_process_pool(executor: ProcessPoolExecutor, timeout=TERMINATE_TIMEOUT):
+    """关闭进程池并终止子进程，不等待运行中的任务，用于任务超时或子进程异常退出后重建进程池"""
+    # ProcessPoolExecutor没有公开终止子进程的接口，shutdown会清空_processes，需先取出
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    # 全部子进程共用同一个截止时间
+    deadline = time.monotonic() + timeout
+    for process in processes:
+        process.join(max(0.0, deadline - time.monotonic()))
+    for process in processes:
+        if process.is_alive():
+            process.kill()
+            process.join()
@@ -1,13 +1,7 @@
-from rest_framework import pagination
 from rest_framework.permissions import BasePermission
 
-
-class StandardResultsSetPagination(pagination.PageNumberPagination):
-    """自定义分页类，设置默认每页显示条数和最大每页显示条数"""
-
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+# 注意：此模块在settings中导入，不能导入rest_framework.pagination等在导入时读取api_settings的模块，
+# 否则REST_FRAMEWORK配置尚未定义就被缓存为空，分页类放在instructions.pagination中
 
 
 class ReadOnly(BasePermission):
@@ -21,7 +15,7 @@ class ReadOnly(BasePermission):
 def get_rest_framework_settings():
     return {
         # 默认分页类
-        'DEFAULT_PAGINATION_CLASS': 'instructions.rest_framework_settings.StandardResultsSetPagination',
+        'DEFAULT_PAGINATION_CLASS': 'instructions.pagination.StandardResultsSetPagination',
         # 默认认证类
         'DEFAULT_AUTHENTICATION_CLASSES': [
             'rest_framework.authentication.SessionAuthentication',
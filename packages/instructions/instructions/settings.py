@@ -27,6 +27,38 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(os.path.join(BASE_DIR, '.env'))
 STORE_PATH = BASE_DIR.parent.joinpath('store')
 STORE_PATH.mkdir(parents=True, exist_ok=True)
+# 文件块存储后端：content.utils.storage.LocalStorage（STORE_PATH下分片保存）或MemoryStorage（进程内存，用于测试）
+STORE_BACKEND = os.environ.get('STORE_BACKEND', 'content.utils.storage.LocalStorage')
+# 新文件去重使用的哈希算法：md5、sha1、sha256、blake2b、blake2s，更换后可用rehash_store迁移已有文件
+STORE_HASH_ALGORITHM = os.environ.get('STORE_HASH_ALGORITHM', 'md5')
+# 按内容类型压缩存储，如 TEXT=gzip,MARKDOWN=gzip,CSV=lzma,JSON=zstd（zstd需安装zstandard），为空时不压缩
+STORE_COMPRESSION = dict(
+    item.split('=', 1) for item in os.environ.get('STORE_COMPRESSION', '').split(',') if item
+)
+# 内容全文检索后端，为空时按数据库类型自动选择（SQLite FTS5 / PostgreSQL tsvector）
+CONTENT_SEARCH_BACKEND = os.environ.get('CONTENT_SEARCH_BACKEND')
+# 文档转换进程池大小、单个任务超时时间（秒）及最大执行次数
+CONVERSION_WORKERS = int(os.environ.get('CONVERSION_WORKERS', os.cpu_count() or 1))
+CONVERSION_JOB_TIMEOUT = float(os.environ.get('CONVERSION_JOB_TIMEOUT', '300'))
+CONVERSION_JOB_MAX_ATTEMPTS = int(os.environ.get('CONVERSION_JOB_MAX_ATTEMPTS', '3'))
+# 插件实现类所在的模块，逗号分隔，应用启动时导入以完成注册
+PLUGIN_MODULES = [name for name in os.environ.get('PLUGIN_MODULES', '').split(',') if name]
+# 每个插件保留的已setup实例上限、空闲实例的淘汰时间（秒）及与数据库核对插件配置的间隔（秒）
+PLUGIN_POOL_SIZE = int(os.environ.get('PLUGIN_POOL_SIZE', '4'))
+PLUGIN_IDLE_TIMEOUT = float(os.environ.get('PLUGIN_IDLE_TIMEOUT', '300'))
+PLUGIN_REFRESH_INTERVAL = float(os.environ.get('PLUGIN_REFRESH_INTERVAL', '30'))
+# 插件进程池大小及单次run的超时时间（秒）
+PLUGIN_WORKERS = int(os.environ.get('PLUGIN_WORKERS', os.cpu_count() or 1))
+PLUGIN_RUN_TIMEOUT = float(os.environ.get('PLUGIN_RUN_TIMEOUT', '300'))
+# 异步STORE插件同时处理的文档数上限
+PLUGIN_ASYNC_CONCURRENCY = int(os.environ.get('PLUGIN_ASYNC_CONCURRENCY', '16'))
+# 插件结果缓存保留的记录数上限，超过时淘汰最久未使用的记录，为0时不缓存
+PLUGIN_RESULT_CACHE_SIZE = int(os.environ.get('PLUGIN_RESULT_CACHE_SIZE', '10000'))
+# 插件流水线：一个STORE插件及一个或多个PARSING插件（逗号分隔，按顺序执行），格式为 编码@版本
+PLUGIN_PIPELINE_STORE = os.environ.get('PLUGIN_PIPELINE_STORE', '')
+PLUGIN_PIPELINE_PARSING = [
+    name for name in os.environ.get('PLUGIN_PIPELINE_PARSING', '').split(',') if name
+]
 
 
 # Quick-start development settings - unsuitable for production
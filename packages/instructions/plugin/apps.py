@@ -1,7 +1,16 @@
+import importlib
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class PluginConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'plugin'
     verbose_name = '插件'
+
+    def ready(self):
+        # 注册表模块连接PluginModel的保存、删除信号
+        importlib.import_module('plugin.core.registry')
+        for module in settings.PLUGIN_MODULES:
+            importlib.import_module(module)
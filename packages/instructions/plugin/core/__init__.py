@@ -4,8 +4,27 @@ from plugin.models import PluginModel
 
 T = TypeVar('T')
 
+# 插件编码 -> 实现类，同一编码的各版本共用实现类，版本和配置由PluginModel提供
+PLUGIN_CLASSES = {}
+
+
+def register_plugin(cls):
+    """注册插件实现类，按插件编码查找"""
+    if not cls.code:
+        raise ValueError(f'{cls.__name__} 未设置插件编码')
+    PLUGIN_CLASSES[cls.code] = cls
+    return cls
+
+
+def get_plugin_class(code: str) -> type['BasePlugin'] | None:
+    return PLUGIN_CLASSES.get(code)
+
 
 class BasePlugin:
+    # 插件编码和作用域，与PluginModel的code、scope对应
+    code = None
+    scope = None
+
     def __init__(self, plugin_model: PluginModel):
         self.plugin_model = plugin_model
         self.plugin_code = plugin_model.code
@@ -26,6 +45,8 @@ class BasePlugin:
 
 
 class StoreBasePlugin(BasePlugin):
+    scope = PluginModel.STORE
+
     def __init__(self, plugin_model: PluginModel):
         super().__init__(plugin_model)
 
@@ -37,3 +58,36 @@ class StoreBasePlugin(BasePlugin):
 
     def teardown(self):
         return super().teardown()
+
+    def store(self, data):
+        """
+        流水线中的STORE阶段，data为文档内容的只读缓冲区（mmap或bytes）
+        返回交给PARSING阶段的缓冲区或二进制文件对象，返回None时原样传递data
+        """
+        return None
+
+
+class AsyncStoreBasePlugin(BasePlugin):
+    """
+    I/O密集的STORE插件（如写入远程存储），setup/run/teardown均为协程
+    同一实例在事件循环中被多个文档并发调用，由plugin.core.async_runner执行
+    """
+
+    scope = PluginModel.STORE
+
+    async def setup(self):
+        raise NotImplementedError('must implement setup')
+
+    async def run(self, file_path: str) -> T:
+        raise NotImplementedError('must implement run')
+
+    async def teardown(self):
+        raise NotImplementedError('must implement teardown')
+
+
+class ParsingBasePlugin(BasePlugin):
+    scope = PluginModel.PARSING
+
+    def parse(self, data) -> T:
+        """流水线中的PARSING阶段，data为STORE阶段输出的只读缓冲区，需要文件对象时用pipeline.open_stream"""
+        raise NotImplementedError('must implement parse')
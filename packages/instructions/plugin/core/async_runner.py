@@ -0,0 +1,137 @@
+"""异步STORE插件执行器
+
+AsyncStoreBasePlugin在事件循环中执行，同一实例并发处理多个文档，等待I/O时不占用线程或进程。
+同时处理的文档数由concurrency（默认PLUGIN_ASYNC_CONCURRENCY）限制，每个文档有单独的超时。
+数据库和存储的同步操作通过sync_to_async执行；可在ASGI服务的事件循环中直接await，
+同步代码（如管理命令）通过async_to_sync调用。
+"""
+
+import asyncio
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from content.models import Document
+from content.utils.storage import get_storage
+from plugin.core import AsyncStoreBasePlugin
+from plugin.core.registry import PluginRegistry
+from plugin.models import PluginModel
+
+
+def enter_local_path(stack: ExitStack, document: Document) -> str:
+    return stack.enter_context(get_storage().local_path(document.hex, document.get_compression()))
+
+
+class AsyncPluginRunner:
+    """
+    异步STORE插件执行器，用法：
+        async with AsyncPluginRunner(code, version) as runner:
+            results = await runner.run_documents(documents)
+    """
+
+    def __init__(self, code: str, version: str, concurrency=None, timeout=None):
+        self.code = code
+        self.version = version
+        self.concurrency = concurrency or settings.PLUGIN_ASYNC_CONCURRENCY
+        self.timeout = timeout or settings.PLUGIN_RUN_TIMEOUT
+        self.plugin: AsyncStoreBasePlugin | None = None
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        # 当前及历史最多同时处理的文档数
+        self.active = 0
+        self.max_active = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        plugin_model, plugin_class = await sync_to_async(PluginRegistry.load)(
+            self.code, self.version, PluginModel.STORE, asynchronous=True
+        )
+        plugin = plugin_class(plugin_model)
+        await plugin.setup()
+        self.plugin = plugin
+
+    async def close(self):
+        if self.plugin is not None:
+            plugin, self.plugin = self.plugin, None
+            await plugin.teardown()
+
+    async def run(self, file_path: str):
+        async with self.semaphore:
+            return await self.run_plugin(file_path)
+
+    async def run_document(self, document: Document):
+        """对文档执行插件，压缩存储或非本地存储的文件先解压到临时文件"""
+        async with self.semaphore:
+            stack = ExitStack()
+            try:
+                file_path = await sync_to_async(enter_local_path)(stack, document)
+                return await self.run_plugin(file_path)
+            finally:
+                await sync_to_async(stack.close)()
+
+    async def run_plugin(self, file_path: str):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        timeout = asyncio.timeout(self.timeout)
+        try:
+            async with timeout:
+                return await self.plugin.run(file_path)
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            raise TimeoutError(
+                f'插件 {self.code} 处理 {file_path} 超过 {self.timeout} 秒'
+            ) from None
+        finally:
+            self.active -= 1
+
+    async def run_many(self, file_paths, return_exceptions=False) -> list:
+        """并发执行，结果顺序与file_paths一致，异常处理同PluginExecutor.run_many"""
+        return await self.gather([self.run(path) for path in file_paths], return_exceptions)
+
+    async def run_documents(self, documents, return_exceptions=False) -> list:
+        return await self.gather(
+            [self.run_document(document) for document in documents], return_exceptions
+        )
+
+    @staticmethod
+    async def gather(coroutines, return_exceptions) -> list:
+        # 等待全部完成后再抛出异常，避免其他文档仍在后台执行
+        results = await asyncio.gather(*coroutines, return_exceptions=True)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+
+async def run_store_plugin(
+    code: str, version: str, document_ids, concurrency=None, timeout=None
+) -> list:
+    """
+    对指定文档执行异步STORE插件，结果顺序与document_ids一致，失败的文档在对应位置返回异常
+    ASGI服务中可直接await，如 from instructions.asgi import run_store_plugin
+    """
+    documents = {
+        document.id: document async for document in Document.objects.filter(id__in=document_ids)
+    }
+    async with AsyncPluginRunner(code, version, concurrency, timeout) as runner:
+        return await runner.gather(
+            [
+                runner.run_document(documents[document_id])
+                if document_id in documents
+                else missing_document(document_id)
+                for document_id in document_ids
+            ],
+            return_exceptions=True,
+        )
+
+
+async def missing_document(document_id):
+    raise Document.DoesNotExist(f'文档 {document_id} 不存在')
@@ -0,0 +1,128 @@
+"""插件结果缓存
+
+相同内容、相同插件版本和配置下插件的结果不变，按 (插件编码, 插件版本, 配置指纹, 文件哈希)
+保存在PluginResult表中，进程重启后仍然有效。记录数超过PLUGIN_RESULT_CACHE_SIZE时淘汰最久未使用的记录；
+插件版本或配置变化后键不再匹配，保存或删除插件时同时清理不再可能命中的记录。
+结果以JSON保存，无法序列化的结果不缓存。
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from plugin.models import PluginModel, PluginResult
+
+# get返回的未命中标记，插件结果本身可能为None
+MISSING = object()
+
+
+def get_config_fingerprint(plugin_model: PluginModel) -> str:
+    config = json.dumps(plugin_model.config, sort_keys=True, default=str)
+    return hashlib.md5(config.encode()).hexdigest()
+
+
+class PluginResultCache:
+    """插件结果的持久化LRU缓存，max_size为None时取PLUGIN_RESULT_CACHE_SIZE，为0时不缓存"""
+
+    def __init__(self, max_size: int | None = None):
+        self._max_size = max_size
+
+    @property
+    def max_size(self) -> int:
+        return settings.PLUGIN_RESULT_CACHE_SIZE if self._max_size is None else self._max_size
+
+    def get(self, code: str, version: str, config_hash: str, hexcode: str) -> Any:
+        """查找缓存的结果，命中时更新最近使用时间，未命中时返回MISSING"""
+        if not self.max_size:
+            return MISSING
+        entry = (
+            PluginResult.objects.filter(
+                code=code, version=version, config_hash=config_hash, hex=hexcode
+            )
+            .only('id', 'result')
+            .first()
+        )
+        if entry is None:
+            return MISSING
+        PluginResult.objects.filter(id=entry.id).update(
+            hit_count=F('hit_count') + 1, last_used_time=timezone.now()
+        )
+        return entry.result
+
+    def set(self, code: str, version: str, config_hash: str, hexcode: str, result) -> bool:
+        """保存结果，返回是否写入；已存在或无法JSON序列化时不写入"""
+        if not self.max_size:
+            return False
+        try:
+            # 以JSON保存后读取到的结果与原结果一致才缓存，如元组会变为列表，同样不缓存
+            encoded = json.dumps(result, cls=DjangoJSONEncoder)
+        except (TypeError, ValueError):
+            return False
+        if json.loads(encoded) != result:
+            return False
+        try:
+            with transaction.atomic():
+                PluginResult.objects.create(
+                    code=code, version=version, config_hash=config_hash, hex=hexcode, result=result
+                )
+        except IntegrityError:
+            # 并发执行时其他进程已保存
+            return False
+        self.evict()
+        return True
+
+    def evict(self) -> int:
+        """记录数超过上限时删除最久未使用的记录，返回删除的记录数"""
+        excess = PluginResult.objects.count() - self.max_size
+        if excess <= 0:
+            return 0
+        ids = list(
+            PluginResult.objects.order_by('last_used_time', 'id').values_list('id', flat=True)[
+                :excess
+            ]
+        )
+        return PluginResult.objects.filter(id__in=ids).delete()[0]
+
+    @staticmethod
+    def purge(code: str) -> int:
+        """删除插件已不存在的版本或旧配置下的结果，返回删除的记录数"""
+        current = {
+            (plugin.version, get_config_fingerprint(plugin))
+            for plugin in PluginModel.objects.filter(code=code)
+        }
+        results = PluginResult.objects.filter(code=code)
+        deleted = 0
+        for version, config_hash in results.values_list('version', 'config_hash').distinct():
+            if (version, config_hash) not in current:
+                deleted += results.filter(version=version, config_hash=config_hash).delete()[0]
+        return deleted
+
+    @staticmethod
+    def stats() -> dict:
+        """命中率 = 命中次数 / (命中次数 + 记录数)，每条记录对应一次未命中"""
+        stats = PluginResult.objects.aggregate(size=Count('id'), hits=Sum('hit_count'))
+        hits = stats['hits'] or 0
+        total = hits + stats['size']
+        return {
+            'size': stats['size'],
+            'hits': hits,
+            'hit_ratio': hits / total if total else 0.0,
+        }
+
+
+plugin_result_cache = PluginResultCache()
+
+
+def _purge_plugin_results(sender, instance, **kwargs):
+    PluginResultCache.purge(instance.code)
+
+
+post_save.connect(_purge_plugin_results, sender=PluginModel, dispatch_uid='plugin_result_save')
+post_delete.connect(_purge_plugin_results, sender=PluginModel, dispatch_uid='plugin_result_delete')
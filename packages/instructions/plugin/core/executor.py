@@ -0,0 +1,228 @@
+"""插件进程池执行器
+
+将BasePlugin.run分发到ProcessPoolExecutor中执行，每个子进程启动时setup一次插件实例，
+退出时teardown。每次run有硬超时，超时或子进程异常退出时重建进程池，同批次中未完成的其他任务重新提交；
+子进程崩溃时无法得知是哪个任务导致的，当时运行中的任务逐个单独重新执行，再次崩溃的任务记为失败。
+run_documents按文件哈希缓存结果，命中的文档不再分发到子进程；run_many按路径执行，不缓存。
+"""
+
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from multiprocessing.util import Finalize
+
+from django.conf import settings
+
+from content.utils.storage import get_storage
+from instructions.process import reset_signal_handlers, terminate_process_pool
+from plugin.core import BasePlugin
+from plugin.core.cache import (
+    MISSING,
+    PluginResultCache,
+    get_config_fingerprint,
+    plugin_result_cache,
+)
+from plugin.core.registry import PluginRegistry
+
+# 子进程内已setup的插件实例
+WORKER_STATE = {}
+
+
+def init_worker(plugin_class: type[BasePlugin], plugin_model):
+    """子进程初始化，不访问数据库"""
+    reset_signal_handlers()
+    plugin = plugin_class(plugin_model)
+    plugin.setup()
+    WORKER_STATE['plugin'] = plugin
+    # 进程池正常关闭时子进程按Finalize注册的顺序清理，被强制终止时不会执行
+    Finalize(plugin, plugin.teardown, exitpriority=10)
+
+
+def run_plugin(*args, **kwargs):
+    return WORKER_STATE['plugin'].run(*args, **kwargs)
+
+
+class PluginExecutor:
+    """
+    插件进程池执行器，用法：
+        with PluginExecutor(code, version, scope) as executor:
+            results = executor.run_many(file_paths)
+    插件配置在启动时读取，配置变化后需重新创建执行器
+    """
+
+    def __init__(self, code: str, version: str, scope: str, workers=None, timeout=None):
+        self.code = code
+        self.version = version
+        self.scope = scope
+        self.workers = workers or settings.PLUGIN_WORKERS
+        self.timeout = timeout or settings.PLUGIN_RUN_TIMEOUT
+        self.result_cache: PluginResultCache = plugin_result_cache
+        self.plugin_model = None
+        self.plugin_class = None
+        self.executor = None
+        self.restarts = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def start(self):
+        self.plugin_model, self.plugin_class = PluginRegistry.load(
+            self.code, self.version, self.scope
+        )
+        self.executor = self.create_executor()
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(self.plugin_class, self.plugin_model),
+        )
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def terminate_workers(self):
+        terminate_process_pool(self.executor)
+
+    def restart(self):
+        """终止全部子进程并重建进程池"""
+        self.terminate_workers()
+        self.executor = self.create_executor()
+        self.restarts += 1
+
+    def run(self, file_path: str):
+        return self.run_many([file_path])[0]
+
+    def run_many(self, file_paths, return_exceptions=False) -> list:
+        """
+        并行执行，结果顺序与file_paths一致
+        return_exceptions为False时任一文件失败都抛出按顺序的第一个异常，否则在对应位置返回异常
+        路径不对应确定的内容，结果不缓存
+        """
+        batch = PluginBatch(file_paths)
+        while batch.pending or batch.suspects or batch.running:
+            self.submit(batch)
+            wait_timeout = max(0.0, min(batch.deadlines()) - time.monotonic())
+            done, _ = wait(batch.running, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            broken = self.collect(batch, done)
+            expired = self.expire(batch)
+            if broken or expired:
+                # 崩溃时同时运行的任务都可能是原因，逐个单独重新执行；超时时其余任务直接重新提交
+                requeue = batch.suspects if broken else batch.pending
+                requeue.extend(index for index, _, _ in batch.running.values())
+                batch.running.clear()
+                self.restart()
+
+        if not return_exceptions and batch.errors:
+            raise batch.errors[min(batch.errors)]
+        for index, error in batch.errors.items():
+            batch.results[index] = error
+        return batch.results
+
+    def run_documents(self, documents, return_exceptions=False) -> list:
+        """
+        对文档并行执行，结果顺序与documents一致，异常处理同run_many
+        结果按 (插件版本, 配置指纹, 文件哈希) 缓存，命中的文档不再执行，相同内容的文档只执行一次
+        插件按路径读取文件，压缩存储或非本地存储的文件先解压到临时文件
+        """
+        documents = list(documents)
+        fingerprint = get_config_fingerprint(self.plugin_model)
+        # 文件哈希 -> 结果
+        results = {}
+        pending = {}
+        for document in documents:
+            if document.hex in results or document.hex in pending:
+                continue
+            result = self.result_cache.get(self.code, self.version, fingerprint, document.hex)
+            if result is MISSING:
+                pending[document.hex] = document
+            else:
+                results[document.hex] = result
+        if pending:
+            storage = get_storage()
+            with ExitStack() as stack:
+                file_paths = [
+                    stack.enter_context(
+                        storage.local_path(document.hex, document.get_compression())
+                    )
+                    for document in pending.values()
+                ]
+                outputs = self.run_many(file_paths, return_exceptions=True)
+            for hexcode, output in zip(pending, outputs, strict=True):
+                if not isinstance(output, Exception):
+                    self.result_cache.set(self.code, self.version, fingerprint, hexcode, output)
+                results[hexcode] = output
+
+        ordered = [results[document.hex] for document in documents]
+        if not return_exceptions:
+            for result in ordered:
+                if isinstance(result, Exception):
+                    raise result
+        return ordered
+
+    def submit(self, batch: 'PluginBatch'):
+        """提交数不超过进程数，提交时间即开始执行的时间；有嫌疑任务时每次只执行一个"""
+        if batch.suspects:
+            if not batch.running:
+                batch.submit(self.executor, batch.suspects.popleft(), self.timeout, isolated=True)
+            return
+        while batch.pending and len(batch.running) < self.workers:
+            batch.submit(self.executor, batch.pending.popleft(), self.timeout)
+
+    @staticmethod
+    def collect(batch: 'PluginBatch', done) -> bool:
+        """记录已完成任务的结果，返回进程池是否损坏"""
+        broken = False
+        for future in done:
+            index, _, isolated = batch.running.pop(future)
+            try:
+                batch.results[index] = future.result()
+            except BrokenProcessPool as e:
+                broken = True
+                if isolated:
+                    batch.errors[index] = e
+                else:
+                    batch.suspects.append(index)
+            except Exception as e:
+                batch.errors[index] = e
+        return broken
+
+    def expire(self, batch: 'PluginBatch') -> bool:
+        now = time.monotonic()
+        expired = [future for future, (_, deadline, _) in batch.running.items() if deadline <= now]
+        for future in expired:
+            index, _, _ = batch.running.pop(future)
+            batch.errors[index] = TimeoutError(
+                f'插件 {self.code} 处理 {batch.file_paths[index]} 超过 {self.timeout} 秒'
+            )
+        return bool(expired)
+
+
+class PluginBatch:
+    """run_many的一批文件及其执行状态"""
+
+    def __init__(self, file_paths):
+        self.file_paths = list(file_paths)
+        self.results = [None] * len(self.file_paths)
+        # 下标 -> 异常
+        self.errors = {}
+        self.pending = deque(range(len(self.file_paths)))
+        # 与崩溃的子进程同时运行过的任务
+        self.suspects = deque()
+        # future -> (下标, 截止时间, 是否单独执行)
+        self.running = {}
+
+    def submit(self, executor: ProcessPoolExecutor, index: int, timeout: float, isolated=False):
+        future = executor.submit(run_plugin, self.file_paths[index])
+        self.running[future] = (index, time.monotonic() + timeout, isolated)
+
+    def deadlines(self):
+        return (deadline for _, deadline, _ in self.running.values())
@@ -0,0 +1,164 @@
+"""插件流水线
+
+对同一文档依次执行一个STORE插件和一个或多个PARSING插件。
+文档内容只通过mmap读取一次，STORE阶段输出的缓冲区或文件对象在内存中交给各PARSING阶段，
+文件对象映射（或引用BytesIO的内部缓冲区）后由各PARSING阶段共享，不再经过磁盘重新读取；
+因此各阶段在当前进程中执行，插件实例从注册表的实例池中取出。
+各阶段耗时写入Document.plugin_timings，阶段失败时同样记录已执行部分的耗时。
+PARSING阶段的结果按文档哈希缓存，配置指纹同时包含STORE插件的版本和配置；
+全部PARSING阶段命中时不读取文档，也不执行STORE阶段。
+"""
+
+import hashlib
+import io
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from content.models import Document
+from content.utils.converters import BufferReader, map_file
+from plugin.core.cache import MISSING
+from plugin.core.registry import PluginRegistry, plugin_registry
+from plugin.models import PluginModel
+
+
+class PipelineStage(NamedTuple):
+    code: str
+    version: str
+    scope: str
+
+    @classmethod
+    def parse(cls, spec: str, scope: str) -> 'PipelineStage':
+        """解析 编码@版本 格式的配置"""
+        code, _, version = spec.partition('@')
+        if not code or not version:
+            raise ImproperlyConfigured(f'插件流水线配置 {spec!r} 应为 编码@版本')
+        return cls(code, version, scope)
+
+    def __str__(self):
+        return f'{self.scope}:{self.code}@{self.version}'
+
+
+class PipelineResult(NamedTuple):
+    # 各PARSING阶段的结果，顺序与配置一致
+    results: list[Any]
+    timings: dict
+
+
+def open_stream(data) -> BufferReader:
+    """
+    以文件对象方式读取阶段间传递的缓冲区，不复制内容
+    需在阶段返回前关闭：with open_stream(data) as f
+    """
+    return BufferReader(data)
+
+
+def enter_buffer(stack: ExitStack, data):
+    """将STORE阶段的输出转为只读缓冲区，缓冲区及文件对象在stack关闭时释放"""
+    if isinstance(data, memoryview):
+        # 引用mmap的视图需在映射关闭前释放
+        stack.callback(data.release)
+        return data
+    if not isinstance(data, io.IOBase):
+        return data
+    stack.callback(data.close)
+    if isinstance(data, io.BytesIO):
+        view = data.getbuffer()
+        stack.callback(view.release)
+        return view
+    try:
+        data.fileno()
+    except (OSError, io.UnsupportedOperation):
+        data.seek(0)
+        return data.read()
+    if isinstance(data, io.BufferedIOBase) and data.writable():
+        data.flush()
+    return stack.enter_context(map_file(data))
+
+
+class PluginPipeline:
+    """
+    STORE → PARSING插件流水线，用法：
+        result = PluginPipeline.from_settings().run(document)
+    """
+
+    def __init__(self, store: str, parsing: list[str], registry: PluginRegistry | None = None):
+        if not parsing:
+            raise ImproperlyConfigured('插件流水线至少需要一个PARSING插件')
+        self.store = PipelineStage.parse(store, PluginModel.STORE)
+        self.parsing = [PipelineStage.parse(spec, PluginModel.PARSING) for spec in parsing]
+        self.registry = registry or plugin_registry
+
+    @classmethod
+    def from_settings(cls, registry: PluginRegistry | None = None) -> 'PluginPipeline':
+        return cls(settings.PLUGIN_PIPELINE_STORE, settings.PLUGIN_PIPELINE_PARSING, registry)
+
+    @staticmethod
+    @contextmanager
+    def timer(timings: list, stage: str, cached=False):
+        started = time.perf_counter()
+        entry = {'stage': stage}
+        if cached:
+            entry['cached'] = True
+        try:
+            yield
+        except BaseException as e:
+            entry['error'] = type(e).__name__
+            raise
+        finally:
+            entry['ms'] = (time.perf_counter() - started) * 1000
+            timings.append(entry)
+
+    def run(self, document: Document) -> PipelineResult:
+        stages = []
+        results = []
+        started = time.perf_counter()
+        try:
+            store_fingerprint = self.get_fingerprint(self.store)
+            lookups = [self.lookup(stage, store_fingerprint, document) for stage in self.parsing]
+            with ExitStack() as stack:
+                if any(result is MISSING for _, result in lookups):
+                    with self.timer(stages, 'mmap'):
+                        buffer = stack.enter_context(document.map_file())
+                    with self.timer(stages, str(self.store)):
+                        data = self.run_stage(self.store, 'store', buffer)
+                    data = buffer if data is None else enter_buffer(stack, data)
+                for stage, (key, cached) in zip(self.parsing, lookups, strict=True):
+                    result = cached
+                    with self.timer(stages, str(stage), cached=cached is not MISSING):
+                        if result is MISSING:
+                            result = self.run_stage(stage, 'parse', data)
+                            if key is not None:
+                                self.registry.result_cache.set(*key, result)
+                    results.append(result)
+        finally:
+            timings = {'stages': stages, 'total_ms': (time.perf_counter() - started) * 1000}
+            document.plugin_timings = timings
+            Document._base_manager.filter(id=document.id).update(plugin_timings=timings)
+        return PipelineResult(results, timings)
+
+    def run_stage(self, stage: PipelineStage, method: str, data):
+        with self.registry.acquire(*stage) as plugin:
+            return getattr(plugin, method)(data)
+
+    def get_fingerprint(self, stage: PipelineStage) -> str | None:
+        """插件当前配置的指纹，插件不存在或未启用时返回None，由执行该阶段时报错"""
+        try:
+            return self.registry.get_pool(*stage).fingerprint
+        except PluginModel.DoesNotExist:
+            return None
+
+    def lookup(self, stage: PipelineStage, store_fingerprint: str | None, document: Document):
+        """
+        查找PARSING阶段的缓存结果，返回 (缓存键, 结果)，未命中时结果为MISSING
+        PARSING插件的输入是STORE阶段的输出，配置指纹由两者的版本和配置共同决定
+        """
+        fingerprint = self.get_fingerprint(stage)
+        if fingerprint is None or store_fingerprint is None:
+            return None, MISSING
+        config = f'{fingerprint}:{self.store.code}@{self.store.version}:{store_fingerprint}'
+        key = (stage.code, stage.version, hashlib.md5(config.encode()).hexdigest(), document.hex)
+        return key, self.registry.result_cache.get(*key)
@@ -0,0 +1,288 @@
+"""插件注册表
+
+按 (code, version, scope) 解析启用状态的插件，每个插件维护一个有上限的实例池：
+实例setup后在多次run之间复用，插件配置变化或空闲超时后teardown。
+同一进程内PluginModel保存或删除时通过信号失效，其他进程的修改在PLUGIN_REFRESH_INTERVAL内生效。
+"""
+
+import inspect
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models.signals import post_delete, post_save
+
+from content.models import Document
+from content.utils.storage import get_storage
+from plugin.core import BasePlugin, get_plugin_class
+from plugin.core.cache import (
+    MISSING,
+    PluginResultCache,
+    get_config_fingerprint,
+    plugin_result_cache,
+)
+from plugin.models import PluginModel
+
+
+class PluginPool:
+    """单个插件的实例池，最近归还的实例优先复用，最久未用的实例按空闲时间淘汰"""
+
+    def __init__(self, plugin_model: PluginModel, plugin_class, max_size: int, idle_timeout: float):
+        self.plugin_model = plugin_model
+        self.plugin_class = plugin_class
+        self.fingerprint = get_config_fingerprint(plugin_model)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        # 上次与数据库中的插件配置核对的时间
+        self.checked_at = time.monotonic()
+        self.closed = False
+        self._condition = threading.Condition()
+        # (实例, 归还时间)，右端为最近归还
+        self._idle = deque()
+        # 已setup且未teardown的实例数，包括正在使用的
+        self._size = 0
+        self.setups = 0
+        self.teardowns = 0
+        self.reuses = 0
+
+    def acquire(self, timeout: float | None = None) -> BasePlugin:
+        """取出一个已setup的实例，实例数已达上限时等待其他调用归还"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError(f'插件 {self.plugin_model.code} 的实例池已关闭')
+                if self._idle:
+                    self.reuses += 1
+                    return self._idle.pop()[0]
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f'等待插件 {self.plugin_model.code} 的空闲实例超时')
+                self._condition.wait(remaining)
+
+        # setup可能很慢，不持有锁
+        try:
+            instance = self.plugin_class(self.plugin_model)
+            instance.setup()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.setups += 1
+        return instance
+
+    def release(self, instance: BasePlugin, discard=False):
+        """归还实例，discard为True（如run抛出异常，实例状态不确定）或实例池已关闭时teardown"""
+        with self._condition:
+            if not (discard or self.closed):
+                self._idle.append((instance, time.monotonic()))
+                self._condition.notify()
+                return
+            self._size -= 1
+            self._condition.notify()
+        self.teardown(instance)
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """teardown空闲超过idle_timeout的实例，返回淘汰的实例数"""
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._condition:
+            while self._idle and now - self._idle[0][1] >= self.idle_timeout:
+                expired.append(self._idle.popleft()[0])
+            self._size -= len(expired)
+            self._condition.notify(len(expired))
+        for instance in expired:
+            self.teardown(instance)
+        return len(expired)
+
+    def close(self):
+        """关闭实例池，空闲实例立即teardown，使用中的实例在归还时teardown"""
+        with self._condition:
+            self.closed = True
+            idle = [instance for instance, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for instance in idle:
+            self.teardown(instance)
+
+    def teardown(self, instance: BasePlugin):
+        try:
+            instance.teardown()
+        finally:
+            with self._condition:
+                self.teardowns += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'setups': self.setups,
+                'teardowns': self.teardowns,
+                'reuses': self.reuses,
+            }
+
+
+# 进程内的全部注册表，插件保存或删除时逐个失效
+_registries = weakref.WeakSet()
+
+
+class PluginRegistry:
+    """进程级插件注册表，按 (code, version, scope) 管理实例池"""
+
+    def __init__(
+        self,
+        max_size=None,
+        idle_timeout=None,
+        refresh_interval=None,
+        acquire_timeout=None,
+        result_cache: PluginResultCache | None = None,
+    ):
+        self.max_size = max_size or settings.PLUGIN_POOL_SIZE
+        self.idle_timeout = idle_timeout or settings.PLUGIN_IDLE_TIMEOUT
+        self.refresh_interval = (
+            settings.PLUGIN_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        )
+        self.acquire_timeout = acquire_timeout
+        self.result_cache = result_cache or plugin_result_cache
+        self._lock = threading.Lock()
+        self._pools: dict[tuple[str, str, str], PluginPool] = {}
+        self._evicted_at = time.monotonic()
+        _registries.add(self)
+
+    @staticmethod
+    def load(
+        code: str, version: str, scope: str, asynchronous=False
+    ) -> tuple[PluginModel, type[BasePlugin]]:
+        """
+        查询启用状态的插件及其实现类，插件不存在或未启用时抛出PluginModel.DoesNotExist
+        asynchronous表示调用方是否按协程执行插件，与实现类不一致时抛出ImproperlyConfigured
+        """
+        plugin_model = PluginModel.objects.get(
+            code=code, version=version, scope=scope, status=PluginModel.ACTIVE
+        )
+        plugin_class = get_plugin_class(code)
+        if plugin_class is None:
+            raise ImproperlyConfigured(f'插件 {code} 没有注册实现类')
+        if plugin_class.scope and plugin_class.scope != scope:
+            raise ImproperlyConfigured(f'插件 {code} 的实现类不支持作用域 {scope}')
+        if inspect.iscoroutinefunction(plugin_class.run) != asynchronous:
+            kind = '异步' if asynchronous else '同步'
+            raise ImproperlyConfigured(f'插件 {code} 的实现类不能按{kind}方式执行')
+        return plugin_model, plugin_class
+
+    def get_pool(self, code: str, version: str, scope: str) -> PluginPool:
+        key = (code, version, scope)
+        now = time.monotonic()
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None and now - pool.checked_at < self.refresh_interval:
+                return pool
+
+        try:
+            plugin_model, plugin_class = self.load(code, version, scope)
+        except PluginModel.DoesNotExist:
+            # 插件已停用或删除
+            self.close_pool(key)
+            raise
+        with self._lock:
+            stale = self._pools.get(key)
+            if stale is not None and stale.fingerprint == get_config_fingerprint(plugin_model):
+                stale.checked_at = now
+                return stale
+            pool = self._pools[key] = PluginPool(
+                plugin_model, plugin_class, self.max_size, self.idle_timeout
+            )
+        if stale is not None:
+            stale.close()
+        return pool
+
+    def close_pool(self, key):
+        with self._lock:
+            pool = self._pools.pop(key, None)
+        if pool is not None:
+            pool.close()
+
+    @contextmanager
+    def acquire(self, code: str, version: str, scope: str):
+        """取出已setup的插件实例，用法：with registry.acquire(code, version, scope) as plugin"""
+        if time.monotonic() - self._evicted_at >= self.idle_timeout:
+            self.evict_idle()
+        pool = self.get_pool(code, version, scope)
+        instance = pool.acquire(self.acquire_timeout)
+        try:
+            yield instance
+        except BaseException:
+            pool.release(instance, discard=True)
+            raise
+        pool.release(instance)
+
+    def run(self, code: str, version: str, scope: str, *args, **kwargs):
+        with self.acquire(code, version, scope) as plugin:
+            return plugin.run(*args, **kwargs)
+
+    def run_document(self, code: str, version: str, scope: str, document: Document):
+        """
+        对文档执行插件，结果按 (插件版本, 配置指纹, 文件哈希) 缓存，命中时不读取文件也不取出实例
+        插件按路径读取文件，压缩存储或非本地存储的文件先解压到临时文件
+        """
+        pool = self.get_pool(code, version, scope)
+        key = (code, version, pool.fingerprint, document.hex)
+        result = self.result_cache.get(*key)
+        if result is not MISSING:
+            return result
+        with get_storage().local_path(document.hex, document.get_compression()) as file_path:
+            result = self.run(code, version, scope, file_path)
+        self.result_cache.set(*key, result)
+        return result
+
+    def evict_idle(self) -> int:
+        """淘汰各实例池中空闲超时的实例，返回淘汰的实例数"""
+        now = time.monotonic()
+        self._evicted_at = now
+        with self._lock:
+            pools = list(self._pools.values())
+        return sum(pool.evict_idle(now) for pool in pools)
+
+    def invalidate(self, code: str | None = None, version: str | None = None):
+        """关闭实例池，不传参数时关闭全部；只传code时关闭该插件全部版本的实例池"""
+        with self._lock:
+            keys = [
+                key
+                for key in self._pools
+                if (code is None or key[0] == code) and (version is None or key[1] == version)
+            ]
+            pools = [self._pools.pop(key) for key in keys]
+        for pool in pools:
+            pool.close()
+
+    def close(self):
+        self.invalidate()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pools = dict(self._pools)
+        return {':'.join(key): pool.stats() for key, pool in pools.items()}
+
+
+plugin_registry = PluginRegistry()
+
+
+def _invalidate_plugin(sender, instance, **kwargs):
+    # 编码或版本可能被修改，旧的实例池在下次核对配置时关闭
+    for registry in list(_registries):
+        registry.invalidate(instance.code)
+
+
+post_save.connect(_invalidate_plugin, sender=PluginModel, dispatch_uid='plugin_registry_save')
+post_delete.connect(_invalidate_plugin, sender=PluginModel, dispatch_uid='plugin_registry_delete')
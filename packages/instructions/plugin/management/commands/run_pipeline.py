@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from content.models import Document
+from plugin.core.pipeline import PluginPipeline
+from plugin.models import PluginModel
+
+
+class Command(BaseCommand):
+    help = '对指定文档执行STORE → PARSING插件流水线，输出各PARSING插件的结果和各阶段耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('document_ids', nargs='+', type=int, help='文档ID')
+        parser.add_argument(
+            '--store',
+            default=settings.PLUGIN_PIPELINE_STORE,
+            help='STORE插件，格式为 编码@版本，默认取PLUGIN_PIPELINE_STORE',
+        )
+        parser.add_argument(
+            '--parsing',
+            nargs='+',
+            default=settings.PLUGIN_PIPELINE_PARSING,
+            help='PARSING插件，按顺序执行，默认取PLUGIN_PIPELINE_PARSING',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            pipeline = PluginPipeline(options['store'], options['parsing'])
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e)) from e
+
+        failed = 0
+        documents = Document.objects.filter(id__in=options['document_ids']).order_by('id')
+        for document in documents:
+            try:
+                result = pipeline.run(document)
+            except (PluginModel.DoesNotExist, ImproperlyConfigured) as e:
+                raise CommandError(f'插件流水线配置有误：{e}') from e
+            except Exception as e:
+                failed += 1
+                self.stdout.write(f'{document.id}\t失败：{type(e).__name__}: {e}')
+                continue
+            stages = ', '.join(
+                f'{stage["stage"]} {stage["ms"]:.1f}ms' for stage in result.timings['stages']
+            )
+            self.stdout.write(f'{document.id}\t{result.results}\t{stages}')
+        self.stdout.write(f'处理完成！共 {documents.count()} 个文档，失败 {failed} 个')
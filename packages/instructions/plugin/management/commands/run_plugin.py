@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from plugin.core.executor import PluginExecutor
+from plugin.models import PluginModel
+
+
+class Command(BaseCommand):
+    help = '在进程池中用指定插件并行处理文件，按输入顺序输出结果'
+
+    def add_arguments(self, parser):
+        parser.add_argument('code', type=str, help='插件编码')
+        parser.add_argument('version', type=str, help='插件版本')
+        parser.add_argument('files', nargs='+', type=str, help='要处理的文件')
+        parser.add_argument(
+            '--scope',
+            choices=[scope for scope, _ in PluginModel.SCOPE_CHOICES],
+            default=PluginModel.PARSING,
+            help='插件作用域',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.PLUGIN_WORKERS, help='进程池大小'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=settings.PLUGIN_RUN_TIMEOUT,
+            help='单个文件的超时时间（秒）',
+        )
+
+    def handle(self, *args, **options):
+        executor = PluginExecutor(
+            options['code'],
+            options['version'],
+            options['scope'],
+            workers=options['workers'],
+            timeout=options['timeout'],
+        )
+        try:
+            with executor:
+                results = executor.run_many(options['files'], return_exceptions=True)
+        except PluginModel.DoesNotExist as e:
+            raise CommandError(f'插件 {options["code"]} {options["version"]} 不存在或未启用') from e
+
+        failed = 0
+        for file_path, result in zip(options['files'], results, strict=True):
+            if isinstance(result, Exception):
+                failed += 1
+                self.stdout.write(f'{file_path}\t失败：{type(result).__name__}: {result}')
+            else:
+                self.stdout.write(f'{file_path}\t{result}')
+        self.stdout.write(
+            f'处理完成！共 {len(results)} 个文件，失败 {failed} 个，进程池重建 {executor.restarts} 次'
+        )
@@ -0,0 +1,52 @@
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from plugin.core.async_runner import run_store_plugin
+from plugin.models import PluginModel
+
+
+class Command(BaseCommand):
+    help = '用异步STORE插件并发处理文档，按输入顺序输出结果'
+
+    def add_arguments(self, parser):
+        parser.add_argument('code', type=str, help='插件编码')
+        parser.add_argument('version', type=str, help='插件版本')
+        parser.add_argument('document_ids', nargs='+', type=int, help='文档ID')
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.PLUGIN_ASYNC_CONCURRENCY,
+            help='同时处理的文档数，默认取PLUGIN_ASYNC_CONCURRENCY',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=settings.PLUGIN_RUN_TIMEOUT,
+            help='单个文档的超时时间（秒）',
+        )
+
+    def handle(self, *args, **options):
+        # async_to_sync在当前线程中执行sync_to_async包装的数据库操作，与同步代码共用连接
+        try:
+            results = async_to_sync(run_store_plugin)(
+                options['code'],
+                options['version'],
+                options['document_ids'],
+                concurrency=options['concurrency'],
+                timeout=options['timeout'],
+            )
+        except PluginModel.DoesNotExist as e:
+            raise CommandError(f'插件 {options["code"]} {options["version"]} 不存在或未启用') from e
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e)) from e
+
+        failed = 0
+        for document_id, result in zip(options['document_ids'], results, strict=True):
+            if isinstance(result, Exception):
+                failed += 1
+                self.stdout.write(f'{document_id}\t失败：{type(result).__name__}: {result}')
+            else:
+                self.stdout.write(f'{document_id}\t{result}')
+        self.stdout.write(f'处理完成！共 {len(results)} 个文档，失败 {failed} 个')
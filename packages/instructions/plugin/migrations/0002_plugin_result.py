@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:24
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('plugin', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PluginResult',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('code', models.CharField(max_length=255, verbose_name='插件编码')),
+                ('version', models.CharField(max_length=20, verbose_name='插件版本')),
+                ('config_hash', models.CharField(max_length=32, verbose_name='配置指纹')),
+                ('hex', models.CharField(max_length=255, verbose_name='哈希值')),
+                (
+                    'result',
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                        verbose_name='结果',
+                    ),
+                ),
+                ('hit_count', models.IntegerField(default=0, verbose_name='命中次数')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                (
+                    'last_used_time',
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name='最近使用时间'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': '插件结果',
+                'verbose_name_plural': '插件结果',
+                'db_table': 'plugin_result',
+                'indexes': [
+                    models.Index(fields=['last_used_time', 'id'], name='plugin_result_lru_idx')
+                ],
+                'unique_together': {('code', 'version', 'config_hash', 'hex')},
+            },
+        ),
+    ]
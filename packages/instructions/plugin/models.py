@@ -1,19 +1,25 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 
 from instructions.models import BaseModel
 
 
 class PluginModel(BaseModel):
+    STORE = 'STORE'
+    PARSING = 'PARSING'
     SCOPE_CHOICES = [
-        ('STORE', 'STORE'),
-        ('PARSING', 'PARSING'),
+        (STORE, 'STORE'),
+        (PARSING, 'PARSING'),
     ]
+    ACTIVE = 'active'
+
     name = models.CharField(max_length=255, verbose_name='插件名称')
     description = models.TextField(verbose_name='插件描述')
     code = models.CharField(verbose_name='插件编码', max_length=255)
     scope = models.CharField(max_length=20, verbose_name='插件作用域', choices=SCOPE_CHOICES)
     config = models.JSONField(verbose_name='插件配置')
-    status = models.CharField(max_length=20, verbose_name='插件状态', default='active')
+    status = models.CharField(max_length=20, verbose_name='插件状态', default=ACTIVE)
     version = models.CharField(max_length=20, verbose_name='插件版本')
     author = models.CharField(max_length=255, verbose_name='插件作者')
     tags = models.CharField(
@@ -25,3 +31,29 @@ class PluginModel(BaseModel):
         verbose_name = '插件'
         verbose_name_plural = '插件'
         unique_together = ('code', 'version')
+
+
+class PluginResult(models.Model):
+    """
+    插件结果缓存，按 (插件编码, 插件版本, 配置指纹, 文件哈希) 保存
+    插件版本或配置变化后键随之变化，旧结果不再命中；超过PLUGIN_RESULT_CACHE_SIZE时淘汰最久未使用的记录
+    """
+
+    code = models.CharField(max_length=255, verbose_name='插件编码')
+    version = models.CharField(max_length=20, verbose_name='插件版本')
+    config_hash = models.CharField(max_length=32, verbose_name='配置指纹')
+    hex = models.CharField(max_length=255, verbose_name='哈希值')
+    result = models.JSONField(verbose_name='结果', null=True, encoder=DjangoJSONEncoder)
+    hit_count = models.IntegerField(verbose_name='命中次数', default=0)
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    last_used_time = models.DateTimeField(default=timezone.now, verbose_name='最近使用时间')
+
+    class Meta:
+        db_table = 'plugin_result'
+        verbose_name = '插件结果'
+        verbose_name_plural = '插件结果'
+        unique_together = ('code', 'version', 'config_hash', 'hex')
+        indexes = [models.Index(fields=['last_used_time', 'id'], name='plugin_result_lru_idx')]
+
+    def __str__(self):
+        return f'{self.hex} - {self.code}@{self.version}'
@@ -1,3 +1,612 @@
-from django.test import TestCase
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from content.models import Blob, Content, Document
+from content.utils import get_blob_path, write_blob
+from instructions.asgi import run_store_plugin
+from plugin.core import (
+    PLUGIN_CLASSES,
+    AsyncStoreBasePlugin,
+    BasePlugin,
+    ParsingBasePlugin,
+    StoreBasePlugin,
+    register_plugin,
+)
+from plugin.core.async_runner import AsyncPluginRunner
+from plugin.core.cache import PluginResultCache
+from plugin.core.executor import PluginExecutor
+from plugin.core.pipeline import PluginPipeline, open_stream
+from plugin.core.registry import PluginRegistry
+from plugin.models import PluginModel, PluginResult
+
+EVENTS = []
+
+
+@register_plugin
+class EchoPlugin(StoreBasePlugin):
+    code = 'echo'
+
+    def setup(self):
+        EVENTS.append(('setup', self.plugin_config['prefix']))
+
+    def run(self, file_path: str):
+        if file_path == 'bad':
+            raise ValueError(file_path)
+        return self.plugin_config['prefix'] + file_path
+
+    def teardown(self):
+        EVENTS.append(('teardown', self.plugin_config['prefix']))
+
+
+@register_plugin
+class WorkerPlugin(BasePlugin):
+    """在子进程中执行，按文件名模拟耗时、崩溃和异常"""
+
+    code = 'worker'
+    scope = 'PARSING'
+
+    def setup(self):
+        self.runs = 0
+
+    def run(self, file_path: str):
+        self.runs += 1
+        if file_path == 'sleep':
+            time.sleep(30)
+        elif file_path == 'crash':
+            os._exit(1)
+        elif file_path == 'bad':
+            raise ValueError(file_path)
+        return file_path.upper(), os.getpid(), self.runs
+
+    def teardown(self):
+        Path(self.plugin_config['marker_dir']).joinpath(str(os.getpid())).touch()
+
+
+@register_plugin
+class CaseStorePlugin(StoreBasePlugin):
+    """按配置原样传递、写入临时文件或BytesIO"""
+
+    code = 'case'
+
+    def setup(self):
+        pass
+
+    def store(self, data):
+        output = self.plugin_config.get('output')
+        if output == 'file':
+            f = tempfile.TemporaryFile()
+            f.write(bytes(data).upper())
+            return f
+        if output == 'bytesio':
+            return BytesIO(bytes(data).lower())
+        return None
+
+    def teardown(self):
+        pass
+
+
+@register_plugin
+class LineCountPlugin(ParsingBasePlugin):
+    code = 'lines'
+
+    def setup(self):
+        pass
+
+    def parse(self, data):
+        with open_stream(data) as f:
+            return len(f.readlines())
+
+    def teardown(self):
+        pass
+
+
+@register_plugin
+class HeadPlugin(ParsingBasePlugin):
+    code = 'head'
+
+    def setup(self):
+        pass
+
+    def parse(self, data):
+        return bytes(data[: self.plugin_config['size']])
+
+    def teardown(self):
+        pass
+
+
+@register_plugin
+class DigestPlugin(ParsingBasePlugin):
+    """按路径读取文件，记录实际执行的次数"""
+
+    code = 'digest'
+    runs = []
+
+    def setup(self):
+        pass
+
+    def run(self, file_path: str):
+        data = Path(file_path).read_bytes()
+        self.runs.append(data)
+        if self.plugin_config.get('raw'):
+            return data
+        return {'size': len(data), 'head': data[:2].decode(), 'mode': self.plugin_config['mode']}
+
+    def teardown(self):
+        pass
+
+
+@register_plugin
+class RemoteStorePlugin(AsyncStoreBasePlugin):
+    """模拟写入远程存储，按文件内容模拟耗时和异常"""
+
+    code = 'remote'
+
+    async def setup(self):
+        EVENTS.append('setup')
+
+    async def run(self, file_path: str):
+        data = Path(file_path).read_bytes()
+        await asyncio.sleep(30 if data == b'slow' else 0.05)
+        if data == b'bad':
+            raise ValueError(file_path)
+        return len(data)
+
+    async def teardown(self):
+        EVENTS.append('teardown')
+
+
+class PluginRegistryTestSuite(TestCase):
+    """插件注册表与实例池测试套件"""
+
+    def setUp(self):
+        EVENTS.clear()
+        self.plugin = self.create_plugin('echo', PluginModel.STORE, config={'prefix': 'v1:'})
+        self.registry = PluginRegistry(max_size=2, idle_timeout=60, refresh_interval=60)
+        self.addCleanup(self.registry.close)
+
+    @staticmethod
+    def create_plugin(code, scope, version='1.0', config=None):
+        return PluginModel.objects.create(
+            name=code,
+            description='',
+            code=code,
+            scope=scope,
+            config=config or {},
+            version=version,
+            author='test',
+        )
+
+    def run_plugin(self, file_path='a.txt'):
+        return self.registry.run('echo', '1.0', PluginModel.STORE, file_path)
+
+    def test_instances_are_reused(self):
+        """多次run复用同一个已setup的实例"""
+        self.assertEqual([self.run_plugin() for _ in range(3)], ['v1:a.txt'] * 3)
+        self.assertEqual(EVENTS, [('setup', 'v1:')])
+        stats = self.registry.stats()['echo:1.0:STORE']
+        self.assertEqual((stats['setups'], stats['reuses'], stats['idle']), (1, 2, 1))
+
+        self.registry.close()
+        self.assertEqual(EVENTS, [('setup', 'v1:'), ('teardown', 'v1:')])
+
+    def test_pool_is_bounded(self):
+        """实例数达到上限后等待归还，超时抛出TimeoutError"""
+        registry = PluginRegistry(max_size=1, idle_timeout=60, acquire_timeout=0.05)
+        self.addCleanup(registry.close)
+        with registry.acquire('echo', '1.0', PluginModel.STORE) as plugin:
+            with self.assertRaises(TimeoutError):
+                with registry.acquire('echo', '1.0', PluginModel.STORE):
+                    pass
+        with registry.acquire('echo', '1.0', PluginModel.STORE) as again:
+            self.assertIs(again, plugin)
+        self.assertEqual(EVENTS, [('setup', 'v1:')])
+
+    def test_config_change_evicts_instances(self):
+        """插件配置保存后旧实例teardown，下次run按新配置setup"""
+        self.run_plugin()
+        self.plugin.config = {'prefix': 'v2:'}
+        self.plugin.save()
+        self.assertEqual(self.run_plugin(), 'v2:a.txt')
+        self.assertEqual(EVENTS, [('setup', 'v1:'), ('teardown', 'v1:'), ('setup', 'v2:')])
+
+    def test_config_change_from_other_process(self):
+        """没有信号通知时按刷新间隔核对配置"""
+        registry = PluginRegistry(max_size=2, idle_timeout=60, refresh_interval=0)
+        self.addCleanup(registry.close)
+        registry.run('echo', '1.0', PluginModel.STORE, 'a')
+        registry.run('echo', '1.0', PluginModel.STORE, 'a')
+        PluginModel.objects.filter(id=self.plugin.id).update(config={'prefix': 'v2:'})
+        self.assertEqual(registry.run('echo', '1.0', PluginModel.STORE, 'a'), 'v2:a')
+        self.assertEqual(EVENTS, [('setup', 'v1:'), ('teardown', 'v1:'), ('setup', 'v2:')])
+
+        PluginModel.objects.filter(id=self.plugin.id).update(status='disabled')
+        with self.assertRaises(PluginModel.DoesNotExist):
+            registry.run('echo', '1.0', PluginModel.STORE, 'a')
+        self.assertEqual(EVENTS[-1], ('teardown', 'v2:'))
+
+    def test_idle_instances_are_evicted(self):
+        registry = PluginRegistry(max_size=2, idle_timeout=0.01, refresh_interval=60)
+        self.addCleanup(registry.close)
+        registry.run('echo', '1.0', PluginModel.STORE, 'a')
+        time.sleep(0.02)
+        self.assertEqual(registry.evict_idle(), 1)
+        self.assertEqual(EVENTS, [('setup', 'v1:'), ('teardown', 'v1:')])
+
+    def test_failed_run_discards_instance(self):
+        with self.assertRaises(ValueError):
+            self.run_plugin('bad')
+        self.assertEqual(EVENTS, [('setup', 'v1:'), ('teardown', 'v1:')])
+        self.assertEqual(self.registry.stats()['echo:1.0:STORE']['size'], 0)
+
+    def test_unknown_plugin(self):
+        with self.assertRaises(PluginModel.DoesNotExist):
+            self.registry.run('echo', '2.0', PluginModel.STORE, 'a')
+        # 实现类的作用域与插件记录不一致
+        self.create_plugin('echo', PluginModel.PARSING, version='1.1')
+        with self.assertRaises(ImproperlyConfigured):
+            self.registry.run('echo', '1.1', PluginModel.PARSING, 'a')
+
+        self.create_plugin('missing', PluginModel.STORE)
+        self.assertNotIn('missing', PLUGIN_CLASSES)
+        with self.assertRaises(ImproperlyConfigured):
+            self.registry.run('missing', '1.0', PluginModel.STORE, 'a')
+
+
+class PluginExecutorTestSuite(TestCase):
+    """插件进程池执行器测试套件"""
+
+    def setUp(self):
+        self.marker_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.marker_dir, ignore_errors=True)
+        PluginModel.objects.create(
+            name='解析',
+            description='',
+            code='worker',
+            scope=PluginModel.PARSING,
+            config={'marker_dir': str(self.marker_dir)},
+            version='1.0',
+            author='test',
+        )
+
+    def create_executor(self, **kwargs):
+        return PluginExecutor('worker', '1.0', PluginModel.PARSING, **kwargs)
+
+    def test_run_many_keeps_order(self):
+        """结果按输入顺序返回，每个子进程只setup一次，进程池关闭时teardown"""
+        paths = [f'file{i}' for i in range(8)]
+        with self.create_executor(workers=2, timeout=10) as executor:
+            results = executor.run_many(paths)
+            self.assertEqual(executor.run('single')[0], 'SINGLE')
+        self.assertEqual([name for name, _, _ in results], [path.upper() for path in paths])
+        runs_by_pid = {}
+        for _, pid, runs in results:
+            runs_by_pid.setdefault(pid, []).append(runs)
+        for runs in runs_by_pid.values():
+            self.assertEqual(sorted(runs), list(range(1, len(runs) + 1)))
+        # 未分到任务的子进程同样会teardown
+        self.assertLessEqual(
+            set(map(str, runs_by_pid)), {path.name for path in self.marker_dir.iterdir()}
+        )
+
+    def test_timeout_and_crash_are_isolated(self):
+        """超时和崩溃只影响对应的文件，进程池重建后继续处理其他文件"""
+        with self.create_executor(workers=2, timeout=1) as executor:
+            results = executor.run_many(['a', 'sleep', 'crash', 'bad', 'b'], return_exceptions=True)
+            self.assertGreaterEqual(executor.restarts, 2)
+            self.assertEqual(executor.run('after')[0], 'AFTER')
+        self.assertEqual(results[0][0], 'A')
+        self.assertIsInstance(results[1], TimeoutError)
+        self.assertIsInstance(results[2], BrokenProcessPool)
+        self.assertIsInstance(results[3], ValueError)
+        self.assertEqual(results[4][0], 'B')
+
+        with self.create_executor(workers=1, timeout=10) as executor:
+            with self.assertRaises(ValueError):
+                executor.run_many(['a', 'bad'])
+
+    def test_run_plugin_command(self):
+        out = StringIO()
+        call_command('run_plugin', 'worker', '1.0', 'x', 'bad', workers=1, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("x\t('X'"))
+        self.assertIn('ValueError', lines[1])
+        self.assertIn('失败 1 个', lines[2])
+
+
+class PluginPipelineTestSuite(TestCase):
+    """STORE → PARSING插件流水线测试套件"""
+
+    def setUp(self):
+        store_path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, store_path, ignore_errors=True)
+        settings_override = override_settings(STORE_PATH=store_path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        write_blob('abc', [b'Line 1\nLine 2\n'], store_path)
+        collection = Content.objects.create(code='col', title='集合')
+        self.document = Document.objects.create(
+            name='doc.txt',
+            path=get_blob_path('abc'),
+            size=14,
+            mime_type='text/plain',
+            order=1,
+            hex='abc',
+            collection=collection,
+        )
+        self.store = PluginRegistryTestSuite.create_plugin('case', PluginModel.STORE)
+        PluginRegistryTestSuite.create_plugin('lines', PluginModel.PARSING)
+        PluginRegistryTestSuite.create_plugin('head', PluginModel.PARSING, config={'size': 4})
+        self.registry = PluginRegistry(max_size=1, idle_timeout=60, refresh_interval=0)
+        self.addCleanup(self.registry.close)
+
+    def run_pipeline(self, parsing=('lines@1.0', 'head@1.0')):
+        return PluginPipeline('case@1.0', list(parsing), self.registry).run(self.document)
+
+    def test_stages_share_buffer(self):
+        """STORE阶段未修改内容时各PARSING阶段直接读取文档的映射，耗时写入文档"""
+        result = self.run_pipeline()
+        self.assertEqual(result.results, [2, b'Line'])
+        stages = [stage['stage'] for stage in result.timings['stages']]
+        self.assertEqual(
+            stages, ['mmap', 'STORE:case@1.0', 'PARSING:lines@1.0', 'PARSING:head@1.0']
+        )
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.plugin_timings, result.timings)
+        self.assertGreaterEqual(result.timings['total_ms'], result.timings['stages'][0]['ms'])
+
+    def test_store_output_is_passed_on(self):
+        """STORE阶段返回的文件对象映射后交给各PARSING阶段"""
+        for output, expected in (('file', b'LINE'), ('bytesio', b'line')):
+            PluginModel.objects.filter(id=self.store.id).update(config={'output': output})
+            self.assertEqual(self.run_pipeline().results, [2, expected])
+
+    def test_failed_stage_is_recorded(self):
+        with self.assertRaises(PluginModel.DoesNotExist):
+            self.run_pipeline(['lines@1.0', 'head@2.0'])
+        self.document.refresh_from_db()
+        failed = self.document.plugin_timings['stages'][-1]
+        self.assertEqual((failed['stage'], failed['error']), ('PARSING:head@2.0', 'DoesNotExist'))
+
+        with self.assertRaises(ImproperlyConfigured):
+            PluginPipeline('case', ['lines@1.0'])
+        with self.assertRaises(ImproperlyConfigured):
+            PluginPipeline('case@1.0', [])
+
+    def test_run_pipeline_command(self):
+        out = StringIO()
+        call_command(
+            'run_pipeline',
+            self.document.id,
+            store='case@1.0',
+            parsing=['head@1.0'],
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith(f"{self.document.id}\t[b'Line']\tmmap "))
+        self.assertIn('失败 0 个', lines[1])
+
+
+class PluginResultCacheTestSuite(TestCase):
+    """插件结果缓存测试套件"""
+
+    def setUp(self):
+        DigestPlugin.runs.clear()
+        self.store_path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.store_path, ignore_errors=True)
+        settings_override = override_settings(STORE_PATH=self.store_path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.collection = Content.objects.create(code='col', title='集合')
+        self.plugin = PluginRegistryTestSuite.create_plugin(
+            'digest', PluginModel.PARSING, config={'mode': 'a'}
+        )
+        self.cache = PluginResultCache(max_size=2)
+        self.registry = self.create_registry()
+
+    def create_registry(self):
+        registry = PluginRegistry(max_size=1, refresh_interval=0, result_cache=self.cache)
+        self.addCleanup(registry.close)
+        return registry
+
+    def create_document(self, hexcode, data, compression=None):
+        write_blob(hexcode, [data], self.store_path, compression)
+        Blob.objects.create(hex=hexcode, size=len(data), compression=compression)
+        return Document.objects.create(
+            name=hexcode,
+            path=get_blob_path(hexcode),
+            size=len(data),
+            mime_type='text/plain',
+            order=1,
+            hex=hexcode,
+            collection=self.collection,
+        )
+
+    def run_document(self, document, registry=None, version='1.0'):
+        return (registry or self.registry).run_document(
+            'digest', version, PluginModel.PARSING, document
+        )
+
+    def test_results_are_reused(self):
+        """相同内容只执行一次，重建注册表（进程重启）后仍然命中，压缩存储的文件解压后执行"""
+        document = self.create_document('aaa', b'hello world', compression='gzip')
+        expected = {'size': 11, 'head': 'he', 'mode': 'a'}
+        self.assertEqual(self.run_document(document), expected)
+        self.assertEqual(self.run_document(document), expected)
+        self.assertEqual(self.run_document(document, registry=self.create_registry()), expected)
+        self.assertEqual(DigestPlugin.runs, [b'hello world'])
+        self.assertEqual(PluginResult.objects.get().hit_count, 2)
+        self.assertEqual(self.cache.stats()['hit_ratio'], 2 / 3)
+
+    def test_version_and_config_changes_invalidate(self):
+        document = self.create_document('aaa', b'hello')
+        self.run_document(document)
+        self.plugin.config = {'mode': 'b'}
+        self.plugin.save()
+        self.assertEqual(self.run_document(document)['mode'], 'b')
+        # 旧配置下的结果在保存插件时清理
+        self.assertEqual(PluginResult.objects.get().result['mode'], 'b')
+
+        PluginRegistryTestSuite.create_plugin(
+            'digest', PluginModel.PARSING, version='2.0', config={'mode': 'b'}
+        )
+        self.run_document(document, version='2.0')
+        self.assertEqual(len(DigestPlugin.runs), 3)
+        self.plugin.delete()
+        self.assertEqual(list(PluginResult.objects.values_list('version', flat=True)), ['2.0'])
+
+    def test_least_recently_used_are_evicted(self):
+        first, second, third = (
+            self.create_document(hexcode, hexcode.encode()) for hexcode in ('aaa', 'bbb', 'ccc')
+        )
+        self.run_document(first)
+        self.run_document(second)
+        self.run_document(first)
+        self.run_document(third)
+        self.assertEqual(set(PluginResult.objects.values_list('hex', flat=True)), {'aaa', 'ccc'})
+        self.run_document(second)
+        self.assertEqual(DigestPlugin.runs, [b'aaa', b'bbb', b'ccc', b'bbb'])
+
+    def test_executor_uses_cache(self):
+        """进程池执行器按文件哈希缓存，命中的文档不再分发到子进程，相同内容只执行一次"""
+        other_collection = Content.objects.create(code='col2', title='集合2')
+        first = self.create_document('aaa', b'hello', compression='gzip')
+        copy = Document.objects.create(
+            name='copy', path=first.path, size=5, order=1, hex='aaa', collection=other_collection
+        )
+        second = self.create_document('bbb', b'world')
+        with PluginExecutor('digest', '1.0', PluginModel.PARSING, workers=1) as executor:
+            executor.result_cache = self.cache
+            results = executor.run_documents([first, second, copy])
+            self.assertEqual([result['head'] for result in results], ['he', 'wo', 'he'])
+            self.assertEqual(PluginResult.objects.count(), 2)
+            with patch.object(executor, 'run_many') as run_many:
+                self.assertEqual(executor.run_documents([second, first]), results[1::-1])
+            run_many.assert_not_called()
+        self.assertEqual(self.cache.stats()['hits'], 2)
+
+    def test_pipeline_uses_cache(self):
+        """流水线PARSING阶段按文档哈希缓存，全部命中时不读取文档，STORE插件配置变化后不再命中"""
+        document = self.create_document('aaa', b'Line 1\nLine 2\n')
+        store = PluginRegistryTestSuite.create_plugin('case', PluginModel.STORE)
+        PluginRegistryTestSuite.create_plugin('lines', PluginModel.PARSING)
+        pipeline = PluginPipeline('case@1.0', ['lines@1.0'], self.registry)
+        self.assertEqual(pipeline.run(document).results, [2])
+
+        with patch.object(Document, 'map_file') as map_file:
+            result = pipeline.run(document)
+        map_file.assert_not_called()
+        self.assertEqual(result.results, [2])
+        self.assertEqual(
+            [(stage['stage'], stage.get('cached')) for stage in result.timings['stages']],
+            [('PARSING:lines@1.0', True)],
+        )
+
+        PluginModel.objects.filter(id=store.id).update(config={'output': 'bytesio'})
+        result = pipeline.run(document)
+        self.assertEqual(len(result.timings['stages']), 3)
+        self.assertEqual(PluginResult.objects.filter(code='lines').count(), 2)
+
+    def test_unserializable_results_are_not_cached(self):
+        PluginModel.objects.filter(id=self.plugin.id).update(config={'raw': True})
+        document = self.create_document('aaa', b'raw')
+        self.assertEqual(self.run_document(document), b'raw')
+        self.assertEqual(self.run_document(document), b'raw')
+        self.assertEqual(len(DigestPlugin.runs), 2)
+        self.assertFalse(PluginResult.objects.exists())
+
+
+class AsyncPluginRunnerTestSuite(TestCase):
+    """异步STORE插件执行器测试套件"""
+
+    def setUp(self):
+        EVENTS.clear()
+        store_path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, store_path, ignore_errors=True)
+        settings_override = override_settings(STORE_PATH=store_path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        collection = Content.objects.create(code='col', title='集合')
+        self.documents = []
+        for index, data in enumerate([b'a', b'bb', b'ccc', b'slow', b'bad', b'dddd']):
+            hexcode = f'h{index}'
+            write_blob(hexcode, [data], store_path, 'gzip' if index == 0 else None)
+            Blob.objects.create(
+                hex=hexcode, size=len(data), compression='gzip' if index == 0 else None
+            )
+            self.documents.append(
+                Document.objects.create(
+                    name=hexcode,
+                    path=get_blob_path(hexcode),
+                    size=len(data),
+                    mime_type='text/plain',
+                    order=index,
+                    hex=hexcode,
+                    collection=collection,
+                )
+            )
+        PluginRegistryTestSuite.create_plugin('remote', PluginModel.STORE)
+
+    def test_documents_run_concurrently(self):
+        """同一实例并发处理多个文档，同时处理的文档数不超过上限，结果按输入顺序返回"""
+        documents = [self.documents[i] for i in (0, 1, 2, 5)] * 2
+
+        async def run():
+            async with AsyncPluginRunner('remote', '1.0', concurrency=3) as runner:
+                return await runner.run_documents(documents), runner.max_active
+
+        started = time.monotonic()
+        results, max_active = async_to_sync(run)()
+        self.assertEqual(results, [1, 2, 3, 4] * 2)
+        self.assertEqual(max_active, 3)
+        # 8个文档每个0.05秒，并发3个时约0.15秒
+        self.assertLess(time.monotonic() - started, 0.35)
+        self.assertEqual(EVENTS, ['setup', 'teardown'])
+
+    def test_failures_are_isolated(self):
+        """超时、异常和不存在的文档只影响对应位置，可从ASGI入口模块调用"""
+        ids = [self.documents[3].id, self.documents[4].id, 0, self.documents[1].id]
+        results = async_to_sync(run_store_plugin)('remote', '1.0', ids, timeout=0.3)
+        self.assertIsInstance(results[0], TimeoutError)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertIsInstance(results[2], Document.DoesNotExist)
+        self.assertEqual(results[3], 2)
+
+        async def run_many():
+            async with AsyncPluginRunner('remote', '1.0', timeout=0.3) as runner:
+                await runner.run_many(['missing.txt'])
+
+        with self.assertRaises(FileNotFoundError):
+            async_to_sync(run_many)()
+
+    def test_sync_and_async_plugins_are_not_mixed(self):
+        PluginRegistryTestSuite.create_plugin('echo', PluginModel.STORE, config={'prefix': ''})
+        with self.assertRaises(ImproperlyConfigured):
+            async_to_sync(AsyncPluginRunner('echo', '1.0').start)()
+        registry = PluginRegistry()
+        self.addCleanup(registry.close)
+        with self.assertRaises(ImproperlyConfigured):
+            registry.run('remote', '1.0', PluginModel.STORE, 'a')
+
+    def test_run_store_plugin_command(self):
+        out = StringIO()
+        ids = [str(self.documents[2].id), str(self.documents[4].id)]
+        call_command('run_store_plugin', 'remote', '1.0', *ids, concurrency=2, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], f'{ids[0]}\t3')
+        self.assertIn('ValueError', lines[1])
+        self.assertIn('失败 1 个', lines[2])